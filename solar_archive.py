@@ -0,0 +1,248 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from solar_cache import content_key
+from solar_core import HOURS_PER_YEAR, compute_thermal_outputs, year_calendar
+from solar_timeseries import fill_gaps
+
+try:
+    import xarray as xr
+except ImportError:  # NetCDF archives are optional
+    xr = None
+
+# -------------------------------------------------
+# Multi-year DNI archives
+# -------------------------------------------------
+# A 10-20 year archive is ingested once into a (years, 8760) float32 file
+# on disk and opened as a read-only memmap. Input is streamed year by
+# year, statistics run over chunks of years, so neither step holds the
+# whole archive in memory.
+
+ARCHIVE_DIR = os.environ.get("HELIXIS_ARCHIVE_DIR", os.path.join(tempfile.gettempdir(), "helixis_archive"))
+CHUNK_ROWS = 8760
+YEARS_PER_CHUNK = 4
+# Years with less coverage than this are left out of the archive
+MIN_YEAR_COVERAGE = 0.9
+
+
+class _YearWriter:
+    """Accumulate hourly DNI sums per year and append complete years to disk."""
+
+    def __init__(self, path):
+        self.out = open(path, "wb")
+        self.year = None
+        self.years = []
+        self.skipped = []
+
+    def add(self, timestamps, dni_w_m2):
+        timestamps = pd.DatetimeIndex(timestamps)
+        values = np.asarray(dni_w_m2, dtype=float)
+        # 29 February is dropped; later days of a leap year shift back by one
+        leap_shift = (timestamps.is_leap_year & (timestamps.dayofyear > 59)).astype(int)
+        keep = ~((timestamps.month == 2) & (timestamps.day == 29)) & ~np.isnan(values)
+        hour_of_year = (timestamps.dayofyear - 1 - leap_shift) * 24 + timestamps.hour
+        years = timestamps.year
+        for year in np.unique(years[keep]):
+            in_year = keep & (years == year)
+            if year != self.year:
+                self.flush()
+                self.year = year
+                self.sums = np.zeros(HOURS_PER_YEAR)
+                self.counts = np.zeros(HOURS_PER_YEAR)
+            hours = np.asarray(hour_of_year[in_year])
+            self.sums += np.bincount(hours, weights=values[in_year], minlength=HOURS_PER_YEAR)
+            self.counts += np.bincount(hours, minlength=HOURS_PER_YEAR)
+
+    def flush(self):
+        if self.year is None:
+            return
+        covered = self.counts > 0
+        if covered.mean() < MIN_YEAR_COVERAGE:
+            self.skipped.append(int(self.year))
+        else:
+            hourly = np.full(HOURS_PER_YEAR, np.nan)
+            hourly[covered] = self.sums[covered] / self.counts[covered]
+            fill_gaps(hourly)[0].astype(np.float32).tofile(self.out)
+            self.years.append(int(self.year))
+        self.year = None
+
+    def close(self):
+        self.flush()
+        self.out.close()
+
+
+def _archive_paths(key, archive_dir):
+    base = os.path.join(archive_dir or ARCHIVE_DIR, key)
+    return base + ".f32", base + ".json"
+
+
+def _ingest(key, archive_dir, feed):
+    """Run feed(writer) once per archive key and return its metadata."""
+    data_path, meta_path = _archive_paths(key, archive_dir)
+    # A data file cleaned out of the temp directory is ingested again
+    if os.path.exists(meta_path) and os.path.exists(data_path):
+        with open(meta_path) as f:
+            return json.load(f)
+    directory = os.path.dirname(data_path)
+    os.makedirs(directory, exist_ok=True)
+    # A unique temp file per ingest, so sessions ingesting the same upload
+    # at once never write into each other's file
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(data_path) + ".", suffix=".tmp")
+    os.close(fd)
+    writer = _YearWriter(tmp_path)
+    try:
+        feed(writer)
+    except BaseException:
+        writer.close()
+        os.remove(tmp_path)
+        raise
+    writer.close()
+    if not writer.years:
+        os.remove(tmp_path)
+        raise ValueError(
+            f"DNI archive holds no year with at least {MIN_YEAR_COVERAGE:.0%} of its hours."
+        )
+    os.replace(tmp_path, data_path)
+    meta = {"path": data_path, "years": writer.years, "skipped": writer.skipped}
+    # The metadata marks the archive as ready, so it is replaced atomically too
+    with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False) as f:
+        json.dump(meta, f)
+    os.replace(f.name, meta_path)
+    return meta
+
+
+def ingest_csv(csv_file, archive_dir=None, chunk_rows=CHUNK_ROWS):
+    """Ingest a time-ordered CSV of timestamps (first column) and DNI [W/m²] (last numeric column).
+
+    Any resolution down to one value per hour is averaged to hours.
+    Identical uploads reuse the archive already on disk.
+    """
+    if hasattr(csv_file, "getvalue"):
+        key = content_key("csv", csv_file.getvalue())
+        csv_file.seek(0)
+    else:
+        stat = os.stat(csv_file)
+        key = content_key("csv", os.path.abspath(csv_file), stat.st_size, stat.st_mtime)
+
+    def feed(writer):
+        column = None
+        for chunk in pd.read_csv(csv_file, chunksize=chunk_rows):
+            timestamps = pd.to_datetime(chunk.iloc[:, 0], errors="coerce")
+            if column is None:
+                numeric = chunk.iloc[:, 1:].apply(pd.to_numeric, errors="coerce").dropna(axis=1, how="all")
+                if numeric.shape[1] == 0:
+                    raise ValueError("DNI archive CSV needs a timestamp column and a numeric DNI column.")
+                column = numeric.columns[-1]
+            valid = timestamps.notna().to_numpy()
+            writer.add(timestamps[valid], pd.to_numeric(chunk[column], errors="coerce").to_numpy()[valid])
+
+    return _ingest(key, archive_dir, feed)
+
+
+def ingest_netcdf(path, variable=None, archive_dir=None):
+    """Ingest a NetCDF file with a time coordinate, one year at a time (needs xarray)."""
+    if xr is None:
+        raise ValueError("Reading NetCDF archives needs the optional xarray package.")
+    stat = os.stat(path)
+    key = content_key("netcdf", os.path.abspath(path), stat.st_size, stat.st_mtime, variable)
+
+    def feed(writer):
+        with xr.open_dataset(path) as ds:
+            name = variable or next(
+                (v for v in ("dni", "DNI", "DNI_W_m2") if v in ds.data_vars), list(ds.data_vars)[0]
+            )
+            dni = ds[name]
+            # Any other dimension (a single grid cell) is averaged out
+            spatial = [d for d in dni.dims if d != "time"]
+            for year in np.unique(ds["time"].dt.year.values):
+                one_year = dni.sel(time=str(year))
+                if spatial:
+                    one_year = one_year.mean(dim=spatial)
+                writer.add(one_year["time"].values, one_year.values)
+
+    return _ingest(key, archive_dir, feed)
+
+
+def open_archive(meta):
+    """Read-only (years, 8760) memmap of an ingested archive."""
+    return np.memmap(meta["path"], dtype=np.float32, mode="r", shape=(len(meta["years"]), HOURS_PER_YEAR))
+
+
+def yearly_profiles(hourly_w_m2):
+    """Per-year 24x12 typical days [Wh/m² per hour] and monthly kWh/m² from (years, 8760) rows."""
+    rows = np.asarray(hourly_w_m2, dtype=float)
+    n_years = rows.shape[0]
+    month_index, hour_of_day = year_calendar()
+    offsets = np.arange(n_years)[:, None]
+
+    cell = (offsets * 24 * 12 + hour_of_day * 12 + month_index).ravel()
+    sums = np.bincount(cell, weights=rows.ravel(), minlength=n_years * 24 * 12)
+    counts = np.bincount(hour_of_day * 12 + month_index, minlength=24 * 12)
+    hour_matrix_wh = (sums.reshape(n_years, 24 * 12) / counts).reshape(n_years, 24, 12)
+
+    month = (offsets * 12 + month_index).ravel()
+    monthly_kwh_m2 = np.bincount(month, weights=rows.ravel(), minlength=n_years * 12).reshape(n_years, 12) / 1000.0
+    return hour_matrix_wh, monthly_kwh_m2
+
+
+def yearly_yield(archive, mirror_area_m2, eta_opt, thermal_loss_frac, factor_24x12=None,
+                 years_per_chunk=YEARS_PER_CHUNK):
+    """Annual system kWh of every archive year, YEARS_PER_CHUNK years at a time.
+
+    eta_opt is a scalar or a function of the (years, 24, 12) irradiance
+    returning efficiencies (e.g. collector_efficiency with its parameters
+    bound). factor_24x12 is the aperture / shading derate of the site,
+    applied like apply_aperture_factor.
+    """
+    annual = np.empty(archive.shape[0])
+    for start in range(0, archive.shape[0], years_per_chunk):
+        hour_matrix_wh, monthly_kwh_m2 = yearly_profiles(archive[start:start + years_per_chunk])
+        if factor_24x12 is not None:
+            effective = hour_matrix_wh * np.asarray(factor_24x12, dtype=float)
+            dni_day = hour_matrix_wh.sum(axis=-2)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                monthly_kwh_m2 = monthly_kwh_m2 * np.where(dni_day > 0, effective.sum(axis=-2) / dni_day, 0.0)
+            hour_matrix_wh = effective
+        eta = eta_opt(hour_matrix_wh) if callable(eta_opt) else eta_opt
+        annual[start:start + years_per_chunk] = compute_thermal_outputs(
+            hour_matrix_wh, monthly_kwh_m2, monthly_kwh_m2.sum(axis=-1),
+            mirror_area_m2, eta, thermal_loss_frac
+        )[1]
+    return annual
+
+
+def interannual_statistics(years, annual_kwh, value_per_kwh, system_cost):
+    """Per-year table and P50 / P90 / worst-year summary of yield and payback.
+
+    P90 is the yield exceeded in 90% of years. Payback uses each year's
+    yield as if it repeated for the whole lifetime.
+    """
+    annual_kwh = np.asarray(annual_kwh, dtype=float)
+    value = annual_kwh * value_per_kwh
+    with np.errstate(divide="ignore"):
+        payback = np.where(value > 0, system_cost / value, np.inf)
+    per_year = pd.DataFrame({"annual_kwh": annual_kwh, "value": value, "payback_years": payback},
+                            index=pd.Index(years, name="year"))
+    worst = int(np.argmin(annual_kwh))
+
+    def payback_percentile(q):
+        # Interpolating between two never-paying years gives nan, not inf
+        with np.errstate(invalid="ignore"):
+            return float(np.nan_to_num(np.percentile(payback, q), nan=np.inf))
+
+    summary = {
+        "mean_kwh": float(annual_kwh.mean()),
+        "p50_kwh": float(np.percentile(annual_kwh, 50)),
+        "p90_kwh": float(np.percentile(annual_kwh, 10)),
+        "worst_year": int(years[worst]),
+        "worst_kwh": float(annual_kwh[worst]),
+        "cov": float(annual_kwh.std() / annual_kwh.mean()) if annual_kwh.mean() > 0 else 0.0,
+        "p50_payback": payback_percentile(50),
+        "p90_payback": payback_percentile(90),
+        "worst_payback": float(payback[worst]),
+    }
+    return per_year, summary
@@ -0,0 +1,188 @@
+import hashlib
+import io
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from solar_metrics import REGISTRY
+
+# -------------------------------------------------
+# Process-wide cache
+# -------------------------------------------------
+# Streamlit re-executes the app script on every rerun but imports this
+# module once per server process, so everything below is shared by all
+# sessions of the same instance.
+
+DEFAULT_CACHE_MB = 256
+SESSION_TTL_S = 30 * 60
+
+
+def estimate_nbytes(obj, _seen=None):
+    """Approximate memory footprint of obj in bytes (deep for containers)."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj)
+    if isinstance(obj, io.BytesIO):
+        return obj.getbuffer().nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            estimate_nbytes(k, _seen) + estimate_nbytes(v, _seen) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimate_nbytes(v, _seen) for v in obj)
+    return sys.getsizeof(obj)
+
+
+def content_key(*parts):
+    """Stable hex digest of raw bytes / scalars, used as a cache key."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            h.update(part)
+        else:
+            h.update(repr(part).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class ByteBudgetCache:
+    """Thread-safe LRU cache bounded by an estimated byte budget.
+
+    Cached values are shared between sessions and must be treated as
+    read-only by callers.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = int(max_bytes)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, nbytes=None):
+        if nbytes is None:
+            nbytes = estimate_nbytes(value)
+        if nbytes > self.max_bytes:
+            return value
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, key, compute):
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def entry_sizes(self):
+        """(kind, nbytes) per entry, most recently used last."""
+        with self._lock:
+            return [
+                (key[0] if isinstance(key, tuple) else str(key), nbytes)
+                for key, (_, nbytes) in self._entries.items()
+            ]
+
+
+SHARED_CACHE = ByteBudgetCache(
+    float(os.environ.get("HELIXIS_CACHE_MB", DEFAULT_CACHE_MB)) * 1024 * 1024
+)
+
+# -------------------------------------------------
+# Per-session footprint accounting
+# -------------------------------------------------
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def session_footprint(session_state):
+    """Bytes held by each session_state key, largest first."""
+    sizes = {}
+    for key in list(session_state.keys()):
+        try:
+            sizes[str(key)] = estimate_nbytes(session_state[key])
+        except Exception:
+            sizes[str(key)] = 0
+    return pd.Series(sizes, dtype="int64").sort_values(ascending=False)
+
+
+def record_session(session_id, user, nbytes):
+    with _sessions_lock:
+        _sessions[session_id] = {"user": user, "bytes": int(nbytes), "last_seen": time.time()}
+
+
+def active_sessions(ttl_s=SESSION_TTL_S):
+    """Sessions seen within ttl_s seconds; older records are dropped."""
+    cutoff = time.time() - ttl_s
+    with _sessions_lock:
+        for sid in [sid for sid, rec in _sessions.items() if rec["last_seen"] < cutoff]:
+            del _sessions[sid]
+        return pd.DataFrame(
+            [{"session": sid[:8], **rec} for sid, rec in _sessions.items()],
+            columns=["session", "user", "bytes", "last_seen"],
+        )
+
+
+# -------------------------------------------------
+# Metrics (read when a snapshot is taken)
+# -------------------------------------------------
+
+REGISTRY.counter("solar_cache_hits_total", "Shared cache lookups that found an entry", fn=lambda: SHARED_CACHE.hits)
+REGISTRY.counter("solar_cache_misses_total", "Shared cache lookups that missed", fn=lambda: SHARED_CACHE.misses)
+REGISTRY.counter("solar_cache_evictions_total", "Shared cache entries evicted for space", fn=lambda: SHARED_CACHE.evictions)
+REGISTRY.gauge("solar_cache_hit_ratio", "Share of shared cache lookups that hit", fn=lambda: SHARED_CACHE.stats()["hit_ratio"])
+REGISTRY.gauge("solar_cache_bytes", "Estimated bytes held by the shared cache", fn=lambda: SHARED_CACHE.current_bytes)
+REGISTRY.gauge("solar_active_sessions", f"Sessions seen in the last {SESSION_TTL_S // 60} minutes",
+               fn=lambda: len(active_sessions()))
@@ -0,0 +1,192 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from solar_core import DAYS_IN_MONTH, DESIGN_DNI_W_M2, MONTHS, compute_thermal_outputs
+from solar_efficiency import collector_efficiency
+from solar_tariff import tariff_value
+
+# -------------------------------------------------
+# Product catalog and per-model output kernels
+# -------------------------------------------------
+# The product line lives in a JSON file: aperture, optical efficiency,
+# efficiency-curve coefficients, cost and footprint per model. Output is
+# linear in the number of units, so for a loaded site the output of one
+# unit of every model is computed once, as a single stacked
+# compute_thermal_outputs call with a leading model axis. Any mix of
+# models is then a weighted sum of these kernels.
+
+CATALOG_PATH = os.environ.get(
+    "HELIXIS_CATALOG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "solar_catalog.json")
+)
+CATALOG_FIELDS = ["aperture_m2", "eta_opt", "a1", "a2", "unit_cost", "length_m", "width_m"]
+
+
+def load_catalog(path=None):
+    """Models of the catalog file as a DataFrame indexed by model name.
+
+    Every model needs all CATALOG_FIELDS; apertures and dimensions must be
+    positive and eta_opt within 0-1. footprint_m2 (length x width) is added.
+    """
+    path = path or CATALOG_PATH
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    models = data.get("models") if isinstance(data, dict) else None
+    if not models:
+        raise ValueError(f"Catalog {os.path.basename(path)} has no 'models' list.")
+
+    rows = []
+    for i, model in enumerate(models):
+        name = str(model.get("name") or f"model {i + 1}")
+        missing = [field for field in CATALOG_FIELDS if field not in model]
+        if missing:
+            raise ValueError(f"Catalog model '{name}' is missing: {', '.join(missing)}.")
+        try:
+            row = {field: float(model[field]) for field in CATALOG_FIELDS}
+        except (TypeError, ValueError):
+            raise ValueError(f"Catalog model '{name}' has a non-numeric field.")
+        if min(row["aperture_m2"], row["length_m"], row["width_m"]) <= 0:
+            raise ValueError(f"Catalog model '{name}' needs a positive aperture, length and width.")
+        if not 0 <= row["eta_opt"] <= 1 or min(row["a1"], row["a2"], row["unit_cost"]) < 0:
+            raise ValueError(
+                f"Catalog model '{name}' needs eta_opt within 0-1 and non-negative a1, a2 and unit_cost."
+            )
+        rows.append({"model": name, **row})
+
+    catalog = pd.DataFrame(rows).set_index("model")
+    if catalog.index.duplicated().any():
+        raise ValueError(f"Catalog model names must be unique: {', '.join(catalog.index[catalog.index.duplicated()])}.")
+    catalog["footprint_m2"] = catalog["length_m"] * catalog["width_m"]
+    return catalog
+
+
+def model_efficiency(catalog, hour_matrix_wh, t_operating_c=None, t_ambient_c=None):
+    """(models, 24, 12) efficiency of every model; constant eta_opt without temperatures."""
+    dni = np.asarray(hour_matrix_wh, dtype=float)
+    eta0 = catalog["eta_opt"].to_numpy()[:, None, None]
+    if t_operating_c is None:
+        return np.broadcast_to(eta0, (len(catalog),) + dni.shape).copy()
+    return collector_efficiency(
+        dni, eta0, catalog["a1"].to_numpy()[:, None, None], catalog["a2"].to_numpy()[:, None, None],
+        t_operating_c, t_ambient_c
+    )
+
+
+def model_kernels(catalog, hour_matrix_wh, monthly_kwh_m2, annual_kwh_m2, thermal_loss_frac,
+                  t_operating_c=None, t_ambient_c=None):
+    """Output of one unit of every catalog model on a site profile.
+
+    With t_operating_c the models' efficiency curves apply, else their
+    constant eta_opt. Returns a dict of arrays with a leading model axis:
+    hourly_direct_kw / hourly_system_kw (models, 24, 12), monthly_* and
+    daily_* (models, 12), annual_* (models,), plus eta (models, 24, 12),
+    aperture_m2 and peak_kw_at_1000 per unit.
+    """
+    n_models = len(catalog)
+    hours = np.broadcast_to(np.asarray(hour_matrix_wh, dtype=float), (n_models, 24, 12))
+    monthly = np.broadcast_to(np.asarray(monthly_kwh_m2, dtype=float), (n_models, 12))
+    annual = np.full(n_models, float(annual_kwh_m2))
+    eta = model_efficiency(catalog, hour_matrix_wh, t_operating_c, t_ambient_c)
+
+    per_m2 = compute_thermal_outputs(hours, monthly, annual, 1.0, eta, thermal_loss_frac)
+    aperture = catalog["aperture_m2"].to_numpy()
+    names = ["annual_direct_kwh", "annual_system_kwh", "monthly_direct_kwh", "monthly_system_kwh",
+             "hourly_direct_kw", "hourly_system_kw", "daily_direct_kwh", "daily_system_kwh"]
+    kernels = {
+        name: np.asarray(values) * aperture.reshape((-1,) + (1,) * (np.ndim(values) - 1))
+        for name, values in zip(names, per_m2)
+    }
+    if t_operating_c is None:
+        design_eta = catalog["eta_opt"].to_numpy()
+    else:
+        design_eta = model_efficiency(catalog, np.full((1, 1), DESIGN_DNI_W_M2), t_operating_c, t_ambient_c)[:, 0, 0]
+    kernels["eta"] = eta
+    kernels["aperture_m2"] = aperture
+    kernels["design_eta"] = design_eta
+    kernels["peak_kw_at_1000"] = aperture * DESIGN_DNI_W_M2 / 1000.0 * design_eta
+    return kernels
+
+
+def mix_outputs(kernels, counts, hour_index=None):
+    """compute_thermal_outputs' 8-tuple for a mix of units (one count per catalog model).
+
+    A weighted sum of the kernels; 24x12 results are DataFrames and
+    monthly / daily results Series, like the single-profile path.
+    """
+    counts = np.asarray(counts, dtype=float)
+    hour_index = range(24) if hour_index is None else hour_index
+
+    def weighted(name):
+        return np.tensordot(counts, kernels[name], axes=1)
+
+    return (
+        float(weighted("annual_direct_kwh")),
+        float(weighted("annual_system_kwh")),
+        pd.Series(weighted("monthly_direct_kwh"), index=MONTHS),
+        pd.Series(weighted("monthly_system_kwh"), index=MONTHS),
+        pd.DataFrame(weighted("hourly_direct_kw"), index=hour_index, columns=MONTHS),
+        pd.DataFrame(weighted("hourly_system_kw"), index=hour_index, columns=MONTHS),
+        pd.Series(weighted("daily_direct_kwh"), index=MONTHS),
+        pd.Series(weighted("daily_system_kwh"), index=MONTHS),
+    )
+
+
+def mix_efficiency(kernels, counts):
+    """Aperture-weighted (24, 12) efficiency and design efficiency of a mix."""
+    area = np.asarray(counts, dtype=float) * kernels["aperture_m2"]
+    total = area.sum()
+    if total <= 0:
+        return np.zeros(kernels["eta"].shape[1:]), 0.0
+    return np.tensordot(area / total, kernels["eta"], axes=1), float(area @ kernels["design_eta"] / total)
+
+
+def model_values(kernels, tariff):
+    """Annual value of one unit of every model under a tariff (flat price or 24x12 bands)."""
+    return np.array([
+        tariff_value(hourly, monthly, tariff)[2]
+        for hourly, monthly in zip(kernels["hourly_system_kw"], kernels["monthly_system_kwh"])
+    ])
+
+
+def mix_table(catalog, kernels, counts, installation_cost, unit_values):
+    """Area, energy, cost, value and payback of many mixes at once.
+
+    counts is (mixes, models) and unit_values the per-unit annual value of
+    every model (model_values); each row is priced from the catalog's unit
+    costs plus installation_cost.
+    """
+    counts = np.atleast_2d(np.asarray(counts, dtype=float))
+    system_cost = counts @ catalog["unit_cost"].to_numpy() + installation_cost
+    annual_value = counts @ np.asarray(unit_values, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback = np.where(annual_value > 0, system_cost / annual_value, np.inf)
+    table = pd.DataFrame(counts.astype(int), columns=catalog.index)
+    table["mirror_area"] = counts @ kernels["aperture_m2"]
+    table["footprint_m2"] = counts @ catalog["footprint_m2"].to_numpy()
+    table["annual_kwh"] = counts @ kernels["annual_system_kwh"]
+    table["system_cost"] = system_cost
+    table["annual_value"] = annual_value
+    table["payback_years"] = payback
+    return table
+
+
+def model_summary(catalog, kernels):
+    """Per-unit yield and cost figures of every model on the loaded site."""
+    days = np.array(list(DAYS_IN_MONTH.values()))
+    summary = pd.DataFrame({
+        "aperture_m2": kernels["aperture_m2"],
+        "eta_opt": catalog["eta_opt"].to_numpy(),
+        "unit_cost": catalog["unit_cost"].to_numpy(),
+        "footprint_m2": catalog["footprint_m2"].to_numpy(),
+        "annual_kwh_per_unit": kernels["annual_system_kwh"],
+        "kwh_per_m2": kernels["annual_system_kwh"] / kernels["aperture_m2"],
+        "peak_kw_at_1000": kernels["peak_kw_at_1000"],
+        "best_day_kwh": (kernels["monthly_system_kwh"] / days).max(axis=1),
+    }, index=catalog.index)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        summary["unit_cost_per_annual_kwh"] = np.where(
+            summary["annual_kwh_per_unit"] > 0, summary["unit_cost"] / summary["annual_kwh_per_unit"], np.inf
+        )
+    return summary
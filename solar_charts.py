@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+from solar_core import HOURS_PER_YEAR
+
+# -------------------------------------------------
+# Decimated time-series charts
+# -------------------------------------------------
+# A full year is 8760 to 52560 points and a multi-year archive several
+# hundred thousand, far more than a chart is wide. Series are reduced on
+# the server to about one point per pixel before they are sent, either
+# with Largest-Triangle-Three-Buckets (keeps the visual shape) or with the
+# minimum and maximum of each bucket (keeps every peak and trough). A
+# zoom window is decimated from the raw values again, so detail comes
+# back as the window narrows.
+
+DEFAULT_POINTS = 1500
+MIN_POINTS = 200
+MAX_POINTS = 5000
+
+DECIMATION_METHODS = {
+    "Shape (LTTB)": "lttb",
+    "Peaks (min/max per bucket)": "minmax",
+}
+
+# Non-leap year used to place a typical year on a time axis
+DISPLAY_YEAR = 2001
+
+
+def lttb_indices(values, n_out):
+    """Indices of the Largest-Triangle-Three-Buckets selection of n_out points."""
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # First and last points are kept; the rest is split into n_out - 2 buckets
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(int) + 1
+    edges[-1] = n - 1
+    bucket_mean = np.add.reduceat(y[:-1], edges[:-1]) / np.diff(edges)
+    bucket_mean_x = (edges[:-1] + edges[1:] - 1) / 2.0
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 1 < n_out - 2:
+            next_x, next_y = bucket_mean_x[i + 1], bucket_mean[i + 1]
+        else:
+            next_x, next_y = n - 1, y[-1]
+        x = np.arange(lo, hi)
+        area = np.abs((a - next_x) * (y[lo:hi] - y[a]) - (a - x) * (next_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(values, n_out):
+    """Indices of the minimum and maximum of n_out / 2 equal buckets, in time order."""
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    size = -(-n // n_buckets)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    # Buckets made only of padding (or missing values) contribute nothing
+    valid = ~np.isnan(blocks).all(axis=1)
+    blocks = np.where(np.isnan(blocks), np.nanmean(y), blocks)
+    lows = offsets + np.argmin(blocks, axis=1)
+    highs = offsets + np.argmax(blocks, axis=1)
+    selected = np.concatenate([lows[valid], highs[valid], [0, n - 1]])
+    return np.unique(selected[selected < n])
+
+
+def decimate(values, n_points, method="lttb", start=0, stop=None):
+    """Absolute indices of about n_points points of values[start:stop]."""
+    stop = len(values) if stop is None else stop
+    window = np.asarray(values[start:stop], dtype=float)
+    pick = lttb_indices if method == "lttb" else minmax_indices
+    return pick(window, n_points) + start
+
+
+def year_index(n_values, year=DISPLAY_YEAR):
+    """Time stamps of a one-year series at its own resolution (8760 x steps per hour)."""
+    steps = n_values // HOURS_PER_YEAR
+    return pd.date_range(f"{year}-01-01", periods=n_values, freq=pd.Timedelta(hours=1) / steps)
+
+
+def archive_index(years):
+    """Hourly time stamps of archive rows (one 8760-hour row per year, 29 February left out)."""
+    stamps = []
+    for year in years:
+        hours = pd.date_range(f"{year}-01-01", f"{year}-12-31 23:00", freq="h")
+        stamps.append(hours[~((hours.month == 2) & (hours.day == 29))])
+    return stamps[0].append(stamps[1:]) if len(stamps) > 1 else stamps[0]
+
+
+def decimated_series(values, index, n_points, method="lttb", start=0, stop=None, name=None):
+    """values[start:stop] decimated to about n_points, as a Series on its time stamps."""
+    selected = decimate(values, n_points, method, start, stop)
+    return pd.Series(np.asarray(values, dtype=float)[selected], index=index[selected], name=name)
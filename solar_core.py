@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+
+from solar_metrics import timed
+from solar_validate import detect_layout
+
+# -------------------------------------------------
+# Constants
+# -------------------------------------------------
+
+DAYS_IN_MONTH = {
+    "Jan": 31, "Feb": 28, "Mar": 31, "Apr": 30,
+    "May": 31, "Jun": 30, "Jul": 31, "Aug": 31,
+    "Sep": 30, "Oct": 31, "Nov": 30, "Dec": 31,
+}
+
+MONTHS = list(DAYS_IN_MONTH.keys())
+
+APERTURE_12 = 12.35
+APERTURE_24 = 24.7
+APERTURE_36 = 37.05
+DESIGN_DNI_W_M2 = 1000.0
+
+HOURS_PER_YEAR = 8760
+
+# -------------------------------------------------
+# Hour-of-year Calendar
+# -------------------------------------------------
+
+def year_calendar(steps_per_hour=1):
+    """Month index (0-11) and hour of day for each time step of a non-leap year."""
+    day_month = np.repeat(np.arange(12), list(DAYS_IN_MONTH.values()))
+    month_index = np.repeat(day_month, 24 * steps_per_hour)
+    hour_of_day = np.tile(np.repeat(np.arange(24), steps_per_hour), len(day_month))
+    return month_index, hour_of_day
+
+
+def series_steps_per_hour(series):
+    """Time steps per hour of a one-year series: 1 hourly, 4 for 15-minute, 6 for 10-minute."""
+    n_values = len(series)
+    if n_values == 0 or n_values % HOURS_PER_YEAR:
+        raise ValueError(
+            f"A one-year series needs a whole number of values per hour "
+            f"({HOURS_PER_YEAR}, {4 * HOURS_PER_YEAR}, {6 * HOURS_PER_YEAR}, ...); found {n_values}."
+        )
+    return n_values // HOURS_PER_YEAR
+
+
+def to_hourly(series):
+    """Average a one-year series of any resolution to 8760 hourly values.
+
+    For power in kW the hourly mean is the energy of the hour in kWh.
+    """
+    series = np.asarray(series, dtype=float)
+    steps = series_steps_per_hour(series)
+    return series if steps == 1 else series.reshape(HOURS_PER_YEAR, steps).mean(axis=1)
+
+
+def expand_to_8760(matrix_24x12):
+    """Repeat each month's typical day (24x12 hours x months) over the year."""
+    month_index, hour_of_day = year_calendar()
+    return np.asarray(matrix_24x12, dtype=float)[hour_of_day, month_index]
+
+
+def mean_24x12(series_8760):
+    """Average an 8760-hour series into a 24x12 typical-day matrix."""
+    month_index, hour_of_day = year_calendar()
+    cell = hour_of_day * 12 + month_index
+    sums = np.bincount(cell, weights=np.asarray(series_8760, dtype=float), minlength=24 * 12)
+    counts = np.bincount(cell, minlength=24 * 12)
+    return (sums / counts).reshape(24, 12)
+
+
+def monthly_sum_8760(series_8760):
+    """Sum an 8760-hour series per month."""
+    month_index, _ = year_calendar()
+    return pd.Series(
+        np.bincount(month_index, weights=np.asarray(series_8760, dtype=float), minlength=12),
+        index=MONTHS,
+    )
+
+# -------------------------------------------------
+# Excel Parsing
+# -------------------------------------------------
+
+@timed("solar_parse_hourly_profiles_seconds", "Calls and latency of parse_hourly_profiles")
+def parse_hourly_profiles(xls_file, layout=None):
+    """24x12 hour matrix [Wh/m² per hour] and daily Sum row of a GSA / Energydata.info workbook.
+
+    layout is the result of solar_validate.detect_layout, which runs
+    first when it is not given; only the rows up to the Sum row are read.
+    """
+    if layout is None:
+        layout = detect_layout(xls_file)
+    df = pd.read_excel(xls_file, sheet_name=layout["sheet"], header=None, nrows=layout["sum_row"] + 1)
+    if layout["label_col"] is None:
+        hours = list(range(24))
+    else:
+        hours = df.iloc[layout["hour_rows"], layout["label_col"]].tolist()
+    values_24x12 = df.iloc[layout["hour_rows"], layout["month_cols"]].astype(float)
+    values_24x12.index = hours
+    values_24x12.columns = MONTHS
+    sum_daily = df.iloc[layout["sum_row"], layout["month_cols"]].astype(float)
+    sum_daily.index = MONTHS
+    return values_24x12, sum_daily
+
+
+def parse_hourly_table_csv(csv_file, label="CSV"):
+    """Read a 24x12 (hours x months) table or a one-year series.
+
+    The series may be hourly (8760 values) or sub-hourly (35040 at 15
+    minutes, ...). Leading hour-label or timestamp columns are ignored:
+    the last 12 (or last one) numeric columns hold the values. Header rows
+    are optional: leading rows that are not all numbers are skipped.
+    Returns a 24x12 DataFrame or a 1-D array.
+    """
+    df = pd.read_csv(csv_file, header=None)
+    numeric = df.apply(pd.to_numeric, errors="coerce").dropna(axis=1, how="all")
+    complete = numeric.notna().all(axis=1).to_numpy()
+    numeric = numeric.iloc[complete.argmax() if complete.any() else len(numeric):]
+    if len(numeric) == 24 and numeric.shape[1] >= 12:
+        values = numeric.iloc[:, -12:].to_numpy(dtype=float)
+        if not np.isnan(values).any():
+            return pd.DataFrame(values, index=range(24), columns=MONTHS)
+    if len(numeric) and len(numeric) % HOURS_PER_YEAR == 0 and numeric.shape[1] >= 1:
+        values = numeric.iloc[:, -1].to_numpy(dtype=float)
+        if not np.isnan(values).any():
+            return values
+    raise ValueError(
+        f"{label} must hold 24 rows x 12 month columns or a one-year series "
+        f"({HOURS_PER_YEAR} hourly values or a multiple for sub-hourly data); "
+        f"found {numeric.shape[0]} rows x {numeric.shape[1]} numeric columns."
+    )
+
+# -------------------------------------------------
+# Energy Calculations
+# -------------------------------------------------
+
+def compute_energy_from_profiles(sum_daily_wh):
+    monthly_kwh_m2 = {
+        m: (daily_wh / 1000.0) * DAYS_IN_MONTH[m]
+        for m, daily_wh in sum_daily_wh.items()
+    }
+    monthly_kwh_m2 = pd.Series(monthly_kwh_m2)
+    return monthly_kwh_m2, monthly_kwh_m2.sum()
+
+
+@timed("solar_compute_thermal_outputs_seconds", "Calls and latency of compute_thermal_outputs")
+def compute_thermal_outputs(
+    hour_matrix_wh,
+    monthly_kwh_m2,
+    annual_kwh_m2,
+    mirror_area_m2,
+    eta_opt,
+    thermal_loss_frac
+):
+    # A 24x12 DataFrame, or arrays with a leading year axis:
+    # (years, 24, 12) hours, (years, 12) months and (years,) annual totals
+    stacked = not isinstance(hour_matrix_wh, pd.DataFrame)
+    hours_axis = -2 if stacked else 0
+
+    solar_factor = eta_opt
+    monthly_solar_factor = eta_opt
+    if np.ndim(eta_opt) >= 2:
+        # Hourly efficiency matrix: daily and monthly totals use the
+        # DNI-weighted efficiency of each month
+        solar_factor = np.asarray(eta_opt, dtype=float)
+        dni_day = hour_matrix_wh.sum(axis=hours_axis)
+        if stacked:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                monthly_solar_factor = np.where(
+                    dni_day > 0, (hour_matrix_wh * solar_factor).sum(axis=hours_axis) / dni_day, 0.0
+                )
+        else:
+            monthly_solar_factor = ((hour_matrix_wh * solar_factor).sum(axis=0) / dni_day).where(dni_day > 0, 0.0)
+    loop_factor = (1 - thermal_loss_frac)
+
+    hourly_direct_kw = hour_matrix_wh / 1000.0 * mirror_area_m2 * solar_factor
+    hourly_system_kw = hourly_direct_kw * loop_factor
+
+    daily_direct_kwh = hour_matrix_wh.sum(axis=hours_axis) / 1000.0 * mirror_area_m2 * monthly_solar_factor
+    daily_system_kwh = daily_direct_kwh * loop_factor
+
+    monthly_direct_kwh = monthly_kwh_m2 * mirror_area_m2 * monthly_solar_factor
+    monthly_system_kwh = monthly_direct_kwh * loop_factor
+
+    if np.ndim(eta_opt) == 0:
+        annual_direct_kwh = annual_kwh_m2 * mirror_area_m2 * solar_factor
+    elif stacked:
+        annual_direct_kwh = monthly_direct_kwh.sum(axis=-1)
+    else:
+        annual_direct_kwh = monthly_direct_kwh.sum()
+    annual_system_kwh = annual_direct_kwh * loop_factor
+
+    return (
+        annual_direct_kwh,
+        annual_system_kwh,
+        monthly_direct_kwh,
+        monthly_system_kwh,
+        hourly_direct_kw,
+        hourly_system_kw,
+        daily_direct_kwh,
+        daily_system_kwh,
+    )
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+from solar_core import DAYS_IN_MONTH, MONTHS, expand_to_8760, monthly_sum_8760, parse_hourly_table_csv, to_hourly
+from solar_tariff import tariff_24x12, tariff_8760
+
+# -------------------------------------------------
+# Heat demand matching
+# -------------------------------------------------
+# Profiles are either 24x12 typical days (hours x months) or 8760-hour
+# series, in kW. Mixing the two expands the typical days to 8760 hours;
+# sub-hourly series are averaged to hours.
+
+DAYS = np.array(list(DAYS_IN_MONTH.values()), dtype=float)
+
+
+def parse_demand_csv(csv_file):
+    """Read a 24x12 (hours x months) or one-year heat demand table in kW."""
+    return parse_hourly_table_csv(csv_file, "Demand CSV")
+
+
+def _hourly(profile_kw):
+    profile_kw = np.asarray(profile_kw, dtype=float)
+    return to_hourly(profile_kw) if profile_kw.ndim == 1 else profile_kw
+
+
+def _common_shape(production_kw, demand_kw):
+    production = _hourly(production_kw)
+    demand = _hourly(demand_kw)
+    if production.ndim != demand.ndim:
+        if production.ndim == 2:
+            production = expand_to_8760(production)
+        else:
+            demand = expand_to_8760(demand)
+    return production, demand
+
+
+def monthly_energy(hourly_kw):
+    """kWh per month from a 24x12 typical-day matrix or a one-year series."""
+    hourly_kw = _hourly(hourly_kw)
+    if hourly_kw.ndim == 1:
+        return monthly_sum_8760(hourly_kw)
+    return pd.Series(hourly_kw.sum(axis=0) * DAYS, index=MONTHS)
+
+
+def match_demand(hourly_system_kw, demand_kw):
+    """Split production and demand hour by hour.
+
+    used = min(production, demand) is solar heat that is consumed,
+    curtailed is the production surplus and backup the remaining demand
+    the customer's existing heater must cover.
+    """
+    production, demand = _common_shape(hourly_system_kw, demand_kw)
+    used = np.minimum(production, demand)
+    return {
+        "production": production,
+        "demand": demand,
+        "used": used,
+        "curtailed": production - used,
+        "backup": demand - used,
+    }
+
+
+def demand_balance(matched):
+    """Monthly kWh per flow plus solar fraction and self-consumption."""
+    monthly = pd.DataFrame({name: monthly_energy(kw) for name, kw in matched.items()})
+    with np.errstate(divide="ignore", invalid="ignore"):
+        monthly["solar_fraction"] = np.where(monthly["demand"] > 0, monthly["used"] / monthly["demand"], 0.0)
+        monthly["self_consumption"] = np.where(
+            monthly["production"] > 0, monthly["used"] / monthly["production"], 0.0
+        )
+    return monthly
+
+
+def annual_fractions(monthly):
+    totals = monthly[["production", "demand", "used", "curtailed", "backup"]].sum()
+    solar_fraction = totals["used"] / totals["demand"] if totals["demand"] > 0 else 0.0
+    self_consumption = totals["used"] / totals["production"] if totals["production"] > 0 else 0.0
+    return totals, solar_fraction, self_consumption
+
+
+def sweep_areas(specific_kw_m2, demand_kw, areas_m2, tariff=None):
+    """Demand balance for many mirror areas in one broadcast.
+
+    specific_kw_m2 is the system output of one m² of mirror (the hourly
+    result of compute_thermal_outputs with mirror_area_m2=1). Returns one
+    row per area with annual kWh flows, solar fraction, self-consumption
+    and, when a tariff is given, the value of the used energy.
+    """
+    production, demand = _common_shape(specific_kw_m2, demand_kw)
+    areas = np.asarray(areas_m2, dtype=float)
+    production = areas.reshape((-1,) + (1,) * production.ndim) * production
+    used = np.minimum(production, demand)
+
+    # Per-hour weights turning kW into annual kWh
+    weights = np.ones(demand.shape) if demand.ndim == 1 else np.broadcast_to(DAYS, demand.shape)
+    axes = tuple(range(1, production.ndim))
+    annual_production = (production * weights).sum(axis=axes)
+    annual_used = (used * weights).sum(axis=axes)
+    annual_demand = float((demand * weights).sum())
+
+    sweep = pd.DataFrame({
+        "mirror_area": areas,
+        "production": annual_production,
+        "used": annual_used,
+        "curtailed": annual_production - annual_used,
+        "backup": annual_demand - annual_used,
+    })
+    sweep["solar_fraction"] = annual_used / annual_demand if annual_demand > 0 else 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sweep["self_consumption"] = np.where(annual_production > 0, annual_used / annual_production, 0.0)
+    if tariff is not None:
+        prices = tariff_8760(tariff) if demand.ndim == 1 else tariff_24x12(tariff)
+        sweep["used_value"] = (used * prices * weights).sum(axis=axes)
+    return sweep
@@ -3,6 +3,115 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import math
+import os
+import tempfile
+import time
+import uuid
+from matplotlib.figure import Figure
+
+from solar_core import (
+    APERTURE_12,
+    APERTURE_24,
+    APERTURE_36,
+    DESIGN_DNI_W_M2,
+    HOURS_PER_YEAR,
+    MONTHS,
+    compute_energy_from_profiles,
+    compute_thermal_outputs,
+    expand_to_8760,
+    mean_24x12,
+    parse_hourly_profiles,
+    series_steps_per_hour,
+    to_hourly,
+)
+from solar_sizing import (
+    MAX_UNITS,
+    min_achievable_payback,
+    solve_for_budget,
+    solve_for_energy,
+    solve_for_payback,
+)
+from solar_tariff import banded_tariff, parse_tariff_csv, tariff_24x12, tariff_value
+from solar_demand import (
+    annual_fractions,
+    demand_balance,
+    match_demand,
+    monthly_energy,
+    parse_demand_csv,
+    sweep_areas,
+)
+from solar_storage import simulate_storage, storage_curve
+from solar_efficiency import (
+    DEFAULT_A1,
+    DEFAULT_A2,
+    collector_efficiency,
+    efficiency_at,
+    operating_temperature_sweep,
+)
+from solar_geometry import (
+    DEFAULT_IAM_TABLE,
+    TRACKING_MODES,
+    aperture_factor_24x12,
+    apply_aperture_factor,
+)
+from solar_shading import (
+    APERTURE_WIDTH_M,
+    UNIT_APERTURES,
+    land_area_m2,
+    spacing_sweep,
+    unit_length_m,
+    unshaded_factor_24x12,
+)
+from solar_timeseries import (
+    compute_thermal_timeseries,
+    fill_gaps,
+    profiles_from_series,
+    read_dni_series,
+    resolution_effects,
+)
+from solar_archive import (
+    ARCHIVE_DIR,
+    ingest_csv,
+    ingest_netcdf,
+    interannual_statistics,
+    open_archive,
+    yearly_yield,
+)
+from solar_regional import (
+    DEFAULT_TOP_N,
+    RASTER_DIR,
+    RASTER_UNITS,
+    REGIONAL_DIR,
+    describe_raster,
+    preview,
+    raster_summary,
+    screen_raster,
+    server_raster_path,
+)
+from solar_portfolio import OBJECTIVES, allocate_units, parse_sites_csv
+from solar_charts import (
+    DECIMATION_METHODS,
+    DEFAULT_POINTS,
+    MAX_POINTS,
+    MIN_POINTS,
+    archive_index,
+    decimated_series,
+    year_index,
+)
+from solar_catalog import load_catalog, mix_efficiency, mix_outputs, mix_table, model_kernels, model_summary, model_values
+from solar_scenarios import drop_scenarios, evaluate_saved, save_scenario, scenario_deltas
+from solar_soiling import DAYS_PER_YEAR, LIFETIME_YEARS, cleaning_schedule_npv
+from solar_jobs import CANCELLED, FAILED, JOBS, make_job_id
+from solar_metrics import METRICS_FILE, REGISTRY, RERUN_SECONDS, UPLOAD_BYTES
+from solar_cache import (
+    SHARED_CACHE,
+    active_sessions,
+    content_key,
+    record_session,
+    session_footprint,
+)
+
+rerun_started = time.perf_counter()
 
 # -------------------------------------------------
 # Authentication
@@ -91,108 +200,441 @@ def check_password():
         return True
 
 
+def is_admin():
+    """True when the logged-in user is listed under `admins` in the secrets."""
+    try:
+        admins = st.secrets.get("admins", [])
+    except FileNotFoundError:
+        admins = []
+    return st.session_state.get("current_user") in admins
+
+
 # -------------------------------------------------
-# Constants
+# Streamlit App
 # -------------------------------------------------
 
-DAYS_IN_MONTH = {
-    "Jan": 31, "Feb": 28, "Mar": 31, "Apr": 30,
-    "May": 31, "Jun": 30, "Jul": 31, "Aug": 31,
-    "Sep": 30, "Oct": 31, "Nov": 30, "Dec": 31,
-}
+# Check password before showing app
+if not check_password():
+    st.stop()
 
-MONTHS = list(DAYS_IN_MONTH.keys())
+# Show user info in sidebar
+st.sidebar.success(f"✅ Logged in as: **{st.session_state['current_user']}**")
 
-APERTURE_12 = 12.35
-APERTURE_24 = 24.7
-APERTURE_36 = 37.05
-DESIGN_DNI_W_M2 = 1000.0
+if st.sidebar.button("🚪 Logout"):
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+    st.rerun()
 
-# -------------------------------------------------
-# Excel Parsing
-# -------------------------------------------------
+st.sidebar.markdown("---")
 
-def parse_hourly_profiles(xls_file):
-    df = pd.read_excel(xls_file, sheet_name="Hourly_profiles", header=None)
-    months = list(df.iloc[4, 1:13])
-    hours = df.iloc[5:29, 0].tolist()
-    values_24x12 = df.iloc[5:29, 1:13].astype(float)
-    values_24x12.index = hours
-    values_24x12.columns = months
-    sum_daily = df.loc[df.iloc[:, 0] == "Sum"].iloc[0, 1:13].astype(float)
-    sum_daily.index = months
-    return values_24x12, sum_daily
+session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
 
-# -------------------------------------------------
-# Energy Calculations
-# -------------------------------------------------
+# Modes that solve for mirror area and unit mix from a customer target
+INVERSE_SIZING_MODES = [
+    "Target annual energy (kWh)",
+    "Maximum payback (years)",
+    "Capital budget (€)",
+]
+# Inverse modes that need the economic inputs before sizing
+ECONOMIC_SIZING_MODES = INVERSE_SIZING_MODES[1:]
+# Units of every catalog model, each with its own optics and cost
+CATALOG_MODE = "Catalog mix (per-model optics and cost)"
 
-def compute_energy_from_profiles(sum_daily_wh):
-    monthly_kwh_m2 = {
-        m: (daily_wh / 1000.0) * DAYS_IN_MONTH[m]
-        for m, daily_wh in sum_daily_wh.items()
-    }
-    monthly_kwh_m2 = pd.Series(monthly_kwh_m2)
-    return monthly_kwh_m2, monthly_kwh_m2.sum()
 
+def economic_inputs(ask_unit_cost=True):
+    st.header("💰 Economic Parameters")
 
-def compute_thermal_outputs(
-    hour_matrix_wh,
-    monthly_kwh_m2,
-    annual_kwh_m2,
-    mirror_area_m2,
-    eta_opt,
-    thermal_loss_frac
-):
-    solar_factor = eta_opt
-    loop_factor = (1 - thermal_loss_frac)
+    tariff_mode = st.radio(
+        "Energy price:",
+        ["Flat price", "Time-of-use bands", "Upload tariff (CSV)"]
+    )
+    if tariff_mode == "Flat price":
+        tariff = st.number_input("Value of thermal energy [€/kWh]", min_value=0.0, value=0.10)
 
-    hourly_direct_kw = hour_matrix_wh / 1000.0 * mirror_area_m2 * solar_factor
-    hourly_system_kw = hourly_direct_kw * loop_factor
+    elif tariff_mode == "Time-of-use bands":
+        off_peak_price = st.number_input("Off-peak price [€/kWh]", min_value=0.0, value=0.08)
+        peak_price = st.number_input("Peak price [€/kWh]", min_value=0.0, value=0.14)
+        peak_hours = st.slider("Peak hours", 0, 24, (8, 20))
+        winter_months = st.multiselect("Winter months", MONTHS, default=["Jan", "Feb", "Mar", "Nov", "Dec"])
+        winter_surcharge_pct = st.number_input("Winter surcharge [%]", min_value=-100.0, value=20.0)
+        tariff = banded_tariff(
+            off_peak_price,
+            [(peak_hours[0], peak_hours[1], peak_price, None)],
+            {m: 1 + winter_surcharge_pct / 100.0 for m in winter_months}
+        )
 
-    daily_direct_kwh = hour_matrix_wh.sum(axis=0) / 1000.0 * mirror_area_m2 * solar_factor
-    daily_system_kwh = daily_direct_kwh * loop_factor
+    else:
+        tariff_file = st.file_uploader(
+            "Tariff CSV: 24 hours x 12 months or a one-year price series [€/kWh]",
+            type=["csv"]
+        )
+        if tariff_file is None:
+            st.info("Upload a tariff CSV to continue.")
+            stop_page(app_mode)
+        record_upload("tariff", tariff_file)
+        try:
+            tariff = parse_tariff_csv(tariff_file)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            stop_page(app_mode)
 
-    monthly_direct_kwh = monthly_kwh_m2 * mirror_area_m2 * solar_factor
-    monthly_system_kwh = monthly_direct_kwh * loop_factor
+    # Catalog mixes are priced per model from the catalog instead
+    item_cost_per_unit = None
+    if ask_unit_cost:
+        item_cost_per_unit = st.number_input("Product cost [€ / unit]", min_value=0.0, value=15000.0)
+    installation_cost = st.number_input("Estimated installation cost [€]", min_value=0.0, value=20000.0)
+    return tariff, item_cost_per_unit, installation_cost
 
-    annual_direct_kwh = annual_kwh_m2 * mirror_area_m2 * solar_factor
-    annual_system_kwh = annual_direct_kwh * loop_factor
 
-    return (
-        annual_direct_kwh,
-        annual_system_kwh,
-        monthly_direct_kwh,
-        monthly_system_kwh,
-        hourly_direct_kw,
-        hourly_system_kw,
-        daily_direct_kwh,
-        daily_system_kwh,
-    )
+def finish_rerun(mode):
+    """Record this script run's duration and refresh the metrics file now and then."""
+    RERUN_SECONDS.observe(time.perf_counter() - rerun_started, mode=mode)
+    REGISTRY.maybe_write_snapshot()
 
-# -------------------------------------------------
-# Streamlit App
-# -------------------------------------------------
 
-# Check password before showing app
-if not check_password():
+def stop_page(mode):
+    """st.stop() that still records the rerun; use it for every stop after the mode is chosen."""
+    finish_rerun(mode)
     st.stop()
 
-# Show user info in sidebar
-st.sidebar.success(f"✅ Logged in as: **{st.session_state['current_user']}**")
 
-if st.sidebar.button("🚪 Logout"):
-    for key in list(st.session_state.keys()):
-        del st.session_state[key]
-    st.rerun()
+def record_upload(kind, uploaded_file):
+    """Count an upload's size once, not on every rerun that still holds it."""
+    seen = st.session_state.setdefault("recorded_uploads", set())
+    if (kind, uploaded_file.file_id) not in seen:
+        seen.add((kind, uploaded_file.file_id))
+        UPLOAD_BYTES.observe(uploaded_file.size, kind=kind)
+
+
+def store_upload(uploaded_file, directory, extension):
+    """Path of a file copy of an upload, one per content.
+
+    Written to a unique temp file and moved into place, so an interrupted
+    or concurrent write never leaves a truncated copy under the content key.
+    """
+    path = os.path.join(directory, content_key(uploaded_file.getvalue()) + extension)
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as f:
+            f.write(uploaded_file.getvalue())
+        os.replace(f.name, path)
+    return path
+
+
+# Seconds between refreshes of a running background job
+JOB_POLL_S = 1.0
+STORAGE_SWEEP_CHUNKS = 20
+
+
+def cancelled_jobs():
+    """Ids of the jobs this session cancelled; they are not resubmitted on reruns."""
+    return st.session_state.setdefault("cancelled_jobs", set())
+
+
+def submit_job(key, label, fn, chunk_args):
+    """JOBS.submit on behalf of this session, remembered for the jobs panel.
+
+    Work this session cancelled earlier is not started again; its job (if
+    still known) is returned instead, so the partial results stay visible.
+    """
+    existing = JOBS.get(make_job_id(key))
+    if existing is not None and existing.id in cancelled_jobs():
+        return existing
+    cancelled_jobs().discard(make_job_id(key))
+    job = JOBS.submit(key, label, fn, chunk_args, subscriber=session_id)
+    job_ids = st.session_state.setdefault("job_ids", [])
+    if job.id not in job_ids:
+        job_ids.append(job.id)
+    return job
+
+
+def cancel_job(job_id):
+    """Cancel a job for this session; other sessions watching the same work keep it running."""
+    cancelled_jobs().add(job_id)
+    JOBS.release(job_id, session_id)
+
+
+def is_stopped(job):
+    return job.status == CANCELLED or (job.active and job.id in cancelled_jobs())
+
+
+def show_job(job, render):
+    """Progress and cancel button of a background job, refreshed while it runs.
+
+    render(result) draws the result, or the chunks finished so far.
+    """
+    started_active = job.active and not is_stopped(job)
+
+    def body():
+        if is_stopped(job):
+            st.warning(f"{job.label} was cancelled after {job.done}/{job.total} chunks; partial results shown.")
+            if st.button("▶ Run again", key=f"restart_{job.id}"):
+                cancelled_jobs().discard(job.id)
+                st.rerun()
+        elif job.active:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.progress(job.progress, text=f"{job.label} · {job.done}/{job.total} chunks")
+            with col2:
+                if st.button("⏹ Cancel", key=f"cancel_{job.id}"):
+                    cancel_job(job.id)
+                    st.rerun()
+        elif job.status == FAILED:
+            st.error(f"❌ {job.label} failed: {job.error}")
+        partial = job.partial_result()
+        if partial is not None:
+            render(partial)
+        if started_active and (not job.active or is_stopped(job)):
+            # Rerun the page so the finished result is used everywhere and polling stops
+            st.rerun()
+
+    st.fragment(run_every=JOB_POLL_S if started_active else None)(body)()
+
+
+def jobs_panel():
+    job_ids = st.session_state.get("job_ids", [])
+
+    def summary():
+        # Work this session cancelled shows as cancelled even while other sessions still run it
+        jobs = JOBS.summary(job_ids)
+        jobs.loc[jobs["job"].isin(cancelled_jobs()), "status"] = CANCELLED
+        return jobs
+
+    jobs = summary()
+    running = jobs["status"].isin(["queued", "running"]).any()
+
+    def body():
+        with st.sidebar.expander(f"⏳ Background Jobs ({len(jobs)})"):
+            current = summary()
+            if current.empty:
+                st.caption("Long sweeps run here without blocking the page.")
+                return
+            st.dataframe(
+                current[["label", "status", "progress", "elapsed_s"]],
+                column_config={
+                    "progress": st.column_config.ProgressColumn("Progress", min_value=0.0, max_value=1.0),
+                    "elapsed_s": st.column_config.NumberColumn("Time [s]", format="%.1f"),
+                },
+                use_container_width=True,
+                hide_index=True
+            )
+            for row in current[current["status"].isin(["queued", "running"])].itertuples():
+                if st.button(f"⏹ Cancel {row.label}", key=f"panel_cancel_{row.job}"):
+                    cancel_job(row.job)
+                    st.rerun()
+
+    st.fragment(run_every=JOB_POLL_S if running else None)(body)()
 
-st.sidebar.markdown("---")
+
+APP_MODES = ["Single site", "Regional screening", "Portfolio"]
+
+
+def regional_screening_page():
+    """Yield / payback raster and site ranking for a gridded DNI dataset."""
+    st.title("Helixis Regional Site Screening")
+    st.caption(
+        "Annual energy and payback for every cell of a long-term DNI raster, "
+        "to pick regions before requesting site reports."
+    )
+
+    raster_upload = st.file_uploader(
+        "📥 Gridded DNI raster: .npy, GeoTIFF or NetCDF",
+        type=["npy", "tif", "tiff", "nc"]
+    )
+    raster_path = ""
+    if RASTER_DIR:
+        raster_name = st.text_input(
+            f"...or a raster file under {RASTER_DIR} on the server (for files too large to upload)"
+        )
+        if raster_name.strip():
+            try:
+                raster_path = server_raster_path(raster_name)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                return
+    if raster_upload is not None:
+        record_upload("raster", raster_upload)
+        # Memory-mapped reads need a file; one copy per upload content
+        extension = os.path.splitext(raster_upload.name)[1].lower()
+        raster_path = store_upload(raster_upload, REGIONAL_DIR, extension)
+    if not raster_path:
+        st.info("Upload a DNI raster" + (" or enter a server file" if RASTER_DIR else "") + " to start screening.")
+        return
+    try:
+        raster = describe_raster(raster_path)
+    except (OSError, ValueError) as e:
+        st.error(f"❌ {e}")
+        return
+
+    with st.sidebar:
+        st.header("⚙️ Screening Parameters")
+        raster_unit = st.radio("Raster values:", list(RASTER_UNITS))
+        n_units = st.number_input("Number of 36 m² units per site", min_value=1, value=1)
+        eta_opt = st.slider("Optical efficiency [%]", 0, 100, 75) / 100.0
+        thermal_loss_frac = st.slider("Thermal losses in primary loop [%]", 0, 100, 0) / 100.0
+        price_per_kwh = st.number_input("Energy price [€/kWh]", min_value=0.0, value=0.10, step=0.01)
+        item_cost_per_unit = st.number_input("Product cost [€ / unit]", min_value=0.0, value=15000.0)
+        installation_cost = st.number_input("Estimated installation cost [€]", min_value=0.0, value=20000.0)
+        top_n = st.number_input("Sites in ranking", min_value=1, max_value=1000, value=DEFAULT_TOP_N)
+
+    mirror_area = n_units * APERTURE_36
+    system_cost = n_units * item_cost_per_unit + installation_cost
+    screening_args = (mirror_area, eta_opt, thermal_loss_frac, system_cost, price_per_kwh)
+
+    progress_bar = st.progress(0.0, text="Screening tiles…")
+    yield_path, payback_path, ranking = SHARED_CACHE.get_or_compute(
+        ("regional", raster["path"], os.path.getmtime(raster["path"]), *screening_args, raster_unit, int(top_n)),
+        lambda: screen_raster(
+            raster, *screening_args, unit=raster_unit, top_n=int(top_n),
+            progress=lambda done, total: progress_bar.progress(done / total, text=f"Screening tiles… {done}/{total}")
+        )
+    )
+    progress_bar.empty()
+
+    payback_stats = raster_summary(payback_path)
+    yield_stats = raster_summary(yield_path)
+    rows, cols = raster["shape"]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Grid Cells", f"{rows * cols:,}", f"{rows:,} × {cols:,}", delta_color="off")
+    with col2:
+        st.metric("Mean Annual Energy", f"{yield_stats['mean']:,.0f} kWh")
+    with col3:
+        st.metric("Best Payback", f"{payback_stats['min']:.1f} years")
+    with col4:
+        st.metric("Mean Payback", f"{payback_stats['mean']:.1f} years")
+    st.caption(
+        f"Per site: {n_units} × 36 m² ({mirror_area:,.1f} m²), system cost {system_cost:,.0f} €, "
+        f"{price_per_kwh:.2f} €/kWh · constant optical efficiency"
+    )
+
+    st.markdown("### 🗺️ Map Preview")
+    extent = None
+    if raster["latitudes"] is not None and raster["longitudes"] is not None:
+        lats, lons = raster["latitudes"], raster["longitudes"]
+        extent = (lons[0], lons[-1], lats[-1], lats[0])
+    figure = Figure(figsize=(12, 4.5))
+    for ax, path, label, cmap in (
+        (figure.add_subplot(1, 2, 1), yield_path, "Annual energy [kWh]", "YlOrRd"),
+        (figure.add_subplot(1, 2, 2), payback_path, "Payback [years]", "RdYlGn_r"),
+    ):
+        values, step = preview(path)
+        image = ax.imshow(np.where(np.isfinite(values), values, np.nan), cmap=cmap, extent=extent, aspect="auto")
+        ax.plot(
+            *(
+                (lons[ranking["col"]], lats[ranking["row"]]) if extent
+                else (ranking["col"] / step, ranking["row"] / step)
+            ),
+            "o", markersize=4, markerfacecolor="none", markeredgecolor="black"
+        )
+        ax.set_title(label)
+        figure.colorbar(image, ax=ax)
+    figure.tight_layout()
+    st.pyplot(figure)
+    st.caption(f"Every {step}th cell shown; circles mark the top {len(ranking)} sites")
+
+    st.markdown(f"### 🏆 Top {len(ranking)} Sites by Payback")
+    st.dataframe(
+        ranking.round({"latitude": 4, "longitude": 4, "dni_kwh_m2": 0, "annual_kwh": 0, "payback_years": 2}),
+        use_container_width=True
+    )
+    st.download_button(
+        "📥 Download Ranking (CSV)",
+        ranking.to_csv().encode("utf-8"),
+        "helixis_site_ranking.csv",
+        "text/csv"
+    )
+
+
+def portfolio_page():
+    """Distribute a fixed batch of units over many prospective sites."""
+    st.title("Helixis Portfolio Allocation")
+    st.caption(
+        "Place a production batch of 12 / 24 / 36 m² units over customers' sites "
+        "for the most annual value or the shortest portfolio payback."
+    )
+
+    sites_file = st.file_uploader(
+        "📥 Sites CSV: site, specific_kwh_m2 or dni_kwh_m2, optional price, installation, demand_kwh",
+        type=["csv"]
+    )
+
+    with st.sidebar:
+        st.header("📦 Unit Batch")
+        inventory, unit_costs = {}, {}
+        for unit_type in UNIT_APERTURES:
+            col1, col2 = st.columns(2)
+            with col1:
+                inventory[unit_type] = st.number_input(f"{unit_type} units", min_value=0, value=20)
+            with col2:
+                unit_costs[unit_type] = st.number_input(f"{unit_type} cost [€]", min_value=0.0, value=15000.0)
+        objective = st.radio("Objective:", list(OBJECTIVES))
+
+        st.header("🏭 Site Defaults")
+        st.caption("Used where the CSV leaves a column out or a value empty")
+        default_price = st.number_input("Energy price [€/kWh]", min_value=0.0, value=0.10, step=0.01)
+        default_installation = st.number_input("Installation cost per site [€]", min_value=0.0, value=20000.0)
+        default_demand = st.number_input("Annual heat demand per site [kWh] (0 = no cap)", min_value=0.0, value=0.0)
+        eta_opt = st.slider("Optical efficiency [%] (for dni_kwh_m2)", 0, 100, 75) / 100.0
+        thermal_loss_frac = st.slider("Thermal losses in primary loop [%]", 0, 100, 0) / 100.0
+
+    if sites_file is None:
+        st.info("Upload a sites CSV, e.g. the ranking downloaded from regional screening.")
+        return
+    record_upload("sites", sites_file)
+    try:
+        sites = parse_sites_csv(
+            sites_file, eta_opt, thermal_loss_frac, default_price, default_installation,
+            default_demand if default_demand > 0 else np.inf
+        )
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return
+
+    allocation, totals = allocate_units(sites, inventory, unit_costs, OBJECTIVES[objective])
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Sites Served", f"{totals['sites_used']} of {len(sites)}")
+    with col2:
+        st.metric("Annual Value", f"{totals['value']:,.0f} €")
+    with col3:
+        st.metric("Portfolio Cost", f"{totals['system_cost']:,.0f} €")
+    with col4:
+        st.metric("Portfolio Payback", f"{totals['payback_years']:.1f} years")
+    st.caption(
+        "Units placed: " + " · ".join(f"{n} × {t}" for t, n in totals["units_used"].items())
+        + " | left over: " + " · ".join(f"{n} × {t}" for t, n in totals["units_left"].items())
+    )
+
+    served = allocation[allocation["mirror_area"] > 0].sort_values("value", ascending=False)
+    st.markdown("### 📋 Allocation")
+    st.dataframe(
+        served.round({"mirror_area": 2, "annual_kwh": 0, "value": 0, "system_cost": 0, "payback_years": 2}),
+        use_container_width=True, hide_index=True
+    )
+    st.download_button(
+        "📥 Download Allocation (CSV)",
+        allocation.to_csv(index=False).encode("utf-8"),
+        "helixis_portfolio_allocation.csv",
+        "text/csv"
+    )
+
+
+with st.sidebar:
+    app_mode = st.radio("Mode:", APP_MODES)
+if app_mode == "Regional screening":
+    regional_screening_page()
+    stop_page(app_mode)
+if app_mode == "Portfolio":
+    portfolio_page()
+    stop_page(app_mode)
 
 st.title("Helixis Solar Concentrator Thermal Production Estimate")
 
 uploaded = st.file_uploader(
-    "📥 Upload Excel file from GlobalSolarAtlas/Energydata.info",
-    type=["xlsx"]
+    "📥 Upload Excel file from GlobalSolarAtlas/Energydata.info, or a one-year DNI series CSV (hourly, 15 or 10 minutes)",
+    type=["xlsx", "csv"]
 )
 
 with st.sidebar:
@@ -206,24 +648,192 @@ with st.sidebar:
             "Number of 24 m² units",
             "Number of 36 m² units",
             "Mix of 12 m² + 24 m² + 36 m² units",
+            CATALOG_MODE,
+            *INVERSE_SIZING_MODES,
         ]
     )
 
 if uploaded is not None:
-    hour_matrix_wh, sum_daily_wh = parse_hourly_profiles(uploaded)
+    record_upload("dni", uploaded)
+    # Identical uploads from different sessions share one parsed profile
+    profile_key = content_key(uploaded.getvalue())
+    dni_series = None
+    if uploaded.name.lower().endswith(".csv"):
+        # Measured series at its own resolution, resampled to typical days
+        try:
+            dni_series, n_missing = SHARED_CACHE.get_or_compute(
+                ("dni_series", profile_key),
+                lambda: fill_gaps(read_dni_series(uploaded))
+            )
+            series_steps = series_steps_per_hour(dni_series)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            stop_page(app_mode)
+        hour_matrix_wh, sum_daily_wh = profiles_from_series(dni_series)
+    else:
+        # The layout check streams only the top of the sheet, so a malformed
+        # export is rejected before the full read
+        try:
+            hour_matrix_wh, sum_daily_wh = SHARED_CACHE.get_or_compute(
+                ("profile", profile_key),
+                lambda: parse_hourly_profiles(uploaded)
+            )
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            stop_page(app_mode)
     monthly_kwh_m2, annual_kwh_m2 = compute_energy_from_profiles(sum_daily_wh)
 
+    # Workbook DNI as uploaded, for the input data tab
+    dni_hour_matrix_wh = hour_matrix_wh
+    dni_monthly_kwh_m2 = monthly_kwh_m2
+    dni_annual_kwh_m2 = annual_kwh_m2
+
     with st.sidebar:
-        eta_opt_pct = st.slider("Optical efficiency [%]", 0, 100, 75)
-        thermal_loss_pct = st.slider("Thermal losses in primary loop [%]", 0, 100, 0)
+        st.header("☀️ Site & Tracking")
+        use_geometry = st.checkbox("Apply incidence-angle losses")
+        use_shading = False
+        # Combined aperture and shading derate, for profiles other than the workbook's
+        site_factor = None
+        if use_geometry:
+            latitude = st.number_input("Latitude [°]", min_value=-90.0, max_value=90.0, value=40.4, format="%.4f")
+            longitude = st.number_input("Longitude [°]", min_value=-180.0, max_value=180.0, value=-3.7, format="%.4f")
+            utc_offset = st.number_input(
+                "Profile time zone [UTC offset, h]",
+                min_value=-12.0, max_value=14.0, value=float(round(longitude / 15.0)), step=0.5
+            )
+            tracking_mode = st.selectbox("Tracking", list(TRACKING_MODES))
+            with st.expander("Incidence angle modifier table"):
+                iam_table = st.data_editor(DEFAULT_IAM_TABLE, hide_index=True, num_rows="dynamic").dropna()
+
+            geometry_key = (latitude, longitude, utc_offset, tracking_mode, content_key(iam_table.to_numpy().tobytes()))
+            aperture_factor = SHARED_CACHE.get_or_compute(
+                ("geometry", *geometry_key),
+                lambda: aperture_factor_24x12(latitude, longitude, utc_offset, tracking_mode, iam_table)
+            )
+            # From here on the profile is the irradiance usable by the aperture
+            hour_matrix_wh, sum_daily_wh = apply_aperture_factor(hour_matrix_wh, sum_daily_wh, aperture_factor)
+            site_factor = aperture_factor
+            monthly_kwh_m2, annual_kwh_m2 = compute_energy_from_profiles(sum_daily_wh)
+            profile_key = content_key(profile_key, *geometry_key)
+            st.caption(
+                f"On aperture: {annual_kwh_m2:,.0f} of {dni_annual_kwh_m2:,.0f} kWh/m² DNI "
+                f"({annual_kwh_m2 / dni_annual_kwh_m2:.1%})" if dni_annual_kwh_m2 > 0 else ""
+            )
+
+            if TRACKING_MODES[tracking_mode] is not None:
+                use_shading = st.checkbox("Row-to-row shading")
+            if use_shading:
+                n_rows = st.number_input("Number of rows", min_value=1, value=4)
+                row_pitch = st.number_input(
+                    "Row pitch, axis to axis [m]", min_value=APERTURE_WIDTH_M, value=2.5, step=0.1
+                )
+                row_unit = st.selectbox("Unit type in rows", list(UNIT_APERTURES), index=2)
+                units_per_row = st.number_input("Units per row", min_value=1, value=1)
+                row_length = units_per_row * unit_length_m(UNIT_APERTURES[row_unit])
+
+                # Unshaded aperture irradiance, kept for the spacing sweep
+                aperture_hour_matrix_wh = hour_matrix_wh
+                aperture_monthly_kwh_m2 = monthly_kwh_m2
+                aperture_annual_kwh_m2 = annual_kwh_m2
+
+                unshaded_factor = SHARED_CACHE.get_or_compute(
+                    ("shading", *geometry_key, row_pitch, n_rows),
+                    lambda: unshaded_factor_24x12(latitude, longitude, utc_offset, tracking_mode, row_pitch, n_rows)
+                )
+                hour_matrix_wh, sum_daily_wh = apply_aperture_factor(hour_matrix_wh, sum_daily_wh, unshaded_factor)
+                site_factor = aperture_factor * unshaded_factor
+                monthly_kwh_m2, annual_kwh_m2 = compute_energy_from_profiles(sum_daily_wh)
+                profile_key = content_key(profile_key, row_pitch, n_rows)
+                st.caption(
+                    f"Shading loss: {1 - annual_kwh_m2 / aperture_annual_kwh_m2:.1%} · "
+                    f"land use: {land_area_m2(row_pitch, n_rows, row_length):,.0f} m²"
+                    if aperture_annual_kwh_m2 > 0 else ""
+                )
 
-        eta_opt = eta_opt_pct / 100.0
+    with st.sidebar:
+        if base_mode == CATALOG_MODE:
+            try:
+                catalog = load_catalog()
+            except (OSError, ValueError) as e:
+                st.error(f"❌ Product catalog: {e}")
+                stop_page(app_mode)
+            st.caption("Optical efficiency, efficiency curve and cost of each model come from the product catalog.")
+        else:
+            eta_opt_pct = st.slider("Optical efficiency [%]", 0, 100, 75)
+            eta_opt = eta_opt_pct / 100.0
+        thermal_loss_pct = st.slider("Thermal losses in primary loop [%]", 0, 100, 0)
         thermal_loss_frac = thermal_loss_pct / 100.0
 
+        use_efficiency_curve = st.checkbox("Temperature-dependent efficiency curve")
+        if use_efficiency_curve:
+            if base_mode != CATALOG_MODE:
+                st.caption("η = η0 − a1·ΔT/G − a2·ΔT²/G, with η0 the optical efficiency above")
+                a1 = st.number_input("a1 [W/(m²·K)]", min_value=0.0, value=DEFAULT_A1, format="%.3f")
+                a2 = st.number_input("a2 [W/(m²·K²)]", min_value=0.0, value=DEFAULT_A2, format="%.4f")
+            t_operating_c = st.number_input("Operating temperature [°C]", value=120.0)
+            t_ambient_c = st.number_input("Ambient temperature [°C]", value=15.0)
+
+        if base_mode == CATALOG_MODE:
+            # One unit of every model on this site, computed once; any mix
+            # below is a weighted sum of these kernels
+            catalog_key = content_key(catalog.to_numpy().tobytes(), *catalog.index)
+            temperatures = (t_operating_c, t_ambient_c) if use_efficiency_curve else (None, None)
+            kernels = SHARED_CACHE.get_or_compute(
+                ("catalog_kernels", profile_key, catalog_key, thermal_loss_frac, *temperatures),
+                lambda: model_kernels(
+                    catalog, hour_matrix_wh, monthly_kwh_m2, annual_kwh_m2, thermal_loss_frac, *temperatures
+                )
+            )
+
+            st.subheader("Sizing Input")
+            catalog_counts = np.array([
+                st.number_input(f"Number of {model} units", min_value=0, value=int(i == len(catalog) - 1))
+                for i, model in enumerate(catalog.index)
+            ])
+            if catalog_counts.sum() == 0:
+                st.error("Choose at least one unit.")
+                stop_page(app_mode)
+            with st.expander("Per-unit yield of the catalog models"):
+                st.dataframe(model_summary(catalog, kernels).style.format("{:,.2f}"), use_container_width=True)
+
+            # Aperture-weighted optics of the mix stand in for the single
+            # model in the other tabs
+            eta_model, design_eta = mix_efficiency(kernels, catalog_counts)
+            eta_model = pd.DataFrame(eta_model, index=hour_matrix_wh.index, columns=hour_matrix_wh.columns)
+            mix_area = catalog_counts * catalog["aperture_m2"].to_numpy()
+            eta_opt = float(mix_area @ catalog["eta_opt"].to_numpy() / mix_area.sum())
+            eta_opt_pct = round(eta_opt * 100)
+            a1 = float(mix_area @ catalog["a1"].to_numpy() / mix_area.sum())
+            a2 = float(mix_area @ catalog["a2"].to_numpy() / mix_area.sum())
+            if use_efficiency_curve:
+                efficiency_params = (a1, a2, t_operating_c, t_ambient_c)
+            eta_key = ("catalog", catalog_key, *catalog_counts.tolist(), *temperatures)
+        elif use_efficiency_curve:
+            efficiency_params = (a1, a2, t_operating_c, t_ambient_c)
+            # Hourly efficiency matrix replaces the constant eta_opt below
+            eta_model = collector_efficiency(hour_matrix_wh, eta_opt, *efficiency_params)
+            design_eta = efficiency_at(DESIGN_DNI_W_M2, eta_opt, *efficiency_params)
+            eta_key = (eta_opt, *efficiency_params)
+        else:
+            eta_model = eta_opt
+            design_eta = eta_opt
+            eta_key = eta_opt
+
         peak_dni_wh = hour_matrix_wh.max().max()
-        peak_kw_per_m2 = peak_dni_wh / 1000.0 * eta_opt
+        peak_kw_per_m2 = (hour_matrix_wh * eta_model).max().max() / 1000.0
+
+        # Output is linear in area: one m² gives the specific yield
+        unit_outputs = compute_thermal_outputs(
+            hour_matrix_wh, monthly_kwh_m2, annual_kwh_m2, 1.0, eta_model, thermal_loss_frac
+        )
+        specific_kwh_m2 = unit_outputs[1]
 
-        st.subheader("Sizing Input")
+        if base_mode in ECONOMIC_SIZING_MODES:
+            tariff, item_cost_per_unit, installation_cost = economic_inputs()
+            specific_value_m2 = tariff_value(unit_outputs[5], unit_outputs[3], tariff)[2]
+
+        if base_mode != CATALOG_MODE:
+            st.subheader("Sizing Input")
 
         n12 = 0
         n24 = 0
@@ -259,6 +869,57 @@ if uploaded is not None:
             mirror_area = n12 * APERTURE_12 + n24 * APERTURE_24 + n36 * APERTURE_36
             target_peak_kw = mirror_area * peak_kw_per_m2
 
+        elif base_mode == CATALOG_MODE:
+            mirror_area = float(catalog_counts @ kernels["aperture_m2"])
+            target_peak_kw = mirror_area * peak_kw_per_m2
+
+        elif base_mode == "Target annual energy (kWh)":
+            sizing_target = st.number_input("Target annual energy [kWh]", min_value=1.0, value=100000.0)
+            solve_sizing = lambda targets: solve_for_energy(targets, specific_kwh_m2)
+
+        elif base_mode == "Maximum payback (years)":
+            sizing_target = st.number_input("Maximum payback [years]", min_value=0.1, value=8.0)
+            solve_sizing = lambda targets: solve_for_payback(
+                targets, specific_kwh_m2, specific_value_m2,
+                item_cost_per_unit, installation_cost
+            )
+
+        elif base_mode == "Capital budget (€)":
+            sizing_target = st.number_input("Capital budget [€]", min_value=0.0, value=100000.0)
+            solve_sizing = lambda targets: solve_for_budget(
+                targets, specific_kwh_m2, specific_value_m2,
+                item_cost_per_unit, installation_cost
+            )
+
+        if base_mode in INVERSE_SIZING_MODES:
+            sizing = solve_sizing(sizing_target).iloc[0]
+            if sizing["units"] == 0:
+                if base_mode == "Maximum payback (years)":
+                    best_payback = min_achievable_payback(
+                        specific_value_m2, item_cost_per_unit, installation_cost
+                    )
+                    st.error(
+                        f"No system size pays back within {sizing_target:.1f} years "
+                        f"(best achievable: {best_payback:.1f} years)."
+                    )
+                elif base_mode == "Target annual energy (kWh)":
+                    st.error(
+                        f"No system of up to {MAX_UNITS:,} units produces {sizing_target:,.0f} kWh "
+                        f"per year on this site."
+                    )
+                else:
+                    st.error("Target cannot be reached with at least one unit.")
+                stop_page(app_mode)
+            n12, n24, n36 = int(sizing["n12"]), int(sizing["n24"]), int(sizing["n36"])
+            mirror_area = n12 * APERTURE_12 + n24 * APERTURE_24 + n36 * APERTURE_36
+            target_peak_kw = mirror_area * peak_kw_per_m2
+            st.caption(f"Solved mix: {n12} × 12 m² + {n24} × 24 m² + {n36} × 36 m²")
+            if base_mode in ECONOMIC_SIZING_MODES:
+                st.caption(
+                    "Economic sizing values all produced heat at the tariff; a heat demand "
+                    "profile is not applied to the solve."
+                )
+
         # Calculate actual units needed based on mode
         if base_mode == "Number of 12 m² units":
             actual_units = n12
@@ -266,17 +927,21 @@ if uploaded is not None:
             actual_units = n24
         elif base_mode == "Number of 36 m² units":
             actual_units = n36
-        elif base_mode == "Mix of 12 m² + 24 m² + 36 m² units":
+        elif base_mode == "Mix of 12 m² + 24 m² + 36 m² units" or base_mode in INVERSE_SIZING_MODES:
             actual_units = n12 + n24 + n36
+        elif base_mode == CATALOG_MODE:
+            actual_units = int(catalog_counts.sum())
         else:
             # For "Peak thermal power" or "Mirror surface" modes,
             # calculate most efficient unit configuration
+            # (quotients rounded first: an exact multiple of an aperture
+            # divides to just above the whole number in floating point)
             # Option 1: Use only 12 m² units
-            cost_12_only = math.ceil(mirror_area / APERTURE_12)
+            cost_12_only = math.ceil(round(mirror_area / APERTURE_12, 9))
             # Option 2: Use only 24 m² units
-            cost_24_only = math.ceil(mirror_area / APERTURE_24)
+            cost_24_only = math.ceil(round(mirror_area / APERTURE_24, 9))
             # Option 3: Use only 36 m² units
-            cost_36_only = math.ceil(mirror_area / APERTURE_36)
+            cost_36_only = math.ceil(round(mirror_area / APERTURE_36, 9))
             # Choose most efficient (fewer units)
             min_units = min(cost_12_only, cost_24_only, cost_36_only)
             if min_units == cost_36_only:
@@ -293,32 +958,73 @@ if uploaded is not None:
         needed_12_exact = mirror_area / APERTURE_12
         needed_24_exact = mirror_area / APERTURE_24
         needed_36_exact = mirror_area / APERTURE_36
-        needed_12_round = math.ceil(needed_12_exact)
-        needed_24_round = math.ceil(needed_24_exact)
-        needed_36_round = math.ceil(needed_36_exact)
+        needed_12_round = math.ceil(round(needed_12_exact, 9))
+        needed_24_round = math.ceil(round(needed_24_exact, 9))
+        needed_36_round = math.ceil(round(needed_36_exact, 9))
 
-        design_peak_kw = mirror_area * (DESIGN_DNI_W_M2 / 1000.0) * eta_opt
+        design_peak_kw = mirror_area * (DESIGN_DNI_W_M2 / 1000.0) * design_eta
 
         st.subheader("Calculated values")
         st.metric("Mirror area [m²]", f"{mirror_area:,.2f}")
         st.metric("Peak average thermal power [kW]", f"{target_peak_kw:,.2f}")
         st.metric("Peak thermal power @ 1000 W/m² [kW]", f"{design_peak_kw:,.2f}")
 
-        st.header("💰 Economic Parameters")
-
-        price_per_kwh = st.number_input("Value of thermal energy [€/kWh]", min_value=0.0, value=0.10)
-
-        item_cost_per_unit = st.number_input("Product cost [€ / unit]", min_value=0.0, value=15000.0)
-        installation_cost = st.number_input("Estimated installation cost [€]", min_value=0.0, value=20000.0)
+        if base_mode not in ECONOMIC_SIZING_MODES:
+            tariff, item_cost_per_unit, installation_cost = economic_inputs(base_mode != CATALOG_MODE)
 
         # Use actual units for cost calculation
-        total_product_cost = actual_units * item_cost_per_unit
+        if base_mode == CATALOG_MODE:
+            total_product_cost = float(catalog_counts @ catalog["unit_cost"].to_numpy())
+            item_cost_per_unit = total_product_cost / actual_units
+        else:
+            total_product_cost = actual_units * item_cost_per_unit
         system_cost = total_product_cost + installation_cost
 
         st.metric("Units used in calculation", f"{actual_units}")
         st.metric("Total product cost [€]", f"{total_product_cost:,.0f}")
         st.metric("Total system cost [€]", f"{system_cost:,.0f}")
 
+        if base_mode == CATALOG_MODE:
+            # The chosen mix against the same area built from a single model,
+            # priced from the kernels without recomputing any output
+            alternatives = np.vstack([catalog_counts, np.diag(np.ceil(np.round(mirror_area / kernels["aperture_m2"], 9)))])
+            alternatives_table = mix_table(
+                catalog, kernels, alternatives, installation_cost, model_values(kernels, tariff)
+            )
+            alternatives_table.index = ["Chosen mix", *(f"Only {model}" for model in catalog.index)]
+            with st.expander("Chosen mix vs. single-model alternatives"):
+                st.caption("Annual value of all produced heat, before any demand matching.")
+                st.dataframe(alternatives_table.style.format("{:,.1f}"), use_container_width=True)
+
+        st.header("🏭 Heat Demand")
+        demand_file = st.file_uploader(
+            "Hourly heat demand CSV: 24 hours x 12 months or a one-year series [kW]",
+            type=["csv"]
+        )
+        demand_kw = None
+        if demand_file is not None:
+            record_upload("demand", demand_file)
+            try:
+                demand_kw = parse_demand_csv(demand_file)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+        if demand_kw is None:
+            st.caption("Without a demand profile every produced kWh is valued.")
+        else:
+            st.subheader("Thermal Storage")
+            storage_kwh = st.number_input("Buffer tank capacity [kWh]", min_value=0.0, value=0.0)
+            storage_charge_kw = st.number_input(
+                "Max charge power [kW]", min_value=0.0, value=float(math.ceil(target_peak_kw))
+            )
+            storage_discharge_kw = st.number_input(
+                "Max discharge power [kW]", min_value=0.0, value=float(math.ceil(target_peak_kw))
+            )
+            storage_loss_pct = st.number_input(
+                "Standing loss [% of content per hour]", min_value=0.0, max_value=100.0, value=0.5
+            )
+            storage_loss_frac = storage_loss_pct / 100.0
+
+    thermal_key = ("thermal", profile_key, float(mirror_area), eta_key, thermal_loss_frac)
     (
         annual_direct_kwh,
         annual_system_kwh,
@@ -328,15 +1034,77 @@ if uploaded is not None:
         hourly_system_kw,
         daily_direct_kwh,
         daily_system_kwh,
-    ) = compute_thermal_outputs(
-        hour_matrix_wh,
-        monthly_kwh_m2,
-        annual_kwh_m2,
-        mirror_area,
-        eta_opt,
-        thermal_loss_frac
+    ) = SHARED_CACHE.get_or_compute(
+        thermal_key,
+        lambda: mix_outputs(kernels, catalog_counts, hour_matrix_wh.index)
+        if base_mode == CATALOG_MODE else compute_thermal_outputs(
+            hour_matrix_wh,
+            monthly_kwh_m2,
+            annual_kwh_m2,
+            mirror_area,
+            eta_model,
+            thermal_loss_frac
+        )
     )
 
+    # With a demand profile only the energy actually used has value
+    if demand_kw is not None:
+        demand_key = content_key(np.asarray(demand_kw, dtype=float).tobytes())
+        demand_match = SHARED_CACHE.get_or_compute(
+            ("demand", *thermal_key[1:], demand_key),
+            lambda: match_demand(hourly_system_kw, demand_kw)
+        )
+        demand_monthly = demand_balance(demand_match)
+        demand_totals, solar_fraction, self_consumption = annual_fractions(demand_monthly)
+        valued_kw = demand_match["used"]
+        valued_monthly_kwh = demand_monthly["used"]
+
+        # The tank sits between production and demand: direct use plus
+        # discharge is the heat that gets valued
+        storage_params = (storage_kwh, storage_charge_kw, storage_discharge_kw, storage_loss_frac)
+        if storage_kwh > 0:
+            storage_run = SHARED_CACHE.get_or_compute(
+                ("storage", *thermal_key[1:], demand_key, *storage_params),
+                lambda: simulate_storage(
+                    hourly_system_kw, demand_kw, *storage_params, record_hourly=True
+                )
+            )
+            valued_kw = storage_run["direct"] + storage_run["hourly_discharge"][:, 0]
+            valued_monthly_kwh = monthly_energy(valued_kw)
+    else:
+        demand_key = None
+        valued_kw = hourly_system_kw
+        valued_monthly_kwh = monthly_system_kwh
+    annual_valued_kwh = float(valued_monthly_kwh.sum())
+
+    # Valued separately from the thermal results so that switching
+    # tariffs does not recompute thermal output
+    tariff_key = content_key(np.asarray(tariff, dtype=float).tobytes())
+    value_key = ("value", *thermal_key[1:], tariff_key, demand_key, *(storage_params if demand_key else ()))
+    hourly_value_eur, monthly_value_eur, annual_value = SHARED_CACHE.get_or_compute(
+        value_key,
+        lambda: tariff_value(valued_kw, valued_monthly_kwh, tariff)
+    )
+    # Value of every hour of the year, for the time-series charts
+    value_8760 = hourly_value_eur if np.ndim(hourly_value_eur) == 1 else expand_to_8760(hourly_value_eur)
+    # Tables show the value on an average day of each month
+    if np.ndim(hourly_value_eur) == 1:
+        hourly_value_eur = mean_24x12(hourly_value_eur)
+    if not isinstance(hourly_value_eur, pd.DataFrame):
+        hourly_value_eur = pd.DataFrame(hourly_value_eur, index=hour_matrix_wh.index, columns=hour_matrix_wh.columns)
+
+    # Single €/kWh figure for the reports: weighted average price of the valued energy
+    if np.isscalar(tariff):
+        price_per_kwh = tariff
+    elif annual_valued_kwh > 0:
+        price_per_kwh = annual_value / annual_valued_kwh
+    else:
+        price_per_kwh = float(tariff_24x12(tariff).mean())
+
+    # Value of one produced kWh, so demand matching and tariffs carry over
+    # to scenarios that only change the production
+    value_per_kwh = annual_value / annual_system_kwh if annual_system_kwh > 0 else 0.0
+
     # ========================================
     # SUMMARY SECTION (Always visible at top)
     # ========================================
@@ -345,7 +1113,6 @@ if uploaded is not None:
     st.subheader("📊 Summary Results")
     
     # Calculate key metrics
-    annual_value = annual_system_kwh * price_per_kwh
     payback_years = system_cost / annual_value if annual_value > 0 else float("inf")
     total_20yr_production = annual_system_kwh * 20
     cost_per_kwh_20yr = system_cost / total_20yr_production if total_20yr_production > 0 else 0
@@ -359,16 +1126,40 @@ if uploaded is not None:
         st.metric("Payback Period", f"{payback_years:.1f} years")
     with col4:
         st.metric("Lifecycle Cost", f"{cost_per_kwh_20yr:.3f} €/kWh")
+
+    if base_mode in ECONOMIC_SIZING_MODES and demand_kw is not None:
+        st.info(
+            "The system was sized on the value of all produced heat, but with the demand profile "
+            f"only the heat used is valued: payback here is {payback_years:.1f} years."
+        )
+
+    if base_mode in INVERSE_SIZING_MODES:
+        with st.expander("📐 Sizing curve"):
+            # One vectorized solve for the whole curve around the current target
+            curve_targets = np.linspace(0.25, 2.0, 71) * sizing_target
+            sizing_curve = solve_sizing(curve_targets)
+            sizing_curve.insert(0, base_mode, curve_targets)
+            sizing_curve = sizing_curve.set_index(base_mode)
+            st.line_chart(sizing_curve[["mirror_area"]].rename(columns={"mirror_area": "Mirror area [m²]"}))
+            st.dataframe(
+                sizing_curve.round({"mirror_area": 2, "annual_kwh": 0, "system_cost": 0, "payback_years": 2}),
+                use_container_width=True
+            )
     
     # ========================================
     # DETAILED RESULTS IN TABS
     # ========================================
     
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+    tab1, tab2, tab3, tab4, tab_series, tab_compare, tab_demand, tab_soiling, tab_years, tab5 = st.tabs([
         "📈 Summary Report",
         "🔥 Hourly Profiles", 
         "📆 Monthly Data",
         "📊 Input DNI Data",
+        "📉 Time Series",
+        "⚖️ Scenarios",
+        "🏭 Demand Match",
+        "🧽 Soiling & Cleaning",
+        "📅 Interannual",
         "💾 Export"
     ])
     
@@ -397,9 +1188,9 @@ if uploaded is not None:
         with col2:
             st.markdown(f"""
             **Performance Parameters:**
-            - Optical efficiency: {eta_opt_pct}%
+            - Optical efficiency: {eta_opt_pct}%{f" (at {t_operating_c:.0f} °C: {design_eta:.1%} @ 1000 W/m²)" if use_efficiency_curve else ""}
             - Thermal losses: {thermal_loss_pct}%
-            - Peak DNI: {hour_matrix_wh.max().max():.0f} W/m²
+            - Peak DNI: {dni_hour_matrix_wh.max().max():.0f} W/m²
             - Average thermal power: {target_peak_kw:.1f} kW
             """)
         
@@ -500,6 +1291,34 @@ if uploaded is not None:
         })
         st.dataframe(daily_df, use_container_width=True, hide_index=True)
     
+        if use_efficiency_curve:
+            st.markdown("#### 🌡️ Collector Efficiency [%]")
+            st.caption(
+                f"Operating {t_operating_c:.0f} °C, ambient {t_ambient_c:.0f} °C · "
+                f"{design_eta:.1%} at {DESIGN_DNI_W_M2:.0f} W/m²"
+            )
+            st.table(
+                (eta_model * 100).style
+                .format("{:.1f}")
+                .set_properties(**{"line-height": "0.5rem", "padding": "2px", "font-size": "11px"})
+                .background_gradient(cmap="RdYlGn", axis=None)
+            )
+
+            st.markdown("#### Annual Energy vs Operating Temperature")
+            temperature_sweep = SHARED_CACHE.get_or_compute(
+                ("temperature_sweep", profile_key, eta_opt, a1, a2, t_ambient_c, thermal_loss_frac),
+                lambda: operating_temperature_sweep(
+                    hour_matrix_wh, monthly_kwh_m2, eta_opt, a1, a2,
+                    np.arange(30.0, 301.0, 5.0), t_ambient_c, thermal_loss_frac
+                )
+            )
+            st.line_chart(
+                pd.DataFrame({
+                    "Operating temperature [°C]": temperature_sweep["t_operating_c"],
+                    "Annual system energy [kWh]": temperature_sweep["annual_kwh_m2"] * mirror_area,
+                }).set_index("Operating temperature [°C]")
+            )
+
     # ========================================
     # TAB 3: MONTHLY DATA
     # ========================================
@@ -512,7 +1331,7 @@ if uploaded is not None:
             "Month": monthly_direct_kwh.index,
             "Direct Energy [kWh]": monthly_direct_kwh.values.round(0),
             "System Energy [kWh]": monthly_system_kwh.values.round(0),
-            "Economic Value [€]": (monthly_system_kwh.values * price_per_kwh).round(0)
+            "Economic Value [€]": monthly_value_eur.values.round(0)
         })
         
         st.dataframe(monthly_detailed, use_container_width=True, hide_index=True)
@@ -526,6 +1345,24 @@ if uploaded is not None:
             st.metric("Annual System Energy", f"{annual_system_kwh:,.0f} kWh")
         with col3:
             st.metric("Annual Economic Value", f"{annual_value:,.0f} €")
+
+        if not np.isscalar(tariff):
+            st.markdown("#### 🏷️ Tariff [€/kWh]")
+            st.caption(f"Production-weighted average price: {price_per_kwh:.3f} €/kWh")
+            st.table(
+                pd.DataFrame(tariff_24x12(tariff), index=hour_matrix_wh.index, columns=hour_matrix_wh.columns)
+                .style
+                .format("{:.3f}")
+                .set_properties(**{"line-height": "0.5rem", "padding": "2px", "font-size": "11px"})
+                .background_gradient(cmap="Blues", axis=None)
+            )
+            st.markdown("#### Hourly Value on a Typical Day [€/h]")
+            st.table(
+                hourly_value_eur.style
+                .format("{:.2f}")
+                .set_properties(**{"line-height": "0.5rem", "padding": "2px", "font-size": "11px"})
+                .background_gradient(cmap="Greens", axis=0)
+            )
     
     # ========================================
     # TAB 4: INPUT DNI DATA
@@ -533,10 +1370,16 @@ if uploaded is not None:
     
     with tab4:
         st.markdown("### ☀️ Input DNI Hourly Profile [W/m²]")
-        st.markdown("*Source data from Global Solar Atlas*")
+        if dni_series is None:
+            st.markdown("*Source data from Global Solar Atlas*")
+        else:
+            st.markdown(
+                f"*Average day of each month from a {60 // series_steps}-minute series "
+                f"({len(dni_series):,} values, {n_missing:,} gaps interpolated)*"
+            )
         
         st.table(
-            hour_matrix_wh.style
+            dni_hour_matrix_wh.style
             .format("{:.0f}")
             .set_properties(**{"line-height": "0.5rem", "padding": "2px", "font-size": "11px"})
             .background_gradient(cmap="YlOrBr", axis=0)
@@ -546,15 +1389,532 @@ if uploaded is not None:
         st.markdown("#### 📊 DNI Statistics")
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Peak DNI", f"{hour_matrix_wh.max().max():.0f} W/m²")
+            st.metric("Peak DNI", f"{dni_hour_matrix_wh.max().max():.0f} W/m²")
         with col2:
-            st.metric("Average DNI", f"{hour_matrix_wh.mean().mean():.0f} W/m²")
+            st.metric("Average DNI", f"{dni_hour_matrix_wh.mean().mean():.0f} W/m²")
         with col3:
-            st.metric("Annual DNI", f"{annual_kwh_m2:.0f} kWh/m²")
+            st.metric("Annual DNI", f"{dni_annual_kwh_m2:.0f} kWh/m²")
         with col4:
-            best_month = monthly_kwh_m2.idxmax()
+            best_month = dni_monthly_kwh_m2.idxmax()
             st.metric("Best Month", best_month)
+
+        if dni_series is not None:
+            st.markdown("#### ⏱️ Sub-hourly Effects")
+            st.caption(
+                f"Measured DNI before incidence-angle and shading factors; the field is rated "
+                f"at {DESIGN_DNI_W_M2:.0f} W/m² ({design_peak_kw:,.1f} kW)"
+            )
+            effects = SHARED_CACHE.get_or_compute(
+                ("resolution_effects", profile_key),
+                lambda: resolution_effects(dni_series, DESIGN_DNI_W_M2)
+            )
+            # Same field, clipped at its rating, at native and hourly resolution
+            native_kwh = SHARED_CACHE.get_or_compute(
+                ("thermal_series", profile_key, float(mirror_area), design_eta, thermal_loss_frac),
+                lambda: compute_thermal_timeseries(
+                    dni_series, mirror_area, design_eta, thermal_loss_frac, design_peak_kw
+                )[1]
+            )
+            hourly_kwh = compute_thermal_timeseries(
+                to_hourly(dni_series), mirror_area, design_eta, thermal_loss_frac, design_peak_kw
+            )[1]
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Peak DNI (native)", f"{effects['peak_native']:.0f} W/m²",
+                          f"{effects['peak_native'] - effects['peak_hourly']:+.0f} vs hourly")
+            with col2:
+                st.metric("Time Above Rating", f"{effects['steps_above_rating'] / series_steps:,.1f} h",
+                          f"{effects['hours_above_rating']:,} h in hourly data", delta_color="off")
+            with col3:
+                st.metric("DNI Above Rating", f"{effects['clipped_share_native']:.2%}",
+                          f"{effects['clipped_share_hourly']:.2%} hourly", delta_color="off")
+            with col4:
+                st.metric("Clipped Annual Energy", f"{native_kwh:,.0f} kWh",
+                          f"{native_kwh - hourly_kwh:+,.0f} kWh vs hourly")
+            st.caption(
+                f"99th percentile ramp: {effects['ramp_p99_native']:.0f} W/m² per "
+                f"{60 // series_steps} minutes"
+            )
+
+        if use_geometry:
+            st.markdown("#### 📐 Aperture Factor cos(θ)·IAM(θ) [%]")
+            st.caption(f"{tracking_mode} at {latitude:.2f}°, {longitude:.2f}° (middle day of each month)")
+            st.table(
+                pd.DataFrame(aperture_factor * 100, index=dni_hour_matrix_wh.index, columns=dni_hour_matrix_wh.columns)
+                .style
+                .format("{:.0f}")
+                .set_properties(**{"line-height": "0.5rem", "padding": "2px", "font-size": "11px"})
+                .background_gradient(cmap="RdYlGn", axis=None)
+            )
+
+        if use_shading and annual_kwh_m2 > 0:
+            st.markdown("#### 🌾 Row Spacing vs Land Use vs Annual Yield")
+            st.caption(
+                f"{n_rows} rows of {units_per_row} × {row_unit} ({row_length:.0f} m) · "
+                f"same mirror area and efficiency as the current system"
+            )
+            # Field output per kWh/m² of aperture irradiance, as in the current system
+            system_kwh_per_kwh_m2 = annual_system_kwh / annual_kwh_m2
+            pitch_sweep = SHARED_CACHE.get_or_compute(
+                ("spacing_sweep", *geometry_key, n_rows, row_length, system_kwh_per_kwh_m2),
+                lambda: spacing_sweep(
+                    aperture_hour_matrix_wh, aperture_monthly_kwh_m2, latitude, longitude, utc_offset,
+                    tracking_mode, np.linspace(1.05 * APERTURE_WIDTH_M, max(4 * row_pitch, 6.0), 120),
+                    n_rows, row_length, system_kwh_per_kwh_m2
+                )
+            )
+            pitch_view = pitch_sweep.set_index("pitch_m")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.line_chart(pitch_view[["annual_kwh"]].rename(columns={"annual_kwh": "Annual energy [kWh]"}))
+            with col2:
+                st.line_chart(pitch_view[["land_m2"]].rename(columns={"land_m2": "Land use [m²]"}))
+            st.dataframe(
+                pitch_sweep.iloc[::10].round({
+                    "pitch_m": 2, "ground_cover_ratio": 2, "land_m2": 0,
+                    "annual_kwh": 0, "shading_loss": 3, "kwh_per_land_m2": 1
+                }),
+                use_container_width=True, hide_index=True
+            )
     
+    # ========================================
+    # DEMAND MATCH TAB
+    # ========================================
+
+    with tab_demand:
+        st.markdown("### 🏭 Heat Demand Matching")
+
+        if demand_kw is None:
+            st.info("Upload an hourly heat demand profile in the sidebar to see used, curtailed and backup energy.")
+        else:
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Solar Fraction", f"{solar_fraction:.1%}")
+            with col2:
+                st.metric("Used Solar Heat", f"{demand_totals['used']:,.0f} kWh")
+            with col3:
+                st.metric("Curtailed", f"{demand_totals['curtailed']:,.0f} kWh")
+            with col4:
+                st.metric("Backup Heat", f"{demand_totals['backup']:,.0f} kWh")
+            st.caption(
+                f"Self-consumption: {self_consumption:.1%} of production · "
+                f"only used energy is valued in the economics"
+            )
+
+            st.markdown("#### Monthly Balance [kWh]")
+            st.dataframe(
+                demand_monthly.rename(columns={
+                    "production": "Production",
+                    "demand": "Demand",
+                    "used": "Used",
+                    "curtailed": "Curtailed",
+                    "backup": "Backup",
+                    "solar_fraction": "Solar fraction",
+                    "self_consumption": "Self-consumption",
+                }).style.format("{:,.0f}").format("{:.1%}", subset=["Solar fraction", "Self-consumption"]),
+                use_container_width=True
+            )
+
+            st.markdown("#### Mirror Area Sweep")
+            sweep = SHARED_CACHE.get_or_compute(
+                ("demand_sweep", profile_key, eta_key, thermal_loss_frac, float(mirror_area), demand_key, tariff_key),
+                lambda: sweep_areas(
+                    unit_outputs[5], demand_kw, np.linspace(0.1, 3.0, 59) * mirror_area, tariff
+                )
+            )
+            sweep_view = sweep.set_index("mirror_area")
+            st.line_chart(
+                sweep_view[["solar_fraction", "self_consumption"]]
+                .rename(columns={"solar_fraction": "Solar fraction", "self_consumption": "Self-consumption"})
+            )
+            st.line_chart(
+                sweep_view[["used", "curtailed", "backup"]]
+                .rename(columns={"used": "Used [kWh]", "curtailed": "Curtailed [kWh]", "backup": "Backup [kWh]"})
+            )
+            st.caption(f"Current mirror area: {mirror_area:,.1f} m²")
+
+            st.markdown("#### 🛢️ Thermal Storage")
+            if storage_kwh > 0:
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric(
+                        "Solar Fraction with Tank",
+                        f"{storage_run['solar_fraction'][0]:.1%}",
+                        f"{storage_run['solar_fraction'][0] - solar_fraction:+.1%}"
+                    )
+                with col2:
+                    st.metric("From Storage", f"{storage_run['discharged'][0]:,.0f} kWh")
+                with col3:
+                    st.metric("Curtailed with Tank", f"{storage_run['curtailed'][0]:,.0f} kWh")
+                with col4:
+                    st.metric("Standing Losses", f"{storage_run['standing_loss'][0]:,.0f} kWh")
+            else:
+                st.caption("Set a buffer tank capacity in the sidebar to include storage in the economics.")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                storage_sweep_max = st.number_input(
+                    "Largest tank in sweep [kWh]",
+                    min_value=1.0,
+                    value=float(max(math.ceil(demand_totals["demand"] / 365 * 2), 1))
+                )
+            with col2:
+                storage_candidates = st.select_slider("Sweep candidates", [100, 500, 2000, 5000], value=500)
+            # Thousands of tank sizes take a while; run them as a background job
+            storage_job = submit_job(
+                ("storage_curve", *thermal_key[1:], demand_key, *storage_params[1:],
+                 storage_sweep_max, storage_candidates),
+                f"Storage sweep ({storage_candidates} tanks)",
+                storage_curve,
+                [
+                    (hourly_system_kw, demand_kw, capacities, *storage_params[1:])
+                    for capacities in np.array_split(
+                        np.linspace(0, storage_sweep_max, storage_candidates), STORAGE_SWEEP_CHUNKS
+                    )
+                ]
+            )
+            previous_job = st.session_state.get("storage_sweep_job")
+            if previous_job not in (None, storage_job.id):
+                # Stops the old sweep only if no other session is waiting for it
+                JOBS.release(previous_job, session_id)
+            st.session_state["storage_sweep_job"] = storage_job.id
+            show_job(storage_job, lambda curve: st.line_chart(
+                curve.set_index("capacity_kwh")[["solar_fraction"]]
+                .rename(columns={"solar_fraction": "Solar fraction"})
+            ))
+            st.caption("Storage size [kWh] vs solar fraction, same charge/discharge limits and losses")
+
+    # ========================================
+    # SOILING & CLEANING TAB
+    # ========================================
+
+    with tab_soiling:
+        st.markdown("### 🧽 Soiling, Degradation & Cleaning Schedule")
+        st.caption(
+            f"The summary assumes clean mirrors and {annual_system_kwh:,.0f} kWh every year. "
+            "Here output drops with dirt between cleanings and with yearly optical degradation."
+        )
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            soiling_rate = st.number_input("Soiling rate [% per day]", min_value=0.0, max_value=5.0, value=0.2, step=0.05)
+            max_soiling = st.number_input("Maximum soiling loss [%]", min_value=0.0, max_value=100.0, value=20.0, step=1.0)
+        with col2:
+            cleaning_cost = st.number_input("Cost per cleaning [€]", min_value=0.0, value=150.0, step=10.0)
+            degradation = st.number_input("Optical degradation [% per year]", min_value=0.0, max_value=10.0, value=0.5, step=0.1)
+        with col3:
+            discount_rate = st.number_input("Discount rate [%]", min_value=0.0, max_value=30.0, value=5.0, step=0.5)
+            max_interval = st.number_input("Longest cleaning interval [days]", min_value=2, max_value=730, value=365)
+
+        never_cleaned = LIFETIME_YEARS * DAYS_PER_YEAR
+        intervals = np.append(np.arange(1, int(max_interval) + 1), never_cleaned)
+        soiling_params = (
+            soiling_rate / 100, max_soiling / 100, cleaning_cost, degradation / 100, discount_rate / 100
+        )
+        schedules, schedule_kwh = SHARED_CACHE.get_or_compute(
+            ("soiling", *thermal_key[1:], value_per_kwh, system_cost, int(max_interval), *soiling_params),
+            lambda: cleaning_schedule_npv(
+                monthly_system_kwh, value_per_kwh, system_cost, intervals, *soiling_params
+            )
+        )
+        best = int(schedules["npv"].idxmax())
+        best_row = schedules.loc[best]
+        unmanaged = schedules.iloc[-1]
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric(
+                "Best Cleaning Interval",
+                "Never" if best_row["interval_days"] >= never_cleaned else f"{best_row['interval_days']:.0f} days"
+            )
+        with col2:
+            st.metric(
+                f"{LIFETIME_YEARS}-year NPV", f"{best_row['npv']:,.0f} €",
+                f"{best_row['npv'] - unmanaged['npv']:+,.0f} € vs never cleaning"
+            )
+        with col3:
+            st.metric("Soiling Loss", f"{best_row['soiling_loss']:.1%}")
+        with col4:
+            st.metric("Cleaning Cost", f"{best_row['cleaning_cost_per_year']:,.0f} €/year")
+
+        st.markdown("#### NPV vs Cleaning Interval")
+        st.line_chart(
+            schedules.iloc[:-1].set_index("interval_days")[["npv"]].rename(columns={"npv": "NPV [€]"})
+        )
+
+        st.markdown("#### Yearly Production, Best Schedule")
+        years_index = pd.Index(np.arange(1, LIFETIME_YEARS + 1), name="Year")
+        clean_kwh = annual_system_kwh * (1 - soiling_params[3]) ** np.arange(LIFETIME_YEARS)
+        yearly = pd.DataFrame({
+            "Clean mirrors [kWh]": clean_kwh,
+            "Best schedule [kWh]": schedule_kwh[best],
+            "Never cleaned [kWh]": schedule_kwh[-1],
+        }, index=years_index)
+        st.line_chart(yearly)
+        st.dataframe(yearly.style.format("{:,.0f}"), use_container_width=True)
+
+    # ========================================
+    # INTERANNUAL TAB
+    # ========================================
+
+    with tab_years:
+        st.markdown("### 📅 Year-to-Year Yield and Payback")
+        st.caption(
+            "The main results use one long-term average profile. A multi-year archive shows "
+            "how much single years differ for the same system."
+        )
+        archive_file = st.file_uploader(
+            "Multi-year hourly DNI archive: CSV (timestamp, DNI [W/m²]) or NetCDF",
+            type=["csv", "nc"]
+        )
+        archive_meta = None
+        if archive_file is None:
+            st.info("Upload 10-20 years of measured or satellite DNI to see P50 / P90 and worst-year figures.")
+        else:
+            record_upload("archive", archive_file)
+            try:
+                if archive_file.name.lower().endswith(".nc"):
+                    # xarray reads NetCDF from a path; one copy per upload content
+                    archive_meta = ingest_netcdf(store_upload(archive_file, ARCHIVE_DIR, ".nc"))
+                else:
+                    archive_meta = ingest_csv(archive_file)
+            except (OSError, ValueError) as e:
+                st.error(f"❌ {e}")
+                archive_meta = None
+
+        if archive_file is not None and archive_meta is not None:
+            if use_efficiency_curve:
+                archive_eta = lambda G: collector_efficiency(G, eta_opt, *efficiency_params)
+            else:
+                archive_eta = eta_opt
+            site_factor_key = None if site_factor is None else content_key(np.asarray(site_factor).tobytes())
+            try:
+                annual_by_year = SHARED_CACHE.get_or_compute(
+                    ("archive_yield", archive_meta["path"], float(mirror_area), eta_key, thermal_loss_frac,
+                     site_factor_key),
+                    lambda: yearly_yield(
+                        open_archive(archive_meta), mirror_area, archive_eta, thermal_loss_frac, site_factor
+                    )
+                )
+            except (OSError, ValueError) as e:
+                # e.g. the archive file was cleaned out of the temp directory
+                st.error(f"❌ {e}")
+                archive_meta = None
+
+        if archive_file is not None and archive_meta is not None:
+            per_year, year_stats = interannual_statistics(
+                archive_meta["years"], annual_by_year, value_per_kwh, system_cost
+            )
+
+            def vs_p50(kwh):
+                # No relative delta when the median year yields nothing
+                if year_stats["p50_kwh"] <= 0:
+                    return None
+                return f"{kwh / year_stats['p50_kwh'] - 1:+.1%} vs P50"
+
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("P50 Annual Energy", f"{year_stats['p50_kwh']:,.0f} kWh")
+            with col2:
+                st.metric("P90 Annual Energy", f"{year_stats['p90_kwh']:,.0f} kWh", vs_p50(year_stats["p90_kwh"]))
+            with col3:
+                st.metric(f"Worst Year ({year_stats['worst_year']})", f"{year_stats['worst_kwh']:,.0f} kWh",
+                          vs_p50(year_stats["worst_kwh"]))
+            with col4:
+                st.metric("Year-to-Year Variation", f"{year_stats['cov']:.1%}")
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("P50 Payback", f"{year_stats['p50_payback']:.1f} years")
+            with col2:
+                st.metric("P90 Payback", f"{year_stats['p90_payback']:.1f} years")
+            with col3:
+                st.metric("Worst-Year Payback", f"{year_stats['worst_payback']:.1f} years")
+
+            st.bar_chart(per_year[["annual_kwh"]].rename(columns={"annual_kwh": "Annual energy [kWh]"}))
+            st.caption(
+                f"{len(archive_meta['years'])} years ({archive_meta['years'][0]}-{archive_meta['years'][-1]})"
+                + (f", incomplete years left out: {', '.join(map(str, archive_meta['skipped']))}"
+                   if archive_meta["skipped"] else "")
+                + f" · long-term profile: {annual_system_kwh:,.0f} kWh"
+            )
+            st.dataframe(
+                per_year.rename(columns={
+                    "annual_kwh": "Annual energy [kWh]", "value": "Value [€]", "payback_years": "Payback [years]"
+                }).style.format({"Annual energy [kWh]": "{:,.0f}", "Value [€]": "{:,.0f}", "Payback [years]": "{:.1f}"}),
+                use_container_width=True
+            )
+
+    # ========================================
+    # TIME SERIES TAB (decimated charts)
+    # ========================================
+
+    with tab_series:
+        st.markdown("### 📉 Full-Year Time Series")
+        st.caption(
+            "Series are reduced on the server to about one point per pixel; "
+            "narrow the time window to see every value."
+        )
+
+        # label -> (cache key of the series, values, time stamps)
+        chart_series = {}
+        if dni_series is not None:
+            chart_series[f"DNI, measured [W/m²] ({len(dni_series):,} values)"] = (
+                ("dni_series", profile_key), dni_series, year_index(len(dni_series))
+            )
+        else:
+            chart_series["DNI, typical days [W/m²]"] = (
+                ("dni_typical", profile_key), expand_to_8760(dni_hour_matrix_wh), year_index(HOURS_PER_YEAR)
+            )
+        chart_series["Thermal production, typical days [kW]"] = (
+            thermal_key, expand_to_8760(hourly_system_kw), year_index(HOURS_PER_YEAR)
+        )
+        chart_series["Value of production [€/h]"] = (value_key, value_8760, year_index(HOURS_PER_YEAR))
+        if archive_meta is not None:
+            chart_series[f"DNI archive {archive_meta['years'][0]}-{archive_meta['years'][-1]} [W/m²]"] = (
+                ("archive", archive_meta["path"]),
+                np.asarray(open_archive(archive_meta)).ravel(),
+                SHARED_CACHE.get_or_compute(
+                    ("archive_index", archive_meta["path"]), lambda: archive_index(archive_meta["years"])
+                ),
+            )
+
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            series_label = st.selectbox("Series", list(chart_series))
+        with col2:
+            method_label = st.radio("Decimation", list(DECIMATION_METHODS), horizontal=True)
+        with col3:
+            chart_points = st.slider(
+                "Points per chart", MIN_POINTS, MAX_POINTS, DEFAULT_POINTS, step=100,
+                help="About the chart width in pixels"
+            )
+        series_key, series_values, series_index = chart_series[series_label]
+        window = st.slider(
+            "Time window",
+            min_value=series_index[0].to_pydatetime(),
+            max_value=series_index[-1].to_pydatetime(),
+            value=(series_index[0].to_pydatetime(), series_index[-1].to_pydatetime()),
+            format="YYYY-MM-DD HH:mm",
+            key=f"chart_window_{series_label}"
+        )
+        start = int(series_index.searchsorted(pd.Timestamp(window[0])))
+        stop = int(series_index.searchsorted(pd.Timestamp(window[1]), side="right"))
+        method = DECIMATION_METHODS[method_label]
+        decimated = SHARED_CACHE.get_or_compute(
+            ("chart", series_key, method, chart_points, start, stop),
+            lambda: decimated_series(
+                series_values, series_index, chart_points, method, start, stop, name=series_label
+            )
+        )
+        st.line_chart(decimated)
+        st.caption(
+            f"{len(decimated):,} of {stop - start:,} points shown"
+            + (" (every value)" if len(decimated) == stop - start else "")
+        )
+
+    # ========================================
+    # SAVED SCENARIOS TAB
+    # ========================================
+
+    with tab_compare:
+        st.markdown("### ⚖️ Scenario Comparison")
+        st.caption(
+            "Saved scenarios are evaluated together on this site's profile (including incidence-angle "
+            "and shading factors) with a constant optical efficiency and a flat energy price."
+        )
+        saved = st.session_state.get("saved_scenarios")
+
+        with st.form("save_scenario", clear_on_submit=False):
+            st.markdown("**Add a scenario** (prefilled with the current design)")
+            scenario_name = st.text_input("Name", value=f"Scenario {1 if saved is None else len(saved) + 1}")
+            col1, col2, col3, col4 = st.columns(4)
+            by_units = n12 + n24 + n36 > 0
+            with col1:
+                form_area = st.number_input(
+                    "Mirror area [m²] (0: size by units)", min_value=0.0,
+                    value=0.0 if by_units else float(mirror_area)
+                )
+            with col2:
+                form_n12 = st.number_input("12 m² units", min_value=0, value=int(n12))
+            with col3:
+                form_n24 = st.number_input("24 m² units", min_value=0, value=int(n24))
+            with col4:
+                form_n36 = st.number_input("36 m² units", min_value=0, value=int(n36))
+            col1, col2, col3, col4, col5 = st.columns(5)
+            with col1:
+                form_eta = st.number_input("Optical efficiency [%]", 0.0, 100.0, float(eta_opt * 100))
+            with col2:
+                form_loss = st.number_input("Loop losses [%]", 0.0, 100.0, float(thermal_loss_frac * 100))
+            with col3:
+                form_price = st.number_input("Energy price [€/kWh]", min_value=0.0, value=float(price_per_kwh))
+            with col4:
+                form_unit_cost = st.number_input("Cost per unit [€]", min_value=0.0, value=float(item_cost_per_unit))
+            with col5:
+                form_installation = st.number_input(
+                    "Installation [€]", min_value=0.0, value=float(installation_cost)
+                )
+            if st.form_submit_button("💾 Save scenario") and scenario_name.strip():
+                saved = save_scenario(
+                    saved, scenario_name.strip()[:40],
+                    mirror_area=form_area if form_area > 0 else None,
+                    n12=form_n12, n24=form_n24, n36=form_n36,
+                    eta_opt=form_eta / 100.0, thermal_loss=form_loss / 100.0,
+                    price_per_kwh=form_price, unit_cost=form_unit_cost, installation_cost=form_installation,
+                )
+                st.session_state["saved_scenarios"] = saved
+
+        if saved is None or len(saved) == 0:
+            st.info("Save two or more scenarios to compare them side by side.")
+        else:
+            compare_results, compare_monthly = evaluate_saved(sum_daily_wh, saved)
+            st.dataframe(
+                compare_results.rename(columns={
+                    "mirror_area": "Mirror area [m²]",
+                    "units": "Units",
+                    "annual_kwh": "Annual energy [kWh]",
+                    "peak_kw_at_1000": "Peak @ 1000 W/m² [kW]",
+                    "system_cost": "System cost [€]",
+                    "annual_value": "Annual value [€]",
+                    "payback_years": "Payback [years]",
+                    "lifecycle_cost_per_kwh": "Lifecycle cost [€/kWh]",
+                }).style.format("{:,.0f}").format(
+                    "{:,.2f}", subset=["Mirror area [m²]", "Payback [years]"]
+                ).format("{:.3f}", subset=["Lifecycle cost [€/kWh]"]),
+                use_container_width=True
+            )
+
+            baseline = st.selectbox("Baseline for deltas", list(compare_results.index))
+            deltas = scenario_deltas(compare_results, baseline).drop(index=baseline)
+            if not deltas.empty:
+                col1, col2, col3 = st.columns(3)
+                for col, column, label in [
+                    (col1, "annual_kwh", "Δ Annual energy [kWh]"),
+                    (col2, "annual_value", "Δ Annual value [€]"),
+                    (col3, "payback_years", "Δ Payback [years]"),
+                ]:
+                    with col:
+                        st.markdown(f"**{label}**")
+                        st.bar_chart(deltas[[column]].replace([np.inf, -np.inf], np.nan).rename(columns={column: label}))
+
+            st.markdown("#### Monthly Energy [kWh]")
+            st.line_chart(compare_monthly.T.reindex(MONTHS))
+
+            col1, col2 = st.columns(2)
+            with col1:
+                to_drop = st.multiselect("Remove scenarios", list(compare_results.index))
+                if st.button("🗑️ Remove selected", disabled=not to_drop):
+                    st.session_state["saved_scenarios"] = drop_scenarios(saved, to_drop)
+                    st.rerun()
+            with col2:
+                st.download_button(
+                    "📥 Download comparison (CSV)",
+                    compare_results.join(compare_monthly.add_prefix("kwh_")).to_csv().encode("utf-8"),
+                    "helixis_scenarios.csv",
+                    "text/csv",
+                    use_container_width=True
+                )
+
     # ========================================
     # TAB 5: EXPORT & DOWNLOADS
     # ========================================
@@ -630,3 +1990,54 @@ MONTHLY PRODUCTION (kWh)
 
 else:
     st.info("Upload a GSA Excel report file to continue.")
+
+# ========================================
+# DIAGNOSTICS (memory per session / shared cache)
+# ========================================
+
+footprint = session_footprint(st.session_state)
+record_session(session_id, st.session_state.get("current_user", ""), footprint.sum())
+
+jobs_panel()
+
+with st.sidebar.expander("🩺 Diagnostics"):
+    cache_stats = SHARED_CACHE.stats()
+    st.metric(
+        "Shared cache",
+        f"{cache_stats['bytes'] / 1e6:,.2f} / {cache_stats['max_bytes'] / 1e6:,.0f} MB"
+    )
+    st.progress(min(cache_stats["bytes"] / cache_stats["max_bytes"], 1.0))
+    st.caption(
+        f"{cache_stats['entries']} entries · hit ratio {cache_stats['hit_ratio']:.0%} · "
+        f"{cache_stats['evictions']} evictions"
+    )
+
+    st.markdown("**This session**")
+    st.metric("session_state size", f"{footprint.sum() / 1e3:,.1f} kB")
+    st.dataframe(
+        (footprint / 1e3).round(1).rename("kB").to_frame(),
+        use_container_width=True
+    )
+
+    st.markdown("**Active sessions**")
+    sessions_df = active_sessions()
+    st.caption(
+        f"{len(sessions_df)} sessions · {sessions_df['bytes'].sum() / 1e3:,.1f} kB total · "
+        f"largest {sessions_df['bytes'].max() / 1e3 if len(sessions_df) else 0:,.1f} kB"
+    )
+    # Session ids and user names are only shown to admins
+    if is_admin():
+        sessions_df["kB"] = (sessions_df["bytes"] / 1e3).round(1)
+        st.dataframe(sessions_df[["session", "user", "kB"]], use_container_width=True, hide_index=True)
+
+    st.markdown("**Metrics**")
+    st.caption(f"Prometheus snapshot written to `{METRICS_FILE}` at most every few seconds")
+    st.download_button(
+        "📈 Download metrics (Prometheus text)",
+        REGISTRY.to_prometheus().encode("utf-8"),
+        "helixis_metrics.prom",
+        "text/plain",
+        use_container_width=True
+    )
+
+finish_rerun(app_mode)
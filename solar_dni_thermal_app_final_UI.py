@@ -2,7 +2,8 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import math
+
+from solar_catalog import load_catalog
 
 # -------------------------------------------------
 # Authentication
@@ -85,8 +86,6 @@ DAYS_IN_MONTH = {
 
 MONTHS = list(DAYS_IN_MONTH.keys())
 
-APERTURE_12 = 12.35
-APERTURE_24 = 24.7
 DESIGN_DNI_W_M2 = 1000.0
 
 # -------------------------------------------------
@@ -171,6 +170,13 @@ st.sidebar.markdown("---")
 
 st.title("Helixis Solar Concentrator Thermal Production Estimate")
 
+# Models, apertures and unit costs shared with the main app
+try:
+    CATALOG = load_catalog()
+except (OSError, ValueError) as e:
+    st.error(f"❌ Product catalog: {e}")
+    st.stop()
+
 uploaded = st.file_uploader(
     "📥 Upload Excel file from GlobalSolarAtlas/Energydata.info",
     type=["xlsx"]
@@ -183,9 +189,8 @@ with st.sidebar:
         [
             "Peak thermal power (kW)",
             "Mirror surface (m²)",
-            "Number of 12 m² units",
-            "Number of 24 m² units",
-            "Mix of 12 m² + 24 m² units",
+            *(f"Number of {model} units" for model in CATALOG.index),
+            "Mix of " + " + ".join(CATALOG.index) + " units",
         ]
     )
 
@@ -205,37 +210,35 @@ if uploaded is not None:
 
         st.subheader("Sizing Input")
 
-        n12 = 0
-        n24 = 0
+        counts = pd.Series(0, index=CATALOG.index)
 
         if base_mode == "Peak thermal power (kW)":
             target_peak_kw = st.number_input("Target peak power [kW]", min_value=0.1, value=100.0)
             mirror_area = target_peak_kw / peak_kw_per_m2
 
         elif base_mode == "Mirror surface (m²)":
-            mirror_area = st.number_input("Mirror area [m²]", min_value=1.0, value=APERTURE_24)
+            mirror_area = st.number_input("Mirror area [m²]", min_value=1.0, value=float(CATALOG["aperture_m2"].median()))
             target_peak_kw = mirror_area * peak_kw_per_m2
 
-        elif base_mode == "Number of 12 m² units":
-            n12 = st.number_input("Number of 12 m² units", min_value=0, value=1)
-            mirror_area = n12 * APERTURE_12
+        elif base_mode.startswith("Number of "):
+            model = base_mode[len("Number of "):-len(" units")]
+            counts[model] = st.number_input(f"Number of {model} units", min_value=0, value=1)
+            mirror_area = float(counts @ CATALOG["aperture_m2"])
             target_peak_kw = mirror_area * peak_kw_per_m2
 
-        elif base_mode == "Number of 24 m² units":
-            n24 = st.number_input("Number of 24 m² units", min_value=0, value=1)
-            mirror_area = n24 * APERTURE_24
-            target_peak_kw = mirror_area * peak_kw_per_m2
-
-        elif base_mode == "Mix of 12 m² + 24 m² units":
-            n12 = st.number_input("Number of 12 m² units", min_value=0, value=1)
-            n24 = st.number_input("Number of 24 m² units", min_value=0, value=1)
-            mirror_area = n12 * APERTURE_12 + n24 * APERTURE_24
+        else:
+            for model in CATALOG.index:
+                counts[model] = st.number_input(f"Number of {model} units", min_value=0, value=1)
+            mirror_area = float(counts @ CATALOG["aperture_m2"])
             target_peak_kw = mirror_area * peak_kw_per_m2
 
-        needed_12_exact = mirror_area / APERTURE_12
-        needed_24_exact = mirror_area / APERTURE_24
-        needed_12_round = math.ceil(needed_12_exact)
-        needed_24_round = math.ceil(needed_24_exact)
+        # Units of each single model covering the mirror area
+        needed_round = np.ceil(np.round(mirror_area / CATALOG["aperture_m2"], 9)).astype(int)
+        if counts.sum() == 0:
+            # Area-based modes: the fewest units of a single model
+            fewest = needed_round.idxmin() if mirror_area > 0 else CATALOG.index[0]
+            counts[fewest] = needed_round[fewest]
+        needed_lines = "\n".join(f"{model} units: {n}" for model, n in needed_round.items())
 
         design_peak_kw = mirror_area * (DESIGN_DNI_W_M2 / 1000.0) * eta_opt
 
@@ -248,11 +251,10 @@ if uploaded is not None:
 
         price_per_kwh = st.number_input("Value of thermal energy [€/kWh]", min_value=0.0, value=0.10)
 
-        item_cost_per_unit = st.number_input("Product cost [€ / unit]", min_value=0.0, value=15000.0)
         installation_cost = st.number_input("Estimated installation cost [€]", min_value=0.0, value=20000.0)
 
-        total_units = needed_12_round + needed_24_round
-        total_product_cost = total_units * item_cost_per_unit
+        total_units = int(counts.sum())
+        total_product_cost = float(counts @ CATALOG["unit_cost"])
         system_cost = total_product_cost + installation_cost
 
         st.metric("Total product cost [€]", f"{total_product_cost:,.0f}")
@@ -293,7 +295,6 @@ if uploaded is not None:
         payback_years = system_cost / annual_value if annual_value > 0 else float("inf")
         st.metric("Payback Period", f"{payback_years:.1f} years")
     with col4:
-        total_units = needed_12_round + needed_24_round
         st.metric("Total Units", f"{total_units}")
     
     # ========================================
@@ -324,8 +325,7 @@ if uploaded is not None:
             st.markdown(f"""
             **Mirror Configuration:**
             - Mirror area: {mirror_area:.2f} m²
-            - 12 m² units: {needed_12_round} units
-            - 24 m² units: {needed_24_round} units
+            - Units: {", ".join(f"{n} × {model}" for model, n in counts.items() if n)}
             - Peak thermal power @ 1000 W/m²: {design_peak_kw:.1f} kW
             """)
         
@@ -509,8 +509,7 @@ HELIXIS SOLAR CONCENTRATOR - PRODUCTION ESTIMATE
 SYSTEM CONFIGURATION
 --------------------
 Mirror area: {mirror_area:.2f} m²
-12 m² units: {needed_12_round}
-24 m² units: {needed_24_round}
+{needed_lines}
 Optical efficiency: {eta_opt_pct}%
 Thermal losses: {thermal_loss_pct}%
 
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------
+# Collector efficiency curve
+# -------------------------------------------------
+# eta = eta0 - a1 * dT / G - a2 * dT**2 / G, with dT the operating minus
+# ambient temperature [K] and G the DNI [W/m²]. Every argument broadcasts,
+# so a column of operating temperatures against the 24x12 hour matrix
+# (or an 8760 series) evaluates a whole temperature sweep at once.
+
+MIN_DNI_W_M2 = 1.0
+
+# Typical small parabolic trough, per m² of aperture
+DEFAULT_A1 = 0.36
+DEFAULT_A2 = 0.0011
+
+
+def collector_efficiency(dni_w_m2, eta0, a1, a2, t_operating_c, t_ambient_c, min_dni_w_m2=MIN_DNI_W_M2):
+    """Hourly collector efficiency, clipped to [0, eta0].
+
+    Hours with DNI below min_dni_w_m2 are masked to zero instead of
+    dividing by a near-zero irradiance. A DataFrame input keeps its labels.
+    """
+    dni = np.asarray(dni_w_m2, dtype=float)
+    delta_t = np.asarray(t_operating_c, dtype=float) - np.asarray(t_ambient_c, dtype=float)
+    heat_loss = a1 * delta_t + a2 * delta_t ** 2
+    lit = dni >= min_dni_w_m2
+
+    shape = np.broadcast_shapes(dni.shape, np.shape(heat_loss))
+    loss_per_g = np.zeros(shape)
+    np.divide(heat_loss, dni, out=loss_per_g, where=np.broadcast_to(lit, shape))
+    eta = np.where(lit, np.clip(eta0 - loss_per_g, 0.0, eta0), 0.0)
+
+    if isinstance(dni_w_m2, pd.DataFrame) and eta.shape == dni.shape:
+        return pd.DataFrame(eta, index=dni_w_m2.index, columns=dni_w_m2.columns)
+    return eta
+
+
+def efficiency_at(dni_w_m2, eta0, a1, a2, t_operating_c, t_ambient_c):
+    """Efficiency at a single irradiance, e.g. the 1000 W/m² design point."""
+    return float(collector_efficiency(float(dni_w_m2), eta0, a1, a2, t_operating_c, t_ambient_c))
+
+
+def operating_temperature_sweep(hour_matrix_wh, monthly_kwh_m2, eta0, a1, a2, t_operating_c,
+                                t_ambient_c, thermal_loss_frac=0.0):
+    """Annual system yield per m² for many operating temperatures.
+
+    Uses the same DNI-weighted monthly efficiency as compute_thermal_outputs,
+    evaluated as one (n_temperatures, 24, 12) broadcast.
+    """
+    t_operating_c = np.atleast_1d(np.asarray(t_operating_c, dtype=float))
+    dni = np.asarray(hour_matrix_wh, dtype=float)
+    eta = collector_efficiency(dni, eta0, a1, a2, t_operating_c[:, None, None], t_ambient_c)
+    dni_day = dni.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        monthly_eta = np.where(dni_day > 0, (dni * eta).sum(axis=1) / dni_day, 0.0)
+    annual_kwh_m2 = monthly_eta @ np.asarray(monthly_kwh_m2, dtype=float) * (1 - thermal_loss_frac)
+    return pd.DataFrame({
+        "t_operating_c": t_operating_c,
+        "annual_kwh_m2": annual_kwh_m2,
+        "mean_efficiency": (monthly_eta * np.asarray(monthly_kwh_m2)).sum(axis=1) / np.sum(monthly_kwh_m2),
+    })
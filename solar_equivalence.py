@@ -0,0 +1,571 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from solar_catalog import load_catalog, mix_outputs, mix_table, model_kernels, model_values
+from solar_core import MONTHS, compute_energy_from_profiles, compute_thermal_outputs
+from solar_efficiency import collector_efficiency
+from solar_reference import (
+    REF_APERTURE_12,
+    REF_APERTURE_24,
+    REF_APERTURE_36,
+    ref_collector_efficiency,
+    ref_economics,
+    ref_energy_from_profiles,
+    ref_scenario,
+    ref_thermal_outputs,
+)
+from solar_scenarios import evaluate_saved, evaluate_scenarios, save_scenario
+
+# -------------------------------------------------
+# Reference vs. fast engine equivalence
+# -------------------------------------------------
+# Random site profiles and system parameters are run through the engines
+# the app uses (pandas / NumPy, stacked, kernel-based, cached) and through
+# the frozen scalar versions in solar_reference.py. Every output value
+# must agree within RTOL / ATOL. The generator mixes ordinary cases with
+# the edges that break vectorized code: dark months, hours below the
+# efficiency curve's minimum DNI, zero area, zero or full efficiency and
+# losses, zero prices, and areas that are exact multiples of a unit.
+# A failing case is shrunk (months and hours zeroed, parameters set to
+# round values) while it still fails, and written out as JSON to replay.
+#
+#   python solar_equivalence.py --cases 5000 --seed 1
+#   python solar_equivalence.py --replay equivalence_failures/thermal_frame.json
+
+DEFAULT_CASES = 2000
+# kWh, €, years and efficiencies alike
+RTOL = 1e-9
+ATOL = 1e-6
+# Attempts per failing case while shrinking it
+SHRINK_BUDGET = 2000
+FAILURES_DIR = "equivalence_failures"
+
+# Share of cases that take each edge value instead of a random one
+EDGE_PROBABILITY = 0.1
+
+
+# -------------------------------------------------
+# Random cases
+# -------------------------------------------------
+
+def _maybe(rng, edges, value):
+    return float(rng.choice(edges)) if rng.random() < EDGE_PROBABILITY else float(value)
+
+
+def random_profile(rng):
+    """(hours, sum_daily): a 24x12 list of clear-sky-like days with noise, and its Sum row."""
+    hours = np.zeros((24, 12))
+    for m in range(12):
+        if rng.random() < 0.05:
+            continue
+        sunrise = rng.uniform(4.0, 9.0)
+        sunset = rng.uniform(15.0, 21.0)
+        peak = rng.uniform(50.0, 1100.0)
+        t = np.arange(24) + 0.5
+        day = np.clip(np.sin(np.pi * (t - sunrise) / (sunset - sunrise)), 0.0, None)
+        hours[:, m] = peak * day * rng.uniform(0.7, 1.0, 24)
+    # A few hours just around the efficiency curve's minimum DNI
+    low = rng.random((24, 12)) < 0.02
+    hours[low] = rng.choice([0.0, 0.5, 1.0, 1.5], size=int(low.sum()))
+    sum_daily = hours.sum(axis=0)
+    if rng.random() < 0.5:
+        # Exported Sum rows are rounded and need not match the hours exactly
+        sum_daily = sum_daily * rng.uniform(0.99, 1.01, 12)
+    return np.round(hours, 3).tolist(), np.round(sum_daily, 3).tolist()
+
+
+def random_case(rng, n_models):
+    hours, sum_daily = random_profile(rng)
+    if rng.random() < 0.5:
+        mirror_area = None
+        n12, n24, n36 = (int(n) for n in rng.integers(0, 20, 3))
+    else:
+        n12 = n24 = n36 = 0
+        mirror_area = float(rng.choice([
+            round(rng.uniform(0.0, 500.0), 2),
+            int(rng.integers(1, 30)) * REF_APERTURE_36,
+            int(rng.integers(1, 30)) * REF_APERTURE_12,
+            0.0,
+        ], p=[0.7, 0.1, 0.1, 0.1]))
+    return {
+        "hours": hours,
+        "sum_daily": sum_daily,
+        "mirror_area": mirror_area,
+        "n12": n12,
+        "n24": n24,
+        "n36": n36,
+        "eta_opt": _maybe(rng, [0.0, 1.0], round(rng.uniform(0.3, 0.9), 4)),
+        "thermal_loss": _maybe(rng, [0.0, 1.0], round(rng.uniform(0.0, 0.4), 4)),
+        "a1": round(rng.uniform(0.0, 1.0), 4),
+        "a2": round(rng.uniform(0.0, 0.01), 5),
+        "t_operating_c": round(rng.uniform(20.0, 300.0), 2),
+        "t_ambient_c": round(rng.uniform(-10.0, 40.0), 2),
+        "price_per_kwh": _maybe(rng, [0.0], round(rng.uniform(0.01, 0.5), 4)),
+        "unit_cost": _maybe(rng, [0.0], round(rng.uniform(1000.0, 30000.0), 2)),
+        "installation_cost": _maybe(rng, [0.0], round(rng.uniform(0.0, 50000.0), 2)),
+        "counts": [int(n) for n in rng.integers(0, 10, n_models)],
+    }
+
+
+def random_cases(n_cases, seed=0, n_models=None):
+    rng = np.random.default_rng(seed)
+    n_models = len(load_catalog()) if n_models is None else n_models
+    return [random_case(rng, n_models) for _ in range(n_cases)]
+
+
+# -------------------------------------------------
+# Checks: reference values and fast values per case
+# -------------------------------------------------
+
+OUTPUT_NAMES = ["annual_direct_kwh", "annual_system_kwh", "monthly_direct_kwh", "monthly_system_kwh",
+                "hourly_direct_kw", "hourly_system_kw", "daily_direct_kwh", "daily_system_kwh"]
+SCENARIO_FIELDS = ["mirror_area", "n12", "n24", "n36", "eta_opt", "thermal_loss",
+                   "price_per_kwh", "unit_cost", "installation_cost"]
+ECONOMIC_FIELDS = ["system_cost", "annual_value", "payback_years"]
+
+
+def _outputs(values):
+    return {name: np.asarray(value, dtype=float) for name, value in zip(OUTPUT_NAMES, values)}
+
+
+def _frame(case):
+    return pd.DataFrame(case["hours"], index=range(24), columns=MONTHS)
+
+
+def _fast_energy(case):
+    return compute_energy_from_profiles(pd.Series(case["sum_daily"], index=MONTHS))
+
+
+def _area(case):
+    return case["mirror_area"] if case["mirror_area"] is not None else 100.0
+
+
+def _ref_eta_matrix(case, eta0=None, a1=None, a2=None):
+    eta0 = case["eta_opt"] if eta0 is None else eta0
+    a1 = case["a1"] if a1 is None else a1
+    a2 = case["a2"] if a2 is None else a2
+    return [
+        [ref_collector_efficiency(case["hours"][h][m], eta0, a1, a2, case["t_operating_c"], case["t_ambient_c"])
+         for m in range(12)]
+        for h in range(24)
+    ]
+
+
+def ref_energy(case):
+    monthly, annual = ref_energy_from_profiles(case["sum_daily"])
+    return {"monthly_kwh_m2": np.array(monthly), "annual_kwh_m2": np.array(annual)}
+
+
+def fast_energy(cases):
+    results = []
+    for case in cases:
+        monthly, annual = _fast_energy(case)
+        results.append({"monthly_kwh_m2": monthly.to_numpy(dtype=float), "annual_kwh_m2": np.array(annual)})
+    return results
+
+
+def ref_thermal(case):
+    monthly, annual = ref_energy_from_profiles(case["sum_daily"])
+    return _outputs(ref_thermal_outputs(
+        case["hours"], monthly, annual, _area(case), case["eta_opt"], case["thermal_loss"]
+    ))
+
+
+def fast_thermal(cases):
+    results = []
+    for case in cases:
+        monthly, annual = _fast_energy(case)
+        results.append(_outputs(compute_thermal_outputs(
+            _frame(case), monthly, annual, _area(case), case["eta_opt"], case["thermal_loss"]
+        )))
+    return results
+
+
+def ref_thermal_curve(case):
+    monthly, annual = ref_energy_from_profiles(case["sum_daily"])
+    return _outputs(ref_thermal_outputs(
+        case["hours"], monthly, annual, _area(case), _ref_eta_matrix(case), case["thermal_loss"]
+    ))
+
+
+def fast_thermal_curve(cases):
+    results = []
+    for case in cases:
+        monthly, annual = _fast_energy(case)
+        hours = _frame(case)
+        eta = collector_efficiency(
+            hours, case["eta_opt"], case["a1"], case["a2"], case["t_operating_c"], case["t_ambient_c"]
+        )
+        results.append(_outputs(compute_thermal_outputs(
+            hours, monthly, annual, _area(case), eta, case["thermal_loss"]
+        )))
+    return results
+
+
+def ref_thermal_stacked(case):
+    # One call shares its area and loop loss, so the stacked path is
+    # checked per m² before loop losses, as the archive and kernels use it
+    monthly, annual = ref_energy_from_profiles(case["sum_daily"])
+    return _outputs(ref_thermal_outputs(case["hours"], monthly, annual, 1.0, _ref_eta_matrix(case), 0.0))
+
+
+def fast_thermal_stacked(cases):
+    """All cases in one compute_thermal_outputs call with a leading case axis."""
+    hours = np.array([case["hours"] for case in cases], dtype=float)
+    monthly = np.array([_fast_energy(case)[0].to_numpy() for case in cases])
+    annual = monthly.sum(axis=1)
+    eta = collector_efficiency(
+        hours,
+        np.array([case["eta_opt"] for case in cases])[:, None, None],
+        np.array([case["a1"] for case in cases])[:, None, None],
+        np.array([case["a2"] for case in cases])[:, None, None],
+        np.array([case["t_operating_c"] for case in cases])[:, None, None],
+        np.array([case["t_ambient_c"] for case in cases])[:, None, None],
+    )
+    stacked = compute_thermal_outputs(hours, monthly, annual, 1.0, eta, 0.0)
+    return [_outputs([np.asarray(value)[i] for value in stacked]) for i in range(len(cases))]
+
+
+def _catalog_counts(case, catalog):
+    counts = case["counts"][:len(catalog)]
+    return np.asarray(counts + [0] * (len(catalog) - len(counts)), dtype=float)
+
+
+def ref_catalog(case, catalog=None):
+    catalog = load_catalog() if catalog is None else catalog
+    counts = _catalog_counts(case, catalog)
+    monthly, annual = ref_energy_from_profiles(case["sum_daily"])
+    total = None
+    for n, (_, model) in zip(counts, catalog.iterrows()):
+        eta = _ref_eta_matrix(case, model["eta_opt"], model["a1"], model["a2"])
+        values = _outputs(ref_thermal_outputs(
+            case["hours"], monthly, annual, model["aperture_m2"], eta, case["thermal_loss"]
+        ))
+        values = {name: n * value for name, value in values.items()}
+        total = values if total is None else {name: total[name] + values[name] for name in total}
+    unit_cost = float(counts @ catalog["unit_cost"].to_numpy())
+    economics = ref_economics(
+        float(total["annual_system_kwh"]), case["price_per_kwh"], 1, unit_cost, case["installation_cost"]
+    )
+    return {**total, **{field: np.array(economics[field]) for field in ECONOMIC_FIELDS}}
+
+
+def fast_catalog(cases, catalog=None):
+    """Kernels of every model per site, then the case's mix as a weighted sum."""
+    catalog = load_catalog() if catalog is None else catalog
+    results = []
+    for case in cases:
+        monthly, annual = _fast_energy(case)
+        hours = _frame(case)
+        kernels = model_kernels(
+            catalog, hours, monthly, annual, case["thermal_loss"], case["t_operating_c"], case["t_ambient_c"]
+        )
+        counts = _catalog_counts(case, catalog)
+        values = _outputs(mix_outputs(kernels, counts, hours.index))
+        table = mix_table(
+            catalog, kernels, counts, case["installation_cost"], model_values(kernels, case["price_per_kwh"])
+        ).iloc[0]
+        results.append({**values, **{field: np.array(table[field]) for field in ECONOMIC_FIELDS}})
+    return results
+
+
+def _scenario(case):
+    return {field: case[field] for field in SCENARIO_FIELDS}
+
+
+def ref_scenarios(case):
+    quote = ref_scenario(case["sum_daily"], **_scenario(case))
+    return {name: np.asarray(value, dtype=float) for name, value in quote.items()}
+
+
+def _scenario_values(results, monthly_kwh, i):
+    values = {name: np.asarray(results.iloc[i][name], dtype=float) for name in results.columns}
+    values["monthly_kwh"] = monthly_kwh.iloc[i].to_numpy(dtype=float)
+    return values
+
+
+def fast_scenarios(cases):
+    results = []
+    for case in cases:
+        table, monthly_kwh = evaluate_scenarios(pd.Series(case["sum_daily"], index=MONTHS), [_scenario(case)])
+        results.append(_scenario_values(table, monthly_kwh, 0))
+    return results
+
+
+def fast_saved_scenarios(cases):
+    """evaluate_saved twice per case, so the second answer comes from the shared cache."""
+    results = []
+    for case in cases:
+        sum_daily = pd.Series(case["sum_daily"], index=MONTHS)
+        saved = save_scenario(None, "case", **_scenario(case))
+        evaluate_saved(sum_daily, saved)
+        table, monthly_kwh = evaluate_saved(sum_daily, saved)
+        results.append(_scenario_values(table, monthly_kwh, 0))
+    return results
+
+
+# name: (reference for one case, fast engine for a list of cases)
+CHECKS = {
+    "energy": (ref_energy, fast_energy),
+    "thermal_frame": (ref_thermal, fast_thermal),
+    "thermal_curve": (ref_thermal_curve, fast_thermal_curve),
+    "thermal_stacked": (ref_thermal_stacked, fast_thermal_stacked),
+    "catalog_mix": (ref_catalog, fast_catalog),
+    "scenarios": (ref_scenarios, fast_scenarios),
+    "saved_scenarios": (ref_scenarios, fast_saved_scenarios),
+}
+
+
+# -------------------------------------------------
+# Intended differences from the reference
+# -------------------------------------------------
+# The reference is the behaviour the app had when it was frozen. A change
+# that alters quoted figures on purpose is listed here, per check, as a
+# function (case, expected) -> expected that applies the change to the
+# reference answer for the cases it covers. Every other difference still
+# fails, and the list documents each departure from the baseline.
+
+def exact_multiple_units(case, expected):
+    """Areas that are a whole number of apertures are quoted without an extra unit.
+
+    The baseline took the ceil of area / aperture, and an exact multiple
+    such as 15 x 37.05 m² divides to just above 15, so it was quoted 16
+    units. Quotients are now rounded to 9 decimals before the ceil; the
+    unit count and the economics built on it move for those areas only.
+    """
+    if case["mirror_area"] is None:
+        return expected
+    area = case["mirror_area"]
+    units = min(
+        math.ceil(round(area / aperture, 9)) for aperture in (REF_APERTURE_12, REF_APERTURE_24, REF_APERTURE_36)
+    )
+    if units == expected["units"]:
+        return expected
+    economics = ref_economics(
+        float(expected["annual_kwh"]), case["price_per_kwh"], units, case["unit_cost"], case["installation_cost"]
+    )
+    return {
+        **expected,
+        "units": np.asarray(units, dtype=float),
+        **{name: np.asarray(value, dtype=float) for name, value in economics.items()},
+    }
+
+
+INTENDED_DIFFERENCES = {
+    "scenarios": [exact_multiple_units],
+    "saved_scenarios": [exact_multiple_units],
+}
+
+
+def expected_result(check, case):
+    """Reference answer of one case with the intended differences of the check applied."""
+    expected = CHECKS[check][0](case)
+    for adjust in INTENDED_DIFFERENCES.get(check, []):
+        expected = adjust(case, expected)
+    return expected
+
+
+# -------------------------------------------------
+# Comparison, shrinking and reporting
+# -------------------------------------------------
+
+def compare(expected, actual, rtol=RTOL, atol=ATOL):
+    """Mismatching values of one case: a list of dicts (field, index, expected, actual)."""
+    mismatches = []
+    for field, want in expected.items():
+        if field not in actual:
+            mismatches.append({"field": field, "index": "", "expected": "value", "actual": "missing"})
+            continue
+        got = actual[field]
+        if np.shape(got) != np.shape(want):
+            mismatches.append({
+                "field": field, "index": "", "expected": f"shape {np.shape(want)}", "actual": f"shape {np.shape(got)}"
+            })
+            continue
+        bad = ~np.isclose(got, want, rtol=rtol, atol=atol, equal_nan=True)
+        for index in zip(*np.nonzero(np.atleast_1d(bad))):
+            mismatches.append({
+                "field": field,
+                "index": ",".join(map(str, index)) if np.ndim(want) else "",
+                "expected": float(np.atleast_1d(want)[index]),
+                "actual": float(np.atleast_1d(got)[index]),
+            })
+    return mismatches
+
+
+def max_relative_error(expected, actual, atol=ATOL):
+    """Largest |actual - expected| / max(|expected|, atol) over the numeric fields of one case."""
+    worst = 0.0
+    for field, want in expected.items():
+        got = actual.get(field)
+        if got is None or np.shape(got) != np.shape(want):
+            continue
+        want, got = np.asarray(want, dtype=float), np.asarray(got, dtype=float)
+        both = np.isfinite(want) & np.isfinite(got)
+        if both.any():
+            error = np.abs(got[both] - want[both]) / np.maximum(np.abs(want[both]), atol)
+            worst = max(worst, float(error.max()))
+    return worst
+
+
+def check_case(check, case, rtol=RTOL, atol=ATOL):
+    """Mismatches of one case under one check; an exception counts as a mismatch."""
+    fast = CHECKS[check][1]
+    try:
+        return compare(expected_result(check, case), fast([case])[0], rtol, atol)
+    except Exception as e:
+        return [{"field": "error", "index": "", "expected": "", "actual": f"{type(e).__name__}: {e}"}]
+
+
+def _simplifications(case):
+    """Candidate simpler cases, roughly from the biggest simplification to the smallest."""
+    hours = np.asarray(case["hours"], dtype=float)
+    sums = np.asarray(case["sum_daily"], dtype=float)
+    for m in range(12):
+        if sums[m] or hours[:, m].any():
+            simpler_hours, simpler_sums = hours.copy(), sums.copy()
+            simpler_hours[:, m], simpler_sums[m] = 0.0, 0.0
+            yield {**case, "hours": simpler_hours.tolist(), "sum_daily": simpler_sums.tolist()}
+    if not np.allclose(sums, hours.sum(axis=0), rtol=0, atol=0):
+        yield {**case, "sum_daily": hours.sum(axis=0).tolist()}
+    for field in ["mirror_area", "n12", "n24", "n36", "eta_opt", "thermal_loss", "a1", "a2",
+                  "t_operating_c", "t_ambient_c", "price_per_kwh", "unit_cost", "installation_cost"]:
+        value = case[field]
+        if value is None:
+            continue
+        for simpler in (0, 1, round(value), round(value, 2)):
+            if simpler != value and abs(simpler) <= abs(value):
+                yield {**case, field: simpler}
+    for i, n in enumerate(case["counts"]):
+        if n:
+            yield {**case, "counts": case["counts"][:i] + [0] + case["counts"][i + 1:]}
+    for h, m in zip(*np.nonzero(hours)):
+        simpler = hours.copy()
+        simpler[h, m] = 0.0
+        yield {**case, "hours": simpler.tolist()}
+    rounded = np.round(hours)
+    if not np.array_equal(rounded, hours):
+        yield {**case, "hours": rounded.tolist(), "sum_daily": np.round(sums).tolist()}
+
+
+def shrink(check, case, rtol=RTOL, atol=ATOL, budget=SHRINK_BUDGET):
+    """Smallest case found that still fails the check, by greedy simplification."""
+    attempts = 0
+    improved = True
+    while improved and attempts < budget:
+        improved = False
+        for simpler in _simplifications(case):
+            attempts += 1
+            if check_case(check, simpler, rtol, atol):
+                case = simpler
+                improved = True
+                break
+            if attempts >= budget:
+                break
+    return case
+
+
+def run_checks(cases, checks=None, rtol=RTOL, atol=ATOL):
+    """Every check over every case, fast engines batched.
+
+    Returns (summary, mismatches): one row per check with cases, failing
+    cases, largest relative error and seconds; one row per mismatching
+    value with the check and case index.
+    """
+    summary, mismatches = [], []
+    for check in checks or list(CHECKS):
+        fast = CHECKS[check][1]
+        started = time.perf_counter()
+        try:
+            actual = fast(cases)
+        except Exception:
+            # Batched engine failed: fall back to one case at a time to find which
+            actual = None
+        failing, worst = 0, 0.0
+        for i, case in enumerate(cases):
+            if actual is None:
+                found = check_case(check, case, rtol, atol)
+            else:
+                expected = expected_result(check, case)
+                found = compare(expected, actual[i], rtol, atol)
+                worst = max(worst, max_relative_error(expected, actual[i], atol))
+            if found:
+                failing += 1
+                mismatches.extend({"check": check, "case": i, **m} for m in found)
+        summary.append({
+            "check": check,
+            "cases": len(cases),
+            "failing": failing,
+            "max_rel_error": worst,
+            "seconds": time.perf_counter() - started,
+        })
+    columns = ["check", "case", "field", "index", "expected", "actual"]
+    return pd.DataFrame(summary), pd.DataFrame(mismatches, columns=columns)
+
+
+def write_failure(path, check, case, mismatches):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"check": check, "case": case, "mismatches": mismatches}, f, indent=1)
+    return path
+
+
+def replay(path, rtol=RTOL, atol=ATOL):
+    """Mismatches of a failure file written by main, re-run against the current code."""
+    with open(path, encoding="utf-8") as f:
+        failure = json.load(f)
+    return failure["check"], check_case(failure["check"], failure["case"], rtol, atol)
+
+
+def _print_mismatches(mismatches, limit=10):
+    for m in mismatches[:limit]:
+        index = f"[{m['index']}]" if m["index"] != "" else ""
+        print(f"    {m['field']}{index}: expected {m['expected']!r}, got {m['actual']!r}")
+    if len(mismatches) > limit:
+        print(f"    ... {len(mismatches) - limit} more")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the fast engines against the frozen reference")
+    parser.add_argument("--cases", type=int, default=DEFAULT_CASES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="append", choices=list(CHECKS), help="run only these checks")
+    parser.add_argument("--rtol", type=float, default=RTOL)
+    parser.add_argument("--atol", type=float, default=ATOL)
+    parser.add_argument("--out", default=FAILURES_DIR, help="directory for shrunk failing cases")
+    parser.add_argument("--replay", help="re-run a failing case written to --out")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        check, mismatches = replay(args.replay, args.rtol, args.atol)
+        print(f"{'FAIL' if mismatches else 'OK  '} {check} ({args.replay})")
+        _print_mismatches(mismatches)
+        return 1 if mismatches else 0
+
+    cases = random_cases(args.cases, args.seed)
+    summary, mismatches = run_checks(cases, args.check, args.rtol, args.atol)
+    for row in summary.itertuples():
+        status = "FAIL" if row.failing else "OK  "
+        print(f"{status} {row.check}: {row.cases - row.failing}/{row.cases} cases agree "
+              f"(max rel. error {row.max_rel_error:.1e}, {row.seconds:.1f} s)")
+        if not row.failing:
+            continue
+        first = int(mismatches.loc[mismatches["check"] == row.check, "case"].iloc[0])
+        smallest = shrink(row.check, cases[first], args.rtol, args.atol)
+        found = check_case(row.check, smallest, args.rtol, args.atol)
+        path = write_failure(os.path.join(args.out, f"{row.check}.json"), row.check, smallest, found)
+        print(f"  case {first} (seed {args.seed}) shrunk and written to {path}:")
+        _print_mismatches(found)
+    return 1 if summary["failing"].any() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
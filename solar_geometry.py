@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from solar_core import DAYS_IN_MONTH, year_calendar
+
+# -------------------------------------------------
+# Solar position and incidence angle
+# -------------------------------------------------
+# NOAA / Spencer series for declination and equation of time, evaluated
+# on whole arrays of (day of year, hour) at once. Times are local
+# standard time of the profile, given by its UTC offset.
+
+TRACKING_MODES = {
+    # name: horizontal tracking-axis azimuth in degrees (None = two-axis)
+    "Single-axis, N-S axis (E-W tracking)": 0.0,
+    "Single-axis, E-W axis (N-S tracking)": 90.0,
+    "Two-axis tracking": None,
+}
+
+# Incidence angle [deg] -> modifier, typical small parabolic trough
+DEFAULT_IAM_TABLE = pd.DataFrame({
+    "angle_deg": [0, 10, 20, 30, 40, 50, 60, 70, 80, 90],
+    "iam": [1.00, 0.99, 0.98, 0.96, 0.92, 0.86, 0.76, 0.60, 0.35, 0.0],
+})
+
+# Samples per hour when averaging the aperture factor over an hour
+SUBHOUR_SAMPLES = 6
+
+
+def solar_position(latitude_deg, longitude_deg, day_of_year, hour, utc_offset_h):
+    """Zenith and azimuth [deg] for arrays of day of year and decimal hour.
+
+    Azimuth is measured clockwise from north. Inputs broadcast.
+    """
+    day_of_year = np.asarray(day_of_year, dtype=float)
+    hour = np.asarray(hour, dtype=float)
+    gamma = 2 * np.pi / 365.0 * (day_of_year - 1 + (hour - 12) / 24.0)
+
+    eq_time_min = 229.18 * (
+        0.000075 + 0.001868 * np.cos(gamma) - 0.032077 * np.sin(gamma)
+        - 0.014615 * np.cos(2 * gamma) - 0.040849 * np.sin(2 * gamma)
+    )
+    declination = (
+        0.006918 - 0.399912 * np.cos(gamma) + 0.070257 * np.sin(gamma)
+        - 0.006758 * np.cos(2 * gamma) + 0.000907 * np.sin(2 * gamma)
+        - 0.002697 * np.cos(3 * gamma) + 0.00148 * np.sin(3 * gamma)
+    )
+    true_solar_min = hour * 60.0 + eq_time_min + 4.0 * longitude_deg - 60.0 * utc_offset_h
+    hour_angle = np.radians(true_solar_min / 4.0 - 180.0)
+
+    lat = np.radians(latitude_deg)
+    cos_zenith = np.sin(lat) * np.sin(declination) + np.cos(lat) * np.cos(declination) * np.cos(hour_angle)
+    zenith = np.arccos(np.clip(cos_zenith, -1.0, 1.0))
+    azimuth = np.arctan2(
+        np.sin(hour_angle),
+        np.cos(hour_angle) * np.sin(lat) - np.tan(declination) * np.cos(lat)
+    ) + np.pi
+    return np.degrees(zenith), np.degrees(azimuth) % 360.0
+
+
+def incidence_angle(zenith_deg, azimuth_deg, tracking_mode):
+    """Angle [deg] between the sun and the aperture normal of a tracker.
+
+    A horizontal single-axis tracker rotated to the sun keeps only the
+    sun's component along its axis: cos(theta) = sqrt(1 - (s . axis)^2).
+    """
+    axis_azimuth = TRACKING_MODES[tracking_mode]
+    if axis_azimuth is None:
+        return np.zeros(np.shape(zenith_deg))
+    along_axis = np.sin(np.radians(zenith_deg)) * np.cos(np.radians(np.asarray(azimuth_deg) - axis_azimuth))
+    return np.degrees(np.arccos(np.sqrt(np.clip(1.0 - along_axis ** 2, 0.0, 1.0))))
+
+
+def incidence_angle_modifier(theta_deg, iam_table=DEFAULT_IAM_TABLE):
+    table = pd.DataFrame(iam_table).sort_values("angle_deg")
+    return np.interp(theta_deg, table["angle_deg"].to_numpy(float), table["iam"].to_numpy(float))
+
+
+def sun_samples(day_of_year, hour_start, latitude_deg, longitude_deg, utc_offset_h):
+    """Zenith, azimuth and sun-up mask at SUBHOUR_SAMPLES points per hour.
+
+    The sample axis is appended last; average over it with mean_over_sun_up.
+    """
+    offsets = (np.arange(SUBHOUR_SAMPLES) + 0.5) / SUBHOUR_SAMPLES
+    hours = np.asarray(hour_start, dtype=float)[..., None] + offsets
+    days = np.asarray(day_of_year, dtype=float)[..., None]
+    zenith, azimuth = solar_position(latitude_deg, longitude_deg, days, hours, utc_offset_h)
+    return zenith, azimuth, zenith < 90.0
+
+
+def sun_samples_24x12(latitude_deg, longitude_deg, utc_offset_h):
+    """sun_samples for each hour of each month's middle day, shape (24, 12, samples)."""
+    mid_month_doy = np.cumsum([0] + list(DAYS_IN_MONTH.values())[:-1]) + 15
+    return sun_samples(mid_month_doy[None, :], np.arange(24)[:, None], latitude_deg, longitude_deg, utc_offset_h)
+
+
+def mean_over_sun_up(values, sun_up):
+    """Average over the sample axis, counting only samples with the sun up.
+
+    Sunrise and sunset hours are then not lost to an hour-centre below
+    the horizon; hours with no lit sample give zero.
+    """
+    lit_samples = sun_up.sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(lit_samples > 0, (values * sun_up).sum(axis=-1) / lit_samples, 0.0)
+
+
+def _aperture_factor(zenith, azimuth, sun_up, tracking_mode, iam_table):
+    theta = incidence_angle(zenith, azimuth, tracking_mode)
+    factor = np.cos(np.radians(theta)) * incidence_angle_modifier(theta, iam_table)
+    return mean_over_sun_up(factor, sun_up)
+
+
+def aperture_factor_24x12(latitude_deg, longitude_deg, utc_offset_h, tracking_mode,
+                          iam_table=DEFAULT_IAM_TABLE):
+    """cos(theta) x IAM(theta) for each hour of each month's middle day."""
+    return _aperture_factor(
+        *sun_samples_24x12(latitude_deg, longitude_deg, utc_offset_h), tracking_mode, iam_table
+    )
+
+
+def aperture_factor_8760(latitude_deg, longitude_deg, utc_offset_h, tracking_mode,
+                         iam_table=DEFAULT_IAM_TABLE):
+    """cos(theta) x IAM(theta) for every hour of a non-leap year."""
+    _, hour_of_day = year_calendar()
+    day_of_year = np.arange(365).repeat(24) + 1
+    return _aperture_factor(
+        *sun_samples(day_of_year, hour_of_day, latitude_deg, longitude_deg, utc_offset_h),
+        tracking_mode, iam_table
+    )
+
+
+def apply_aperture_factor(hour_matrix_wh, sum_daily_wh, factor_24x12):
+    """Irradiance usable by the aperture (or any hourly derate), as a new profile pair.
+
+    Each month's Sum-row total is scaled by its DNI-weighted factor, so
+    compute_energy_from_profiles keeps working on the workbook totals.
+    """
+    effective = hour_matrix_wh * factor_24x12
+    dni_day = hour_matrix_wh.sum(axis=0)
+    weighted = (effective.sum(axis=0) / dni_day).where(dni_day > 0, 0.0)
+    return effective, sum_daily_wh * weighted.values
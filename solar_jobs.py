@@ -0,0 +1,342 @@
+import contextlib
+import multiprocessing
+import os
+import pickle
+import stat
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from solar_cache import SHARED_CACHE, content_key
+
+# -------------------------------------------------
+# Background jobs
+# -------------------------------------------------
+# Streamlit runs the app script on the session's own thread, so a long
+# computation blocks every widget until it returns. A job splits the work
+# into chunks that run on a process pool shared by all sessions; the
+# script only submits, then reads progress and the chunks finished so far
+# on its next reruns. Jobs are identified by their inputs, so resubmitting
+# the same work returns the running or finished job, and finished results
+# are written to disk as well as the shared cache. A job shared by several
+# sessions is only cancelled once the last of them lets go of it.
+
+# Results are pickles, so they are only read from a directory that belongs
+# to this user and nobody else can write to
+JOBS_DIR = os.environ.get(
+    "HELIXIS_JOBS_DIR",
+    os.path.join(tempfile.gettempdir(), f"helixis_jobs_{os.getuid()}" if hasattr(os, "getuid") else "helixis_jobs")
+)
+DEFAULT_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+# Worker processes start from a clean server process: forking the
+# multi-threaded Streamlit server would copy locks other threads hold
+# (cache, metrics, logging) and can deadlock the child
+POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+_MAIN_LOCK = threading.Lock()
+# Finished jobs kept in memory for the jobs panel; their results stay on disk
+MAX_FINISHED_JOBS = 100
+
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = "queued", "running", "done", "cancelled", "failed"
+
+
+@contextlib.contextmanager
+def starting_workers():
+    """Submit to a POOL_CONTEXT pool inside this block.
+
+    Streamlit runs the app script as sys.modules["__main__"], and forkserver
+    / spawn workers started meanwhile would re-run that file as their own
+    main module, i.e. execute the whole app. A bare __main__ stands in
+    while workers may start; worker functions must live in importable
+    modules.
+    """
+    with _MAIN_LOCK:
+        main = sys.modules.get("__main__")
+        sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            yield
+        finally:
+            sys.modules["__main__"] = main
+
+
+def make_job_id(key):
+    """Id of the job for a work key (see JobRunner.submit)."""
+    return content_key("job", *key)[:16]
+
+
+def concat_frames(parts):
+    """Default combine step: chunk DataFrames stacked in chunk order."""
+    return pd.concat(parts, ignore_index=True)
+
+
+class Job:
+    """One chunked computation; read its state from any thread."""
+
+    def __init__(self, job_id, label, n_chunks, combine):
+        self.id = job_id
+        self.label = label
+        self.total = n_chunks
+        self.combine = combine
+        self.status = QUEUED
+        self.error = None
+        self.started = time.time()
+        self.finished = None
+        self._parts = [None] * n_chunks
+        self._done = np.zeros(n_chunks, dtype=bool)
+        self._futures = []
+        self._result = None
+        # Sessions watching the job (see JobRunner.release)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return int(self._done.sum())
+
+    @property
+    def progress(self):
+        return self.done / self.total if self.total else 1.0
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    @property
+    def elapsed_s(self):
+        return (self.finished or time.time()) - self.started
+
+    def result(self):
+        """Combined result once the job is done, else None."""
+        return self._result if self.status == DONE else None
+
+    def partial_result(self):
+        """Combined result of the chunks finished so far (None before the first)."""
+        with self._lock:
+            if self.status == DONE:
+                return self._result
+            parts = [part for part, done in zip(self._parts, self._done) if done]
+        return self.combine(parts) if parts else None
+
+    def cancel(self):
+        """Drop chunks not started yet; running chunks finish and are discarded."""
+        with self._lock:
+            if not self.active:
+                return
+            self.status = CANCELLED
+            self.finished = time.time()
+            futures = list(self._futures)
+        for future in futures:
+            future.cancel()
+
+    def summary(self):
+        return {
+            "job": self.id,
+            "label": self.label,
+            "status": self.status,
+            "progress": self.progress,
+            "chunks": f"{self.done}/{self.total}",
+            "elapsed_s": self.elapsed_s,
+            "error": self.error or "",
+        }
+
+
+class JobRunner:
+    """Process pool plus registry of jobs, shared by all sessions of a server."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, jobs_dir=None):
+        self.workers = workers
+        self.jobs_dir = jobs_dir or JOBS_DIR
+        self._pool = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _executor(self, reset=False):
+        if reset and self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=POOL_CONTEXT)
+        return self._pool
+
+    def _path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.pkl")
+
+    def _private_dir(self):
+        """Create jobs_dir (mode 0o700) and check that only this user can write to it."""
+        try:
+            os.makedirs(self.jobs_dir, mode=0o700, exist_ok=True)
+            info = os.lstat(self.jobs_dir)
+        except OSError:
+            return False
+        if not stat.S_ISDIR(info.st_mode):
+            return False
+        if hasattr(os, "getuid") and (info.st_uid != os.getuid() or info.st_mode & 0o022):
+            return False
+        return True
+
+    def _load(self, job_id):
+        """Finished result from the shared cache or disk, else None."""
+        sentinel = object()
+        result = SHARED_CACHE.get(("job", job_id), sentinel)
+        if result is not sentinel:
+            return result
+        # Unpickling runs code, so a file anyone else could have planted is never read
+        if not self._private_dir():
+            return None
+        try:
+            with open(self._path(job_id), "rb") as f:
+                result = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        return SHARED_CACHE.put(("job", job_id), result)
+
+    def _store(self, job_id, result):
+        SHARED_CACHE.put(("job", job_id), result)
+        if not self._private_dir():
+            return
+        path = self._path(job_id)
+        # Unique temporary name, so two processes storing the same job do not share a file
+        with tempfile.NamedTemporaryFile(dir=self.jobs_dir, suffix=".tmp", delete=False) as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f.name, path)
+
+    def submit(self, key, label, fn, chunk_args, combine=concat_frames, subscriber=None):
+        """Run fn(*args) for every args tuple in chunk_args and combine the results in order.
+
+        key identifies the work (a tuple of scalars, like the cache keys);
+        the same key returns the job already running or finished instead
+        of starting another. subscriber (e.g. a session id) is recorded as
+        watching the job. fn must be a module-level function so worker
+        processes can import it.
+        """
+        job_id = make_job_id(key)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in (CANCELLED, FAILED):
+                job = Job(job_id, label, len(chunk_args), combine)
+                self._jobs[job_id] = job
+                self._prune()
+                new = True
+            else:
+                new = False
+            if subscriber is not None:
+                with job._lock:
+                    job._subscribers.add(subscriber)
+        if not new:
+            return job
+
+        stored = self._load(job_id)
+        with job._lock:
+            if stored is not None and job.status == QUEUED:
+                job._result = stored
+                job._done[:] = True
+                job.status = DONE
+                job.finished = job.started
+            if job.status != QUEUED:
+                return job
+            job.status = RUNNING
+
+        with starting_workers():
+            try:
+                futures = [self._executor().submit(fn, *args) for args in chunk_args]
+            except BrokenProcessPool:
+                # A worker died earlier (e.g. out of memory); start a fresh pool
+                futures = [self._executor(reset=True).submit(fn, *args) for args in chunk_args]
+        with job._lock:
+            job._futures = futures
+            cancelled = not job.active
+        if cancelled:
+            # Cancelled while the chunks were being submitted
+            for future in futures:
+                future.cancel()
+        for index, future in enumerate(futures):
+            future.add_done_callback(lambda future, index=index: self._chunk_done(job, index, future))
+        return job
+
+    def _fail(self, job, error):
+        with job._lock:
+            if not job.active:
+                return False
+            job.status = FAILED
+            job.error = f"{type(error).__name__}: {error}"
+            job.finished = time.time()
+        return True
+
+    def _chunk_done(self, job, index, future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            if self._fail(job, error):
+                for other in job._futures:
+                    other.cancel()
+            return
+        with job._lock:
+            if not job.active:
+                return
+            job._parts[index] = future.result()
+            job._done[index] = True
+            if not job._done.all():
+                return
+            # Every chunk is in, so _parts no longer changes
+            parts = list(job._parts)
+
+        try:
+            result = job.combine(parts)
+            self._store(job.id, result)
+        except Exception as e:
+            self._fail(job, e)
+            return
+        with job._lock:
+            if not job.active:
+                return
+            job._result = result
+            job.status = DONE
+            job._parts = None
+            job.finished = time.time()
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if not job.active]
+        for job in sorted(finished, key=lambda job: job.started)[:-MAX_FINISHED_JOBS]:
+            del self._jobs[job.id]
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a job for every session watching it."""
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+
+    def release(self, job_id, subscriber):
+        """subscriber stops watching a job; the job is cancelled once nobody watches it.
+
+        Returns whether the job was cancelled.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return False
+        with job._lock:
+            job._subscribers.discard(subscriber)
+            if job._subscribers or not job.active:
+                return False
+        job.cancel()
+        return True
+
+    def summary(self, job_ids=None):
+        """One row per job (optionally only job_ids), newest first."""
+        jobs = [self._jobs[j] for j in job_ids if j in self._jobs] if job_ids is not None else list(self._jobs.values())
+        rows = [job.summary() for job in sorted(jobs, key=lambda job: job.started, reverse=True)]
+        return pd.DataFrame(rows, columns=["job", "label", "status", "progress", "chunks", "elapsed_s", "error"])
+
+
+JOBS = JobRunner(int(os.environ.get("HELIXIS_JOB_WORKERS", DEFAULT_WORKERS)))
@@ -0,0 +1,256 @@
+import bisect
+import functools
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+# -------------------------------------------------
+# In-process metrics
+# -------------------------------------------------
+# Counters, gauges and fixed-bucket histograms in one registry per server
+# process, exported as Prometheus text or JSON. Recording is a dict lookup
+# and an add under a lock, so instrumentation stays on permanently; values
+# that already live elsewhere (cache statistics, session counts) are read
+# through callbacks only when a snapshot is taken.
+
+METRICS_FILE = os.environ.get("HELIXIS_METRICS_FILE", os.path.join(tempfile.gettempdir(), "helixis_metrics.prom"))
+# Minimum seconds between two snapshot files written from app reruns
+SNAPSHOT_INTERVAL_S = 15.0
+
+LATENCY_BUCKETS_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS_BYTES = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=(), fn=None):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        # fn() returns the value, or a dict of label tuple -> value, at snapshot time
+        self.fn = fn
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def values(self):
+        """{label dict as tuple of pairs: value} of every labelled series."""
+        if self.fn is not None:
+            value = self.fn()
+            values = value if isinstance(value, dict) else {(): value}
+        else:
+            with self._lock:
+                values = {key: self._copy(value) for key, value in self._values.items()}
+        return {tuple(zip(self.labelnames, key)): value for key, value in values.items()}
+
+    def _copy(self, value):
+        return value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with a running sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS_S):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the seconds spent in its block."""
+        return _Timer(self, labels)
+
+    def _copy(self, value):
+        counts, total, count = value
+        cumulative, running = [], 0
+        for n in counts:
+            running += n
+            cumulative.append(running)
+        return {
+            "buckets": dict(zip(self.buckets + (math.inf,), cumulative)),
+            "sum": total,
+            "count": count,
+        }
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._last_snapshot = 0.0
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric '{name}' is already registered as a {metric.kind}.")
+            return metric
+
+    def counter(self, name, help_text, labelnames=(), fn=None):
+        return self._get_or_create(Counter, name, help_text, labelnames, fn=fn)
+
+    def gauge(self, name, help_text, labelnames=(), fn=None):
+        return self._get_or_create(Gauge, name, help_text, labelnames, fn=fn)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS_S):
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def to_dict(self):
+        """JSON-ready snapshot: {name: {type, help, series: [{labels, value}]}}."""
+        snapshot = {"timestamp": time.time(), "metrics": {}}
+        for metric in self.metrics():
+            series = []
+            for labels, value in metric.values().items():
+                if metric.kind == "histogram":
+                    value = {**value, "buckets": {_format_value(le): n for le, n in value["buckets"].items()}}
+                series.append({"labels": dict(labels), "value": value})
+            snapshot["metrics"][metric.name] = {"type": metric.kind, "help": metric.help, "series": series}
+        return snapshot
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, value in metric.values().items():
+                labels = dict(labels)
+                if metric.kind != "histogram":
+                    lines.append(f"{metric.name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                for le, n in value["buckets"].items():
+                    lines.append(f"{metric.name}_bucket{_format_labels({**labels, 'le': _format_value(le)})} {n}")
+                lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+                lines.append(f"{metric.name}_count{_format_labels(labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path=None):
+        """Write the registry to path (JSON for a .json path, else Prometheus text); returns the path."""
+        path = path or METRICS_FILE
+        if path.endswith(".json"):
+            text = json.dumps(self.to_dict(), indent=1)
+        else:
+            text = self.to_prometheus()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Replaced atomically so a scraper never reads half a file; the temp
+        # name is unique so concurrent writers do not share it
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False
+        ) as f:
+            f.write(text)
+        # Temp files are owner-only; keep the snapshot readable by scrapers
+        os.chmod(f.name, 0o644)
+        os.replace(f.name, path)
+        self._last_snapshot = time.time()
+        return path
+
+    def maybe_write_snapshot(self, path=None, interval_s=SNAPSHOT_INTERVAL_S):
+        """write_snapshot at most once per interval_s; returns whether it wrote."""
+        if time.time() - self._last_snapshot < interval_s:
+            return False
+        try:
+            self.write_snapshot(path)
+        except OSError:
+            return False
+        return True
+
+
+REGISTRY = MetricsRegistry()
+
+
+def timed(name, help_text, registry=REGISTRY):
+    """Decorator recording call count and latency of a function in a histogram."""
+    histogram = registry.histogram(name, help_text)
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+# -------------------------------------------------
+# App-level metrics
+# -------------------------------------------------
+
+RERUN_SECONDS = REGISTRY.histogram(
+    "solar_app_rerun_seconds", "Duration of whole Streamlit script runs", labelnames=("mode",)
+)
+UPLOAD_BYTES = REGISTRY.histogram(
+    "solar_upload_bytes", "Size of uploaded files", labelnames=("kind",), buckets=SIZE_BUCKETS_BYTES
+)
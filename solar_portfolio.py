@@ -0,0 +1,160 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from solar_shading import UNIT_APERTURES
+
+# -------------------------------------------------
+# Portfolio allocation of a unit batch over many sites
+# -------------------------------------------------
+# Each site has a specific yield (system kWh per m² of mirror per year), a
+# price and an optional annual demand cap above which heat is not valued,
+# so its value is concave in mirror area. The marginal value of one more
+# unit of each type is precomputed for every site as a (sites, types)
+# array; a greedy pass then places one unit at a time from a max-heap,
+# recomputing only the entries of the site that just changed.
+
+OBJECTIVES = {
+    "Maximize total annual value": "value",
+    "Minimize portfolio payback": "payback",
+}
+
+def parse_sites_csv(csv_file, eta_opt, thermal_loss_frac, default_price, default_installation,
+                    default_demand_kwh=np.inf):
+    """Read prospective sites from a CSV.
+
+    Needs either a specific_kwh_m2 column (system kWh per m² of mirror and
+    year) or a dni_kwh_m2 column (annual DNI, turned into specific yield
+    with eta_opt and the loop loss), e.g. a regional screening ranking.
+    Optional columns: site, price [€/kWh], installation [€], demand_kwh
+    (annual cap on valued heat). Missing values take the defaults.
+    """
+    df = pd.read_csv(csv_file)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    if "specific_kwh_m2" in df:
+        specific = pd.to_numeric(df["specific_kwh_m2"], errors="coerce")
+    elif "dni_kwh_m2" in df:
+        specific = pd.to_numeric(df["dni_kwh_m2"], errors="coerce") * eta_opt * (1 - thermal_loss_frac)
+    else:
+        raise ValueError("Sites CSV needs a specific_kwh_m2 or a dni_kwh_m2 column.")
+
+    def optional(column, default):
+        if column not in df:
+            return np.full(len(df), default, dtype=float)
+        return pd.to_numeric(df[column], errors="coerce").fillna(default).to_numpy(dtype=float)
+
+    sites = pd.DataFrame({
+        "site": df["site"].astype(str) if "site" in df else [f"Site {i + 1}" for i in range(len(df))],
+        "specific_kwh_m2": specific.to_numpy(dtype=float),
+        "price": optional("price", default_price),
+        "installation": optional("installation", default_installation),
+        "demand_kwh": optional("demand_kwh", default_demand_kwh),
+    })
+    sites = sites[sites["specific_kwh_m2"] > 0].reset_index(drop=True)
+    if sites.empty:
+        raise ValueError("Sites CSV holds no site with a positive yield.")
+    return sites
+
+
+def site_value(area_m2, specific_kwh_m2, price, demand_kwh):
+    """Annual value of mirror area at sites; all inputs broadcast."""
+    return np.minimum(area_m2 * specific_kwh_m2, demand_kwh) * price
+
+
+def marginal_values(area_m2, specific_kwh_m2, price, demand_kwh, apertures_m2):
+    """Value of one more unit of each type at each site, shape (sites, types)."""
+    area = np.asarray(area_m2, dtype=float)[:, None]
+    args = (np.asarray(specific_kwh_m2)[:, None], np.asarray(price)[:, None], np.asarray(demand_kwh)[:, None])
+    return site_value(area + np.asarray(apertures_m2)[None, :], *args) - site_value(area, *args)
+
+
+def allocate_units(sites, inventory, unit_costs, objective="value"):
+    """Greedy allocation of a unit batch over sites.
+
+    inventory and unit_costs map unit type ("12 m²", ...) to a count and a
+    price per unit. With objective="value" units go where they add the
+    most annual value until none adds any; with "payback" a unit is only
+    placed while it shortens the portfolio payback, so units may be left
+    over. A site's installation cost is charged with its first unit.
+
+    Returns (allocation, totals): one row per site with units per type,
+    area, energy, value, cost and payback, and a dict of portfolio totals.
+    """
+    types = list(UNIT_APERTURES)
+    apertures = np.array([UNIT_APERTURES[t] for t in types])
+    left = np.array([int(inventory.get(t, 0)) for t in types])
+    cost = np.array([float(unit_costs.get(t, 0.0)) for t in types])
+    specific = sites["specific_kwh_m2"].to_numpy(dtype=float)
+    price = sites["price"].to_numpy(dtype=float)
+    demand = sites["demand_kwh"].to_numpy(dtype=float)
+    installation = sites["installation"].to_numpy(dtype=float)
+
+    n_sites = len(sites)
+    counts = np.zeros((n_sites, len(types)), dtype=int)
+    area = np.zeros(n_sites)
+    version = np.zeros(n_sites, dtype=int)
+    total_value = total_cost = 0.0
+
+    def scores(gain, site_cost):
+        if objective == "payback":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return np.where(site_cost > 0, gain / site_cost, np.inf)
+        return gain
+
+    gains = marginal_values(area, specific, price, demand, apertures)
+    costs = cost[None, :] + installation[:, None]
+    initial = scores(gains, costs)
+    heap = [(-initial[s, t], s, t, 0) for s in range(n_sites) for t in range(len(types)) if left[t] > 0]
+    heapq.heapify(heap)
+
+    while heap and left.any():
+        neg_score, s, t, entry_version = heapq.heappop(heap)
+        if entry_version != version[s] or left[t] == 0:
+            continue
+        gain = gains[s, t]
+        unit_cost = cost[t] + (installation[s] if area[s] == 0 else 0.0)
+        if gain <= 0:
+            break
+        if objective == "payback" and total_value > 0 and gain * total_cost < unit_cost * total_value:
+            # Best remaining ratio no longer beats the portfolio's own
+            break
+
+        counts[s, t] += 1
+        left[t] -= 1
+        area[s] += apertures[t]
+        total_value += gain
+        total_cost += unit_cost
+
+        # Only this site's marginal values changed
+        version[s] += 1
+        gains[s] = marginal_values(area[s:s + 1], specific[s:s + 1], price[s:s + 1], demand[s:s + 1], apertures)[0]
+        site_scores = scores(gains[s], cost)
+        for u in range(len(types)):
+            if left[u] > 0:
+                heapq.heappush(heap, (-site_scores[u], s, u, version[s]))
+
+    annual_kwh = np.minimum(area * specific, demand)
+    value = annual_kwh * price
+    site_cost = counts @ cost + np.where(area > 0, installation, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback = np.where(value > 0, site_cost / value, np.inf)
+    allocation = pd.DataFrame({"site": sites["site"]})
+    for i, t in enumerate(types):
+        allocation[f"n{t.split()[0]}"] = counts[:, i]
+    allocation["mirror_area"] = area
+    allocation["annual_kwh"] = annual_kwh
+    allocation["value"] = value
+    allocation["system_cost"] = site_cost
+    allocation["payback_years"] = payback
+
+    totals = {
+        "sites_used": int((area > 0).sum()),
+        "units_used": {t: int(counts[:, i].sum()) for i, t in enumerate(types)},
+        "units_left": {t: int(left[i]) for i, t in enumerate(types)},
+        "annual_kwh": float(annual_kwh.sum()),
+        "value": float(value.sum()),
+        "system_cost": float(site_cost.sum()),
+        "payback_years": float(site_cost.sum() / value.sum()) if value.sum() > 0 else float("inf"),
+    }
+    return allocation, totals
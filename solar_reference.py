@@ -0,0 +1,155 @@
+import math
+
+# -------------------------------------------------
+# Frozen reference implementations
+# -------------------------------------------------
+# Plain-Python, one-value-at-a-time versions of the figures the app has
+# been quoting: monthly irradiation from the workbook Sum row, thermal
+# output, the efficiency curve and the summary economics. They are
+# deliberately slow and must not change: solar_equivalence.py checks every
+# vectorized, cached or batched engine against them. Constants are copied
+# here rather than imported so that editing solar_core cannot move the
+# reference along with the code under test.
+#
+# Profiles are lists: hours[h][m] in Wh/m² (24 rows x 12 months) and
+# sum_daily[m] in Wh/m² per day, months in calendar order.
+
+REF_DAYS_IN_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+REF_APERTURE_12 = 12.35
+REF_APERTURE_24 = 24.7
+REF_APERTURE_36 = 37.05
+REF_DESIGN_DNI_W_M2 = 1000.0
+REF_MIN_DNI_W_M2 = 1.0
+# Horizon of the lifecycle cost in the summary report
+REF_LIFETIME_YEARS = 20
+
+
+def ref_energy_from_profiles(sum_daily):
+    """Monthly kWh/m² (list of 12) and the annual total."""
+    monthly = [sum_daily[m] / 1000.0 * REF_DAYS_IN_MONTH[m] for m in range(12)]
+    annual = 0.0
+    for value in monthly:
+        annual += value
+    return monthly, annual
+
+
+def ref_collector_efficiency(dni, eta0, a1, a2, t_operating_c, t_ambient_c):
+    """Efficiency at one irradiance, clipped to [0, eta0]; 0 below REF_MIN_DNI_W_M2."""
+    if dni < REF_MIN_DNI_W_M2:
+        return 0.0
+    delta_t = t_operating_c - t_ambient_c
+    eta = eta0 - (a1 * delta_t + a2 * delta_t ** 2) / dni
+    return min(max(eta, 0.0), eta0)
+
+
+def ref_thermal_outputs(hours, monthly_kwh_m2, annual_kwh_m2, mirror_area, eta, thermal_loss):
+    """Thermal output of one system, the 8 values of compute_thermal_outputs as lists.
+
+    eta is a constant or a 24x12 list of hourly efficiencies; with hourly
+    efficiencies days and months use the DNI-weighted efficiency of the
+    month and the annual total is the sum of the months.
+    """
+    hourly_eta = isinstance(eta, (list, tuple))
+    loop = 1 - thermal_loss
+
+    hourly_direct = [
+        [hours[h][m] / 1000.0 * mirror_area * (eta[h][m] if hourly_eta else eta) for m in range(12)]
+        for h in range(24)
+    ]
+    hourly_system = [[value * loop for value in row] for row in hourly_direct]
+
+    month_eta = []
+    for m in range(12):
+        if not hourly_eta:
+            month_eta.append(eta)
+            continue
+        dni_day = 0.0
+        weighted = 0.0
+        for h in range(24):
+            dni_day += hours[h][m]
+            weighted += hours[h][m] * eta[h][m]
+        month_eta.append(weighted / dni_day if dni_day > 0 else 0.0)
+
+    daily_direct = []
+    for m in range(12):
+        dni_day = 0.0
+        for h in range(24):
+            dni_day += hours[h][m]
+        daily_direct.append(dni_day / 1000.0 * mirror_area * month_eta[m])
+    daily_system = [value * loop for value in daily_direct]
+
+    monthly_direct = [monthly_kwh_m2[m] * mirror_area * month_eta[m] for m in range(12)]
+    monthly_system = [value * loop for value in monthly_direct]
+
+    if hourly_eta:
+        annual_direct = 0.0
+        for value in monthly_direct:
+            annual_direct += value
+    else:
+        annual_direct = annual_kwh_m2 * mirror_area * eta
+    annual_system = annual_direct * loop
+
+    return (
+        annual_direct,
+        annual_system,
+        monthly_direct,
+        monthly_system,
+        hourly_direct,
+        hourly_system,
+        daily_direct,
+        daily_system,
+    )
+
+
+def ref_units_for_area(mirror_area):
+    """Units quoted for a mirror area: the fewest of a single model, as the app's ceil of area / aperture."""
+    counts = [
+        math.ceil(mirror_area / REF_APERTURE_12),
+        math.ceil(mirror_area / REF_APERTURE_24),
+        math.ceil(mirror_area / REF_APERTURE_36),
+    ]
+    return min(counts)
+
+
+def ref_installed_area(n12, n24, n36):
+    return n12 * REF_APERTURE_12 + n24 * REF_APERTURE_24 + n36 * REF_APERTURE_36
+
+
+def ref_economics(annual_system_kwh, price_per_kwh, units, unit_cost, installation_cost):
+    """Summary economics: system cost, annual value, payback and lifecycle cost per kWh.
+
+    Payback is infinite without any value; the lifecycle cost is 0 without
+    any production, as in the summary report.
+    """
+    system_cost = units * unit_cost + installation_cost
+    annual_value = annual_system_kwh * price_per_kwh
+    payback_years = system_cost / annual_value if annual_value > 0 else float("inf")
+    lifetime_kwh = annual_system_kwh * REF_LIFETIME_YEARS
+    lifecycle_cost = system_cost / lifetime_kwh if lifetime_kwh > 0 else 0
+    return {
+        "system_cost": system_cost,
+        "annual_value": annual_value,
+        "payback_years": payback_years,
+        "lifecycle_cost_per_kwh": lifecycle_cost,
+    }
+
+
+def ref_scenario(sum_daily, mirror_area=None, n12=0, n24=0, n36=0, eta_opt=0.75, thermal_loss=0.0,
+                 price_per_kwh=0.10, unit_cost=15000.0, installation_cost=20000.0):
+    """Quote for one system sized by mirror area or by unit counts, with a constant efficiency."""
+    monthly, annual = ref_energy_from_profiles(sum_daily)
+    if mirror_area is None:
+        mirror_area = ref_installed_area(n12, n24, n36)
+        units = n12 + n24 + n36
+    else:
+        units = ref_units_for_area(mirror_area)
+    factor = mirror_area * eta_opt * (1 - thermal_loss)
+    annual_kwh = annual * factor
+    return {
+        "mirror_area": mirror_area,
+        "units": units,
+        "annual_kwh": annual_kwh,
+        "peak_kw_at_1000": mirror_area * REF_DESIGN_DNI_W_M2 / 1000.0 * eta_opt,
+        "monthly_kwh": [value * factor for value in monthly],
+        **ref_economics(annual_kwh, price_per_kwh, units, unit_cost, installation_cost),
+    }
@@ -0,0 +1,279 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from solar_cache import content_key
+from solar_jobs import POOL_CONTEXT, starting_workers
+
+try:
+    import rasterio
+    from rasterio.windows import Window
+except ImportError:  # GeoTIFF input is optional
+    rasterio = None
+
+try:
+    import xarray as xr
+except ImportError:  # NetCDF input is optional
+    xr = None
+
+# -------------------------------------------------
+# Regional screening on gridded DNI
+# -------------------------------------------------
+# A raster of long-term DNI per grid cell is read tile by tile (memmap for
+# .npy, windowed reads for GeoTIFF, lazy slices for NetCDF). Each tile is
+# evaluated with the scalar-efficiency annual energy and payback formulas
+# in one vectorized block, tiles are spread over worker processes and the
+# results are written into .npy memmaps, so millions of cells never sit
+# in memory at once.
+
+REGIONAL_DIR = os.environ.get("HELIXIS_REGIONAL_DIR", os.path.join(tempfile.gettempdir(), "helixis_regional"))
+# Only rasters under this directory can be opened by server path; unset
+# disables server paths so users can only screen what they upload
+RASTER_DIR = os.environ.get("HELIXIS_RASTER_DIR", "")
+TILE_SIZE = 512
+DEFAULT_TOP_N = 20
+# Longest side of the map preview in pixels
+PREVIEW_PIXELS = 800
+
+RASTER_UNITS = {
+    "kWh/m² per year": 1.0,
+    "kWh/m² per day": 365.0,
+}
+
+
+def raster_kind(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        return "npy"
+    if extension in (".tif", ".tiff"):
+        return "geotiff"
+    if extension in (".nc", ".nc4"):
+        return "netcdf"
+    raise ValueError(f"Unsupported raster format '{extension}': use .npy, GeoTIFF or NetCDF.")
+
+
+def server_raster_path(name):
+    """Real path of a raster under RASTER_DIR; ValueError for anything outside it."""
+    if not RASTER_DIR:
+        raise ValueError("Server raster paths are disabled (set HELIXIS_RASTER_DIR).")
+    root = os.path.realpath(RASTER_DIR)
+    path = os.path.realpath(os.path.join(root, name.strip()))
+    if os.path.commonpath([root, path]) != root or path == root:
+        raise ValueError(f"Raster paths must point to a file under {RASTER_DIR}.")
+    raster_kind(path)
+    if not os.path.isfile(path):
+        raise ValueError(f"No raster file '{name.strip()}' under {RASTER_DIR}.")
+    return path
+
+
+def _netcdf_variable(ds, variable):
+    return ds[variable or next(
+        (v for v in ("dni", "DNI", "DNI_kWh_m2") if v in ds.data_vars), list(ds.data_vars)[0]
+    )]
+
+
+def describe_raster(path, variable=None):
+    """Shape and cell-centre coordinates (lat/lon vectors when known) of a raster."""
+    kind = raster_kind(path)
+    latitudes = longitudes = None
+    if kind == "npy":
+        shape = np.load(path, mmap_mode="r").shape
+    elif kind == "geotiff":
+        if rasterio is None:
+            raise ValueError("Reading GeoTIFF rasters needs the optional rasterio package.")
+        with rasterio.open(path) as src:
+            shape = (src.height, src.width)
+            transform = src.transform
+        longitudes = transform.c + transform.a * (np.arange(shape[1]) + 0.5)
+        latitudes = transform.f + transform.e * (np.arange(shape[0]) + 0.5)
+    else:
+        if xr is None:
+            raise ValueError("Reading NetCDF rasters needs the optional xarray package.")
+        with xr.open_dataset(path) as ds:
+            dni = _netcdf_variable(ds, variable)
+            shape = dni.shape[-2:]
+            for name in dni.dims[-2:]:
+                if name.lower().startswith("lat"):
+                    latitudes = ds[name].values
+                elif name.lower().startswith("lon"):
+                    longitudes = ds[name].values
+    if len(shape) != 2:
+        raise ValueError(f"Raster must be 2-D (rows x columns); found shape {shape}.")
+    return {"path": path, "kind": kind, "variable": variable, "shape": tuple(int(n) for n in shape),
+            "latitudes": latitudes, "longitudes": longitudes}
+
+
+def read_tile(raster, rows, cols):
+    """Read one tile as float32; rows and cols are slices."""
+    kind, path = raster["kind"], raster["path"]
+    if kind == "npy":
+        return np.asarray(np.load(path, mmap_mode="r")[rows, cols], dtype=np.float32)
+    if kind == "geotiff":
+        window = Window(cols.start, rows.start, cols.stop - cols.start, rows.stop - rows.start)
+        with rasterio.open(path) as src:
+            tile = src.read(1, window=window, masked=True)
+        return np.ma.filled(tile.astype(np.float32), np.nan)
+    with xr.open_dataset(path) as ds:
+        dni = _netcdf_variable(ds, raster["variable"])
+        return np.asarray(dni[..., rows, cols].values, dtype=np.float32).reshape(
+            rows.stop - rows.start, cols.stop - cols.start
+        )
+
+
+def tiles(shape, tile_size=TILE_SIZE):
+    """(row slice, column slice) of every tile covering shape."""
+    return [
+        (slice(r, min(r + tile_size, shape[0])), slice(c, min(c + tile_size, shape[1])))
+        for r in range(0, shape[0], tile_size)
+        for c in range(0, shape[1], tile_size)
+    ]
+
+
+def cell_economics(annual_dni_kwh_m2, mirror_area_m2, eta_opt, thermal_loss_frac, system_cost, price_per_kwh):
+    """Annual system kWh and payback years for an array of annual DNI values.
+
+    Same scalar-efficiency formula as compute_thermal_outputs; cells with
+    missing or negative DNI give NaN.
+    """
+    dni = np.asarray(annual_dni_kwh_m2, dtype=np.float32)
+    dni = np.where(dni >= 0, dni, np.float32(np.nan))
+    annual_kwh = dni * np.float32(mirror_area_m2 * eta_opt * (1 - thermal_loss_frac))
+    value = annual_kwh * np.float32(price_per_kwh)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback = np.where(value > 0, np.float32(system_cost) / value, np.float32(np.inf))
+    payback[np.isnan(dni)] = np.nan
+    return annual_kwh, payback.astype(np.float32)
+
+
+def _screen_tile(raster, out_paths, rows, cols, unit_factor, economics, top_n):
+    dni = read_tile(raster, rows, cols) * np.float32(unit_factor)
+    annual_kwh, payback = cell_economics(dni, *economics)
+
+    # Each tile goes straight into the shared result files; only the
+    # candidates travel back to the caller
+    for path, values in zip(out_paths, (annual_kwh, payback)):
+        out = np.load(path, mmap_mode="r+")
+        out[rows, cols] = values
+        out.flush()
+        del out
+
+    # Tile-local top N by payback, merged by the caller
+    flat = np.where(np.isnan(payback), np.inf, payback).ravel()
+    n = min(top_n, flat.size)
+    best = np.argpartition(flat, n - 1)[:n] if n else np.array([], dtype=int)
+    best = best[np.isfinite(flat[best])]
+    best_rows, best_cols = np.unravel_index(best, payback.shape)
+    candidates = pd.DataFrame({
+        "row": best_rows + rows.start,
+        "col": best_cols + cols.start,
+        "dni_kwh_m2": dni.ravel()[best],
+        "annual_kwh": annual_kwh.ravel()[best],
+        "payback_years": payback.ravel()[best],
+    })
+    return candidates
+
+
+def screen_raster(raster, mirror_area_m2, eta_opt, thermal_loss_frac, system_cost, price_per_kwh,
+                  unit="kWh/m² per year", top_n=DEFAULT_TOP_N, workers=None, tile_size=TILE_SIZE,
+                  output_dir=None, progress=None):
+    """Yield and payback raster of a whole region plus a top-N site ranking.
+
+    Results go to two float32 .npy memmaps in output_dir. Tiles are spread
+    over a process pool of `workers` processes (default: every core);
+    each worker writes its tiles into the result memmaps itself, so only
+    the per-tile ranking candidates are sent back. progress(done, total)
+    is called as tiles finish.
+
+    Returns (yield_path, payback_path, ranking).
+    """
+    output_dir = output_dir or REGIONAL_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    # One pair of result files per raster and set of inputs
+    name = os.path.splitext(os.path.basename(raster["path"]))[0]
+    inputs = content_key(raster["path"], os.path.getmtime(raster["path"]), mirror_area_m2, eta_opt,
+                         thermal_loss_frac, system_cost, price_per_kwh, unit)
+    stem = os.path.join(output_dir, f"{name}_{inputs[:12]}")
+    yield_path, payback_path = stem + "_yield.npy", stem + "_payback.npy"
+    # Written under unique temp names and moved into place at the end, so
+    # sessions screening the same inputs at once, or readers still holding
+    # an earlier result, never see a truncated or half-written file
+    temp_paths = []
+    for _ in range(2):
+        fd, temp_path = tempfile.mkstemp(dir=output_dir, prefix=os.path.basename(stem) + ".", suffix=".tmp.npy")
+        os.close(fd)
+        temp_paths.append(temp_path)
+    try:
+        ranking = _screen_into(raster, temp_paths, mirror_area_m2, eta_opt, thermal_loss_frac, system_cost,
+                               price_per_kwh, unit, top_n, workers, tile_size, progress)
+    except BaseException:
+        for temp_path in temp_paths:
+            os.remove(temp_path)
+        raise
+    os.replace(temp_paths[0], yield_path)
+    os.replace(temp_paths[1], payback_path)
+    return yield_path, payback_path, ranking
+
+
+def _screen_into(raster, out_paths, mirror_area_m2, eta_opt, thermal_loss_frac, system_cost, price_per_kwh,
+                 unit, top_n, workers, tile_size, progress):
+    """Fill the yield and payback .npy files of screen_raster; returns the ranking."""
+    # Headers and full size written once; the tiles then fill them in place
+    for path in out_paths:
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=raster["shape"])
+        out.flush()
+        del out
+
+    economics = (mirror_area_m2, eta_opt, thermal_loss_frac, system_cost, price_per_kwh)
+    jobs = tiles(raster["shape"], tile_size)
+    args = [(raster, out_paths, rows, cols, RASTER_UNITS[unit], economics, top_n) for rows, cols in jobs]
+    candidates = []
+
+    def collect(best, done):
+        candidates.append(best)
+        if progress is not None:
+            progress(done, len(jobs))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        for done, a in enumerate(args, 1):
+            collect(_screen_tile(*a), done)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=POOL_CONTEXT) as pool:
+            # map submits every tile up front, so all workers start in here
+            with starting_workers():
+                results = pool.map(_screen_tile, *zip(*args))
+            for done, best in enumerate(results, 1):
+                collect(best, done)
+
+    ranking = pd.concat(candidates, ignore_index=True).nsmallest(top_n, "payback_years").reset_index(drop=True)
+    if raster["latitudes"] is not None:
+        ranking.insert(2, "latitude", np.asarray(raster["latitudes"])[ranking["row"]])
+    if raster["longitudes"] is not None:
+        ranking.insert(3, "longitude", np.asarray(raster["longitudes"])[ranking["col"]])
+    ranking.index = ranking.index + 1
+    return ranking
+
+
+def preview(path, max_pixels=PREVIEW_PIXELS):
+    """Strided view of a result raster small enough to plot."""
+    values = np.load(path, mmap_mode="r")
+    step = max(1, int(np.ceil(max(values.shape) / max_pixels)))
+    return np.array(values[::step, ::step]), step
+
+
+def raster_summary(path):
+    """Finite-cell statistics of a result raster, computed tile by tile."""
+    values = np.load(path, mmap_mode="r")
+    count, total = 0, 0.0
+    low, high = np.inf, -np.inf
+    for rows, cols in tiles(values.shape, 4 * TILE_SIZE):
+        block = np.asarray(values[rows, cols], dtype=float)
+        block = block[np.isfinite(block)]
+        if block.size:
+            count += block.size
+            total += block.sum()
+            low, high = min(low, block.min()), max(high, block.max())
+    return {"cells": count, "mean": total / count if count else np.nan, "min": low, "max": high}
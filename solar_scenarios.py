@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+from solar_cache import SHARED_CACHE, content_key
+from solar_core import APERTURE_36, MONTHS, compute_energy_from_profiles
+from solar_sizing import installed_area
+
+# -------------------------------------------------
+# Batched scenario evaluation
+# -------------------------------------------------
+# A scenario is one system on one site profile: size, constant optical
+# efficiency, loop loss and flat-price economics, with the defaults of
+# the app's sidebar. With a scalar efficiency the monthly output is the
+# workbook's monthly kWh/m² times a per-scenario factor, so any number of
+# scenarios is one outer product.
+
+SCENARIO_DEFAULTS = {
+    "mirror_area": None,
+    "n12": 0,
+    "n24": 0,
+    "n36": 0,
+    "eta_opt": 0.75,
+    "thermal_loss": 0.0,
+    "price_per_kwh": 0.10,
+    "unit_cost": 15000.0,
+    "installation_cost": 20000.0,
+}
+
+UNIT_FIELDS = ("n12", "n24", "n36")
+# Efficiency and loss are fractions of the incoming energy
+FRACTION_FIELDS = ("eta_opt", "thermal_loss")
+
+# Saved scenarios of a session: one record per scenario, NaN mirror_area
+# when the unit counts size the system
+SCENARIO_DTYPE = np.dtype([("name", "U40")] + [
+    (field, "f8" if field not in UNIT_FIELDS else "i4") for field in SCENARIO_DEFAULTS
+])
+
+RESULT_COLUMNS = ["mirror_area", "units", "annual_kwh", "peak_kw_at_1000", "system_cost",
+                  "annual_value", "payback_years", "lifecycle_cost_per_kwh"]
+
+SWEEP_PARAMETERS = ["mirror_area", "n12", "n24", "n36", "eta_opt", "thermal_loss",
+                    "price_per_kwh", "unit_cost", "installation_cost"]
+
+
+def scenario_arrays(scenarios):
+    """Scenario dicts (or a DataFrame) as one float array per field, defaults filled in.
+
+    A scenario gives either mirror_area, sized like the app's mirror
+    surface mode (fewest units, i.e. 36 m² ones), or unit counts n12 / n24
+    / n36. Non-dict scenarios, unknown keys, non-numbers (booleans
+    included), negative or infinite values, fractional unit counts and
+    eta_opt / thermal_loss outside 0-1 raise ValueError.
+    A SCENARIO_DTYPE array is used as it is.
+    """
+    if isinstance(scenarios, np.ndarray) and scenarios.dtype.names:
+        return {field: scenarios[field].astype(float) for field in SCENARIO_DEFAULTS}
+    if isinstance(scenarios, pd.DataFrame):
+        scenarios = scenarios.to_dict("records")
+    scenarios = list(scenarios)
+    if not all(isinstance(scenario, dict) for scenario in scenarios):
+        raise ValueError("Every scenario must be an object of scenario fields.")
+    unknown = set().union(*scenarios) - set(SCENARIO_DEFAULTS) if scenarios else set()
+    if unknown:
+        raise ValueError(f"Unknown scenario fields: {', '.join(sorted(map(str, unknown)))}")
+
+    arrays = {}
+    for field, default in SCENARIO_DEFAULTS.items():
+        values = [s.get(field) for s in scenarios]
+        values = [default if v is None or v != v else v for v in values]
+        if any(isinstance(v, (bool, np.bool_)) for v in values):
+            raise ValueError(f"Scenario field '{field}' must be a number.")
+        try:
+            arrays[field] = np.array([np.nan if v is None else v for v in values], dtype=float)
+        except (TypeError, ValueError):
+            raise ValueError(f"Scenario field '{field}' must be a number.")
+        if (arrays[field] < 0).any():
+            raise ValueError(f"Scenario field '{field}' must not be negative.")
+        if np.isinf(arrays[field]).any():
+            raise ValueError(f"Scenario field '{field}' must be finite.")
+        if field in UNIT_FIELDS and (arrays[field] != np.floor(arrays[field])).any():
+            raise ValueError(f"Scenario field '{field}' must be a whole number of units.")
+        if field in FRACTION_FIELDS and (arrays[field] > 1).any():
+            raise ValueError(f"Scenario field '{field}' must be within 0-1.")
+    return arrays
+
+
+def evaluate_scenarios(sum_daily_wh, scenarios):
+    """Annual and monthly energy, cost, value and payback for many scenarios.
+
+    sum_daily_wh is the site's Sum row (see parse_hourly_profiles). Returns
+    (results, monthly_kwh): one row per scenario and a (scenarios, 12)
+    DataFrame of monthly system energy.
+    """
+    s = scenario_arrays(scenarios)
+    monthly_kwh_m2, annual_kwh_m2 = compute_energy_from_profiles(sum_daily_wh)
+
+    by_units = np.isnan(s["mirror_area"])
+    mirror_area = np.where(by_units, installed_area(s["n12"], s["n24"], s["n36"]), s["mirror_area"])
+    units = np.where(
+        by_units,
+        s["n12"] + s["n24"] + s["n36"],
+        np.ceil(np.round(np.nan_to_num(s["mirror_area"]) / APERTURE_36, 9)),
+    )
+
+    system_factor = mirror_area * s["eta_opt"] * (1 - s["thermal_loss"])
+    monthly_kwh = pd.DataFrame(np.outer(system_factor, monthly_kwh_m2.to_numpy()), columns=MONTHS)
+    annual_kwh = annual_kwh_m2 * system_factor
+    annual_value = annual_kwh * s["price_per_kwh"]
+    system_cost = units * s["unit_cost"] + s["installation_cost"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback = np.where(annual_value > 0, system_cost / annual_value, np.inf)
+        # Same 20-year horizon, and 0 without production, as the app's summary report
+        cost_per_kwh = np.where(annual_kwh > 0, system_cost / (annual_kwh * 20), 0.0)
+
+    results = pd.DataFrame({
+        "mirror_area": mirror_area,
+        "units": units.astype(int),
+        "annual_kwh": annual_kwh,
+        "peak_kw_at_1000": mirror_area * s["eta_opt"],
+        "system_cost": system_cost,
+        "annual_value": annual_value,
+        "payback_years": payback,
+        "lifecycle_cost_per_kwh": cost_per_kwh,
+    })
+    return results, monthly_kwh
+
+
+def sweep_scenarios(sum_daily_wh, base, parameter, values):
+    """evaluate_scenarios for one parameter of a base scenario over many values.
+
+    Unit counts only size the system when the base has no mirror_area.
+    """
+    if parameter not in SWEEP_PARAMETERS:
+        raise ValueError(f"Cannot sweep '{parameter}'; choose one of: {', '.join(SWEEP_PARAMETERS)}")
+    scenarios = [{**base, parameter: value} for value in values]
+    results, monthly_kwh = evaluate_scenarios(sum_daily_wh, scenarios)
+    results.insert(0, parameter, list(values))
+    return results, monthly_kwh
+
+
+# -------------------------------------------------
+# Saved scenario sets
+# -------------------------------------------------
+
+def save_scenario(saved, name, **fields):
+    """saved (a SCENARIO_DTYPE array, or None) plus one scenario; a scenario of the same name is replaced."""
+    values = scenario_arrays([fields])
+    row = np.zeros(1, dtype=SCENARIO_DTYPE)
+    row["name"] = name
+    for field in SCENARIO_DEFAULTS:
+        row[field] = values[field]
+    if saved is None:
+        return row
+    return np.concatenate([saved[saved["name"] != name], row])
+
+
+def drop_scenarios(saved, names):
+    return saved[~np.isin(saved["name"], list(names))]
+
+
+def evaluate_saved(sum_daily_wh, saved):
+    """evaluate_scenarios for saved scenarios, indexed by name.
+
+    Results are cached per profile and scenario record, so after a
+    scenario is added only the records not seen before are evaluated, in
+    one batch. Returns (results, monthly_kwh).
+    """
+    profile = content_key(np.asarray(sum_daily_wh, dtype=float).tobytes())
+    keys = [("saved_scenario", profile, record.tobytes()) for record in saved]
+    rows = [SHARED_CACHE.get(key) for key in keys]
+    missing = [i for i, row in enumerate(rows) if row is None]
+    if missing:
+        results, monthly_kwh = evaluate_scenarios(sum_daily_wh, saved[missing])
+        for j, i in enumerate(missing):
+            rows[i] = SHARED_CACHE.put(keys[i], (results.iloc[j], monthly_kwh.iloc[j]))
+    names = pd.Index(saved["name"], name="scenario")
+    results = pd.DataFrame([row[0] for row in rows], index=names, columns=RESULT_COLUMNS)
+    results["units"] = results["units"].astype(int)
+    monthly_kwh = pd.DataFrame([row[1] for row in rows], index=names, columns=MONTHS)
+    return results, monthly_kwh
+
+
+def scenario_deltas(results, baseline):
+    """Each scenario's results minus those of the baseline scenario."""
+    return results - results.loc[baseline]
@@ -0,0 +1,478 @@
+import argparse
+import io
+import json
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import numpy as np
+
+from solar_cache import SHARED_CACHE, content_key
+from solar_core import compute_energy_from_profiles, parse_hourly_profiles
+from solar_metrics import REGISTRY
+from solar_scenarios import evaluate_scenarios, scenario_arrays, sweep_scenarios
+from solar_timeseries import fill_gaps, profiles_from_series, read_dni_series
+
+# -------------------------------------------------
+# Local HTTP/JSON calculation service
+# -------------------------------------------------
+# Same profile parsing and scenario economics as the app, for CRM and
+# quoting tools, with nothing but the standard library. Requests are
+# handled on threads; the computation runs in a worker pool, and single
+# /scenario requests arriving within a few milliseconds of each other are
+# evaluated as one batch. Profiles live in the process-wide SHARED_CACHE.
+#
+#   POST /profiles?format=xlsx|csv   raw file body -> profile_id
+#   GET  /profiles/<profile_id>      monthly DNI of a stored profile
+#   POST /scenario                   {"profile_id", ...scenario fields}
+#   POST /scenarios                  {"profile_id", "scenarios": [...], "monthly": false}
+#   POST /sweep                      {"profile_id", "base", "parameter", "values"}
+#   GET  /metrics[?format=prometheus] latency and throughput per endpoint
+#   GET  /health
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 4
+BATCH_WINDOW_S = 0.005
+MAX_BATCH = 1024
+MAX_BODY_BYTES = 64 * 1024 * 1024
+MAX_SCENARIOS = 100_000
+LATENCY_SAMPLES = 2048
+REQUEST_TIMEOUT_S = 60
+# Pending connections the listening socket queues before refusing
+LISTEN_BACKLOG = 256
+
+
+class ServiceError(Exception):
+    """An error reported to the client with an HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _is_number(value):
+    # JSON true/false decode to bools, which are ints in Python
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _json_safe(value):
+    """Plain JSON types; infinities and NaN become null."""
+    if isinstance(value, dict):
+        return {str(k): _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _json_safe(value.tolist())
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(value) if np.isfinite(value) else None
+    return value
+
+
+def _records(df):
+    return [_json_safe(row) for row in df.to_dict("records")]
+
+
+# -------------------------------------------------
+# Latency / throughput statistics
+# -------------------------------------------------
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "solar_service_request_seconds", "Latency of calculation service requests", labelnames=("endpoint", "outcome")
+)
+SCENARIO_BATCH_SIZE = REGISTRY.histogram(
+    "solar_service_scenario_batch_size", "Scenarios evaluated per batch",
+    buckets=(1, 2, 5, 10, 50, 100, 500, 1000, 10000, 100000)
+)
+
+
+class ServiceStats:
+    """Recent latencies for /metrics; totals also go to the process metrics registry."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counts = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.latencies = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES))
+        self.batch_sizes = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, endpoint, seconds, ok):
+        REQUEST_SECONDS.observe(seconds, endpoint=endpoint, outcome="ok" if ok else "error")
+        with self.lock:
+            self.counts[endpoint] += 1
+            if not ok:
+                self.errors[endpoint] += 1
+            self.latencies[endpoint].append(seconds)
+
+    def record_batch(self, size):
+        SCENARIO_BATCH_SIZE.observe(size)
+        with self.lock:
+            self.batch_sizes.append(size)
+
+    def snapshot(self):
+        with self.lock:
+            uptime = time.time() - self.started
+            endpoints = {}
+            for endpoint, count in self.counts.items():
+                ms = np.array(self.latencies[endpoint]) * 1000.0
+                endpoints[endpoint] = {
+                    "requests": count,
+                    "errors": self.errors[endpoint],
+                    "requests_per_s": count / uptime if uptime > 0 else 0.0,
+                    "latency_ms_p50": float(np.percentile(ms, 50)),
+                    "latency_ms_p95": float(np.percentile(ms, 95)),
+                    "latency_ms_max": float(ms.max()),
+                }
+            batches = np.array(self.batch_sizes)
+            return {
+                "uptime_s": uptime,
+                "endpoints": endpoints,
+                "scenario_batches": {
+                    "batches": int(len(batches)),
+                    "mean_size": float(batches.mean()) if len(batches) else 0.0,
+                    "max_size": int(batches.max()) if len(batches) else 0,
+                },
+                "cache": SHARED_CACHE.stats(),
+            }
+
+
+# -------------------------------------------------
+# Request batching for single scenarios
+# -------------------------------------------------
+
+class _ScenarioBatcher:
+    """Collect single-scenario requests for BATCH_WINDOW_S and evaluate them together."""
+
+    def __init__(self, pool, stats, window_s=BATCH_WINDOW_S, max_batch=MAX_BATCH):
+        self.pool = pool
+        self.stats = stats
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self.pending = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, profile_id, sum_daily_wh, scenario):
+        future = Future()
+        self.pending.put((profile_id, sum_daily_wh, scenario, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self.pending.get()]
+            if batch[0] is None:
+                return
+            deadline = time.monotonic() + self.window_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.pending.put(None)
+                    break
+                batch.append(item)
+
+            by_profile = defaultdict(list)
+            for item in batch:
+                by_profile[item[0]].append(item)
+            for items in by_profile.values():
+                self.pool.submit(self._evaluate, items)
+
+    def _evaluate(self, items):
+        self.stats.record_batch(len(items))
+        try:
+            results, monthly = evaluate_scenarios(items[0][1], [item[2] for item in items])
+        except Exception as e:
+            for item in items:
+                item[3].set_exception(e)
+            return
+        for item, result, monthly_kwh in zip(items, _records(results), _records(monthly)):
+            item[3].set_result({"result": result, "monthly_kwh": monthly_kwh})
+
+    def close(self):
+        self.pending.put(None)
+
+
+# -------------------------------------------------
+# Handlers
+# -------------------------------------------------
+
+def parse_profile_bytes(data, file_format):
+    """Site profile (hour matrix, Sum row) from an uploaded workbook or DNI series CSV."""
+    if file_format == "xlsx":
+        return parse_hourly_profiles(io.BytesIO(data))
+    if file_format == "csv":
+        return profiles_from_series(fill_gaps(read_dni_series(io.BytesIO(data)))[0])
+    raise ServiceError(400, "format must be xlsx or csv")
+
+
+class CalculationService:
+    """Routing and computation, independent of the HTTP transport."""
+
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="solar-worker")
+        self.stats = ServiceStats()
+        self.batcher = _ScenarioBatcher(self.pool, self.stats)
+
+    def close(self):
+        self.batcher.close()
+        self.pool.shutdown(wait=False)
+
+    def _profile(self, profile_id):
+        profile = SHARED_CACHE.get(("profile", profile_id))
+        if profile is None:
+            raise ServiceError(404, f"Unknown or expired profile_id '{profile_id}'; upload the profile again.")
+        return profile
+
+    def _run(self, fn, *args):
+        return self.pool.submit(fn, *args).result(timeout=REQUEST_TIMEOUT_S)
+
+    def upload_profile(self, data, file_format):
+        profile_id = content_key(data)
+        hour_matrix_wh, sum_daily_wh = SHARED_CACHE.get_or_compute(
+            ("profile", profile_id),
+            lambda: self._run(parse_profile_bytes, data, file_format)
+        )
+        return self.profile_summary(profile_id)
+
+    def profile_summary(self, profile_id):
+        hour_matrix_wh, sum_daily_wh = self._profile(profile_id)
+        monthly_kwh_m2, annual_kwh_m2 = compute_energy_from_profiles(sum_daily_wh)
+        return _json_safe({
+            "profile_id": profile_id,
+            "annual_dni_kwh_m2": annual_kwh_m2,
+            "monthly_dni_kwh_m2": monthly_kwh_m2.to_dict(),
+            "peak_dni_w_m2": hour_matrix_wh.max().max(),
+        })
+
+    def scenario(self, body):
+        profile_id = body.pop("profile_id", None)
+        _, sum_daily_wh = self._profile(profile_id)
+        scenario_arrays([body])  # reject bad fields before they join a batch
+        return self.batcher.submit(profile_id, sum_daily_wh, body).result(timeout=REQUEST_TIMEOUT_S)
+
+    def scenarios(self, body):
+        _, sum_daily_wh = self._profile(body.get("profile_id"))
+        scenarios = body.get("scenarios")
+        if not isinstance(scenarios, list) or not scenarios:
+            raise ServiceError(400, "scenarios must be a non-empty list")
+        if len(scenarios) > MAX_SCENARIOS:
+            raise ServiceError(413, f"At most {MAX_SCENARIOS} scenarios per request")
+        results, monthly = self._run(evaluate_scenarios, sum_daily_wh, scenarios)
+        self.stats.record_batch(len(scenarios))
+        response = {"results": _records(results)}
+        if body.get("monthly"):
+            response["monthly_kwh"] = _records(monthly)
+        return response
+
+    def sweep(self, body):
+        _, sum_daily_wh = self._profile(body.get("profile_id"))
+        values = body.get("values")
+        if values is None and "start" in body and "stop" in body:
+            start, stop, num = body["start"], body["stop"], body.get("num", 50)
+            if not all(_is_number(v) for v in (start, stop, num)) or not np.isfinite([start, stop, num]).all():
+                raise ServiceError(400, "start and stop must be finite numbers and num an integer")
+            if num != int(num) or num < 1:
+                raise ServiceError(400, "num must be a positive integer")
+            # Checked before allocating the sweep
+            if num > MAX_SCENARIOS:
+                raise ServiceError(413, f"At most {MAX_SCENARIOS} sweep values per request")
+            values = np.linspace(start, stop, int(num)).tolist()
+        if not isinstance(values, list) or not values:
+            raise ServiceError(400, "values must be a non-empty list, or give start, stop and num")
+        if len(values) > MAX_SCENARIOS:
+            raise ServiceError(413, f"At most {MAX_SCENARIOS} sweep values per request")
+        base = body.get("base", {})
+        if not isinstance(base, dict):
+            raise ServiceError(400, "base must be an object of scenario fields")
+        results, _ = self._run(sweep_scenarios, sum_daily_wh, base, body.get("parameter"), values)
+        self.stats.record_batch(len(values))
+        return {"parameter": body.get("parameter"), "results": _records(results)}
+
+    def health(self):
+        return {"status": "ok", "uptime_s": time.time() - self.stats.started}
+
+    def handle(self, method, path, query, body):
+        """Dispatch one request; returns (status, payload)."""
+        if method == "GET" and path == "/health":
+            return 200, self.health()
+        if method == "GET" and path == "/metrics":
+            if query.get("format") == "prometheus":
+                return 200, REGISTRY.to_prometheus()
+            return 200, _json_safe(self.stats.snapshot())
+        if method == "GET" and path.startswith("/profiles/"):
+            return 200, self.profile_summary(path[len("/profiles/"):])
+        if method == "POST" and path == "/profiles":
+            file_format = query.get("format", "xlsx")
+            return 201, self.upload_profile(body, file_format)
+        if method == "POST" and path in ("/scenario", "/scenarios", "/sweep"):
+            try:
+                payload = json.loads(body or b"{}")
+            except json.JSONDecodeError as e:
+                raise ServiceError(400, f"Invalid JSON: {e}")
+            if not isinstance(payload, dict):
+                raise ServiceError(400, "Request body must be a JSON object")
+            return 200, getattr(self, path[1:])(payload)
+        raise ServiceError(404, f"No endpoint {method} {path}")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service = None
+    server_version = "HelixisSolar/1.0"
+
+    def _respond(self, status, payload):
+        if isinstance(payload, str):
+            data, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            data, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self, method):
+        started = time.perf_counter()
+        url = urlparse(self.path)
+        endpoint = "/profiles/<id>" if url.path.startswith("/profiles/") else url.path
+        query = dict(part.split("=", 1) for part in url.query.split("&") if "=" in part)
+        status = 500
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                raise ServiceError(413, f"Request body larger than {MAX_BODY_BYTES} bytes")
+            body = self.rfile.read(length) if length else b""
+            status, payload = self.service.handle(method, url.path, query, body)
+        except ServiceError as e:
+            status, payload = e.status, {"error": str(e)}
+        except ValueError as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        self._respond(status, payload)
+        self.service.stats.record(f"{method} {endpoint}", time.perf_counter() - started, status < 400)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS):
+    """HTTP server bound to host:port (port 0 picks a free one); call serve_forever()."""
+    service = CalculationService(workers)
+    handler = type("Handler", (_Handler,), {"service": service})
+    server = _Server((host, port), handler)
+    server.service = service
+    server.url = f"http://{server.server_address[0]}:{server.server_address[1]}"
+    return server
+
+
+def start_service(host=DEFAULT_HOST, port=0, workers=DEFAULT_WORKERS):
+    """Run a server on a background thread, e.g. for tests; stop it with stop_service."""
+    server = make_server(host, port, workers)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stop_service(server):
+    server.shutdown()
+    server.server_close()
+    server.service.close()
+
+
+# -------------------------------------------------
+# Test client
+# -------------------------------------------------
+
+class ServiceClient:
+    """Minimal JSON client over urllib; raises ServiceError for error responses."""
+
+    def __init__(self, base_url, timeout=REQUEST_TIMEOUT_S):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, method, path, body=None, content_type="application/json"):
+        if body is not None and content_type == "application/json":
+            body = json.dumps(body).encode("utf-8")
+        request = urllib.request.Request(self.base_url + path, data=body, method=method)
+        if body is not None:
+            request.add_header("Content-Type", content_type)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                if response.headers.get_content_type() == "text/plain":
+                    return response.read().decode("utf-8")
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise ServiceError(e.code, json.loads(e.read() or b"{}").get("error", e.reason))
+
+    def upload_profile(self, path_or_bytes, file_format=None):
+        if isinstance(path_or_bytes, (bytes, bytearray)):
+            data = bytes(path_or_bytes)
+        else:
+            with open(path_or_bytes, "rb") as f:
+                data = f.read()
+            file_format = file_format or str(path_or_bytes).rsplit(".", 1)[-1].lower()
+        return self._request("POST", f"/profiles?format={file_format or 'xlsx'}", data, "application/octet-stream")
+
+    def profile(self, profile_id):
+        return self._request("GET", f"/profiles/{profile_id}")
+
+    def scenario(self, profile_id, **fields):
+        return self._request("POST", "/scenario", {"profile_id": profile_id, **fields})
+
+    def scenarios(self, profile_id, scenarios, monthly=False):
+        return self._request("POST", "/scenarios", {"profile_id": profile_id, "scenarios": scenarios, "monthly": monthly})
+
+    def sweep(self, profile_id, parameter, values, base=None):
+        return self._request("POST", "/sweep", {
+            "profile_id": profile_id, "parameter": parameter, "values": list(values), "base": base or {}
+        })
+
+    def metrics(self, prometheus=False):
+        return self._request("GET", "/metrics?format=prometheus" if prometheus else "/metrics")
+
+    def health(self):
+        return self._request("GET", "/health")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Helixis solar calculation service (local HTTP/JSON)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args(argv)
+    server = make_server(args.host, args.port, args.workers)
+    print(f"Serving on {server.url} with {args.workers} workers (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_service(server)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+from solar_core import APERTURE_12, APERTURE_24, APERTURE_36
+from solar_geometry import TRACKING_MODES, mean_over_sun_up, sun_samples_24x12
+
+# -------------------------------------------------
+# Row-to-row shading of single-axis collector rows
+# -------------------------------------------------
+# Units share one aperture width and differ in length, so the 12, 24 and
+# 36 m² models are 10, 20 and 30 m long. Rows are parallel horizontal
+# tracking axes at a fixed pitch (axis-to-axis distance); every row except
+# the one facing the sun is shaded by its neighbour once the projected
+# gap pitch * cos(rotation) is narrower than the aperture width. Rows are
+# treated as long compared with the pitch, so end effects are ignored.
+
+APERTURE_WIDTH_M = 1.235
+
+UNIT_APERTURES = {
+    "12 m²": APERTURE_12,
+    "24 m²": APERTURE_24,
+    "36 m²": APERTURE_36,
+}
+
+
+def unit_length_m(aperture_m2):
+    return aperture_m2 / APERTURE_WIDTH_M
+
+
+def tracker_rotation(zenith_deg, azimuth_deg, axis_azimuth_deg):
+    """Rotation [deg] of a horizontal-axis tracker facing the sun, from vertical."""
+    zenith = np.radians(zenith_deg)
+    across_axis = np.sin(zenith) * np.sin(np.radians(np.asarray(azimuth_deg) - axis_azimuth_deg))
+    return np.degrees(np.arctan2(np.abs(across_axis), np.cos(zenith)))
+
+
+def shaded_fraction(rotation_deg, pitch_m, n_rows, width_m=APERTURE_WIDTH_M):
+    """Field-average shaded share of the aperture; all inputs broadcast."""
+    projected_gap = np.asarray(pitch_m, dtype=float) * np.cos(np.radians(rotation_deg))
+    row_shading = np.clip(1.0 - projected_gap / width_m, 0.0, 1.0)
+    n_rows = np.asarray(n_rows, dtype=float)
+    return row_shading * np.where(n_rows > 1, (n_rows - 1) / np.maximum(n_rows, 1), 0.0)
+
+
+def unshaded_factor_24x12(latitude_deg, longitude_deg, utc_offset_h, tracking_mode, pitch_m, n_rows):
+    """1 - shaded fraction for each hour of each month's middle day.
+
+    pitch_m and n_rows may be arrays of layout candidates; the result then
+    has shape (candidates, 24, 12).
+    """
+    axis_azimuth = TRACKING_MODES[tracking_mode]
+    if axis_azimuth is None:
+        raise ValueError("Row shading is modelled for single-axis trackers only.")
+    zenith, azimuth, sun_up = sun_samples_24x12(latitude_deg, longitude_deg, utc_offset_h)
+    rotation = tracker_rotation(zenith, azimuth, axis_azimuth)
+    pitch = np.asarray(pitch_m, dtype=float)
+    rows = np.asarray(n_rows, dtype=float)
+    extra = (1,) * rotation.ndim
+    shade = shaded_fraction(rotation, pitch.reshape(pitch.shape + extra), rows.reshape(rows.shape + extra))
+    return mean_over_sun_up(1.0 - shade, sun_up)
+
+
+def land_area_m2(pitch_m, n_rows, row_length_m, width_m=APERTURE_WIDTH_M):
+    """Ground footprint of the field: rows at pitch plus one aperture width."""
+    n_rows = np.asarray(n_rows, dtype=float)
+    return ((n_rows - 1) * np.asarray(pitch_m, dtype=float) + width_m) * row_length_m
+
+
+def spacing_sweep(hour_matrix_wh, monthly_kwh_m2, latitude_deg, longitude_deg, utc_offset_h,
+                  tracking_mode, pitches_m, n_rows, row_length_m, system_kwh_per_kwh_m2):
+    """Row pitch vs land use vs annual yield, one row per pitch candidate.
+
+    hour_matrix_wh / monthly_kwh_m2 are the unshaded aperture irradiance;
+    system_kwh_per_kwh_m2 turns one kWh/m² of it into field output (mirror
+    area x efficiency x loop factor) so the sweep scales like
+    compute_thermal_outputs.
+    """
+    pitches = np.asarray(pitches_m, dtype=float)
+    unshaded = unshaded_factor_24x12(latitude_deg, longitude_deg, utc_offset_h, tracking_mode, pitches, n_rows)
+    dni = np.asarray(hour_matrix_wh, dtype=float)
+    dni_day = dni.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        monthly_factor = np.where(dni_day > 0, (dni * unshaded).sum(axis=1) / dni_day, 0.0)
+    monthly = np.asarray(monthly_kwh_m2, dtype=float)
+    annual_kwh = monthly_factor @ monthly * system_kwh_per_kwh_m2
+    land = land_area_m2(pitches, n_rows, row_length_m)
+    return pd.DataFrame({
+        "pitch_m": pitches,
+        "ground_cover_ratio": APERTURE_WIDTH_M / pitches,
+        "land_m2": land,
+        "annual_kwh": annual_kwh,
+        "shading_loss": 1.0 - monthly_factor @ monthly / monthly.sum(),
+        "kwh_per_land_m2": annual_kwh / land,
+    })
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from solar_core import APERTURE_12, APERTURE_24, APERTURE_36
+
+# -------------------------------------------------
+# Inverse sizing
+# -------------------------------------------------
+# Annual output is linear in mirror area (compute_thermal_outputs only
+# scales the DNI profile), so all solvers work on the specific yield in
+# kWh per m² of mirror per year and accept arrays of targets, which makes
+# a whole sizing curve one vectorized call.
+
+MAX_UNITS = 10_000
+
+# All apertures are whole multiples of the 12 m² module
+MODULE_AREA = APERTURE_12
+
+
+def unit_mix_for_area(mirror_area):
+    """Fewest units covering mirror_area, using the smallest remainder unit.
+
+    Returns (n12, n24, n36) integer arrays.
+    """
+    modules = np.ceil(np.round(np.asarray(mirror_area, dtype=float) / MODULE_AREA, 9))
+    modules = np.maximum(modules, 0).astype(np.int64)
+    n36, rest = np.divmod(modules, 3)
+    n12 = (rest == 1).astype(np.int64)
+    n24 = (rest == 2).astype(np.int64)
+    return n12, n24, n36
+
+
+def installed_area(n12, n24, n36):
+    return n12 * APERTURE_12 + n24 * APERTURE_24 + n36 * APERTURE_36
+
+
+def _bisect_first_true(predicate, lo, hi):
+    """Smallest integer n in [lo, hi] where predicate(n) holds, elementwise.
+
+    predicate must be monotone (False ... True) along n. Entries where it
+    never holds are returned as -1.
+    """
+    lo = np.array(lo, dtype=np.int64, copy=True)
+    hi = np.array(hi, dtype=np.int64, copy=True)
+    lo, hi = np.broadcast_arrays(lo, hi)
+    lo, hi = lo.copy(), hi.copy()
+    while np.any(lo < hi):
+        mid = (lo + hi) // 2
+        ok = predicate(mid)
+        hi = np.where(ok, mid, hi)
+        lo = np.where(ok, lo, mid + 1)
+    return np.where(predicate(lo), lo, -1)
+
+
+def _solution(n12, n24, n36, specific_kwh_m2, value_per_m2, unit_cost, installation_cost):
+    area = installed_area(n12, n24, n36)
+    units = n12 + n24 + n36
+    annual_kwh = area * specific_kwh_m2
+    annual_value = area * value_per_m2
+    system_cost = units * unit_cost + installation_cost
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback = np.where(annual_value > 0, system_cost / annual_value, np.inf)
+    return pd.DataFrame({
+        "mirror_area": area,
+        "n12": n12,
+        "n24": n24,
+        "n36": n36,
+        "units": units,
+        "annual_kwh": annual_kwh,
+        "system_cost": system_cost,
+        "payback_years": payback,
+    })
+
+
+def solve_for_energy(target_kwh, specific_kwh_m2, value_per_m2=0.0, unit_cost=0.0,
+                     installation_cost=0.0, max_units=MAX_UNITS):
+    """Smallest unit mix whose annual system energy reaches target_kwh.
+
+    Targets that need more than max_units units, or any target on a site
+    without yield, are infeasible and come back with zero units.
+    """
+    target_kwh = np.atleast_1d(np.asarray(target_kwh, dtype=float))
+    if specific_kwh_m2 > 0:
+        exact_area = np.maximum(target_kwh / specific_kwh_m2, 0.0)
+    else:
+        exact_area = np.zeros_like(target_kwh)
+    n12, n24, n36 = unit_mix_for_area(exact_area)
+    infeasible = (n12 + n24 + n36 > max_units) | (specific_kwh_m2 <= 0)
+    n12, n24, n36 = (np.where(infeasible, 0, n) for n in (n12, n24, n36))
+    return _solution(n12, n24, n36, specific_kwh_m2, value_per_m2, unit_cost, installation_cost)
+
+
+def solve_for_payback(max_payback_years, specific_kwh_m2, value_per_m2, unit_cost,
+                      installation_cost, max_units=MAX_UNITS):
+    """Smallest system whose simple payback is within max_payback_years.
+
+    All units cost the same, so for a given unit count the all-36 m² mix
+    has the most area and the shortest payback; payback then falls
+    monotonically with the unit count and is bisected on it. Infeasible
+    targets come back with zero units and an infinite payback.
+    """
+    target = np.atleast_1d(np.asarray(max_payback_years, dtype=float))
+
+    def meets_target(n36):
+        value = n36 * APERTURE_36 * value_per_m2
+        cost = n36 * unit_cost + installation_cost
+        return (value > 0) & (cost <= target * value)
+
+    n36 = _bisect_first_true(meets_target, np.ones_like(target, dtype=np.int64), max_units)
+    n36 = np.maximum(n36, 0)
+    zeros = np.zeros_like(n36)
+    return _solution(zeros, zeros, n36, specific_kwh_m2, value_per_m2, unit_cost, installation_cost)
+
+
+def solve_for_budget(budget, specific_kwh_m2, value_per_m2, unit_cost, installation_cost,
+                     max_units=MAX_UNITS):
+    """Largest system whose capital cost fits within budget."""
+    budget = np.atleast_1d(np.asarray(budget, dtype=float))
+
+    # First unit count that no longer fits, minus one
+    def over_budget(n36):
+        return n36 * unit_cost + installation_cost > budget
+
+    first_over = _bisect_first_true(over_budget, np.zeros_like(budget, dtype=np.int64), max_units + 1)
+    n36 = np.where(first_over < 0, max_units, first_over - 1)
+    n36 = np.maximum(n36, 0)
+    zeros = np.zeros_like(n36)
+    return _solution(zeros, zeros, n36, specific_kwh_m2, value_per_m2, unit_cost, installation_cost)
+
+
+def min_achievable_payback(value_per_m2, unit_cost, installation_cost, max_units=MAX_UNITS):
+    """Payback of the largest allowed system, the lower bound for solve_for_payback."""
+    value = max_units * APERTURE_36 * value_per_m2
+    if value <= 0:
+        return float("inf")
+    return (max_units * unit_cost + installation_cost) / value
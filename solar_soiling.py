@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from solar_core import DAYS_IN_MONTH
+
+# -------------------------------------------------
+# Soiling, degradation and cleaning schedules
+# -------------------------------------------------
+# Mirrors lose a share of their output per day since the last cleaning,
+# up to a saturation loss, and the optics degrade by a fixed share per
+# year. Every candidate cleaning interval is one row of a
+# (candidates, lifetime days) array, so the search is a handful of
+# array operations rather than loops over days.
+
+LIFETIME_YEARS = 20
+DAYS_PER_YEAR = 365
+
+
+def daily_energy(monthly_kwh):
+    """Clean-mirror energy for each day of the year from monthly totals."""
+    days = np.array(list(DAYS_IN_MONTH.values()))
+    return np.repeat(np.asarray(monthly_kwh, dtype=float) / days, days)
+
+
+def cleanliness(interval_days, n_days, soiling_rate_per_day, max_soiling_loss):
+    """Output factor per candidate and day; cleanings happen every interval_days.
+
+    Returns (factor, cleaned) arrays of shape (candidates, n_days).
+    """
+    interval = np.atleast_1d(np.asarray(interval_days, dtype=np.int64))[:, None]
+    day = np.arange(n_days)[None, :]
+    days_since_cleaning = day % interval
+    loss = np.minimum(soiling_rate_per_day * days_since_cleaning, max_soiling_loss)
+    cleaned = (days_since_cleaning == 0) & (day > 0)
+    return 1.0 - loss, cleaned
+
+
+def cleaning_schedule_npv(
+    monthly_system_kwh,
+    value_per_kwh,
+    system_cost,
+    interval_days,
+    soiling_rate_per_day,
+    max_soiling_loss,
+    cleaning_cost,
+    degradation_per_year,
+    discount_rate,
+    years=LIFETIME_YEARS
+):
+    """NPV of each cleaning interval over the system lifetime.
+
+    An interval of years * 365 days or more means the mirrors are never
+    cleaned. Returns (summary, annual_kwh) where summary has one row per
+    interval and annual_kwh is a (candidates, years) array.
+    """
+    intervals = np.atleast_1d(np.asarray(interval_days, dtype=np.int64))
+    n_days = years * DAYS_PER_YEAR
+    factor, cleaned = cleanliness(intervals, n_days, soiling_rate_per_day, max_soiling_loss)
+
+    clean_daily = np.tile(daily_energy(monthly_system_kwh), years)
+    degradation = (1.0 - degradation_per_year) ** np.arange(years)
+    annual_kwh = (factor * clean_daily).reshape(len(intervals), years, DAYS_PER_YEAR).sum(axis=2) * degradation
+    annual_cleanings = cleaned.reshape(len(intervals), years, DAYS_PER_YEAR).sum(axis=2)
+
+    cash_flow = annual_kwh * value_per_kwh - annual_cleanings * cleaning_cost
+    discount = (1.0 + discount_rate) ** -np.arange(1, years + 1)
+    npv = cash_flow @ discount - system_cost
+
+    unsoiled_kwh = clean_daily.reshape(years, DAYS_PER_YEAR).sum(axis=1) * degradation
+    summary = pd.DataFrame({
+        "interval_days": intervals,
+        "npv": npv,
+        "lifetime_kwh": annual_kwh.sum(axis=1),
+        "cleanings_per_year": annual_cleanings.mean(axis=1),
+        "cleaning_cost_per_year": annual_cleanings.mean(axis=1) * cleaning_cost,
+        "soiling_loss": 1.0 - annual_kwh.sum(axis=1) / unsoiled_kwh.sum(),
+    })
+    return summary, annual_kwh
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from solar_core import expand_to_8760, to_hourly
+
+# -------------------------------------------------
+# Thermal storage dispatch
+# -------------------------------------------------
+# The state of charge is a sequential recursion over the hours, so the
+# loop runs over the 8760 hours once and every storage candidate is a
+# lane of the same NumPy arrays. Thousands of candidates cost about as
+# much Python overhead as one.
+
+
+def _as_8760(profile_kw):
+    profile_kw = np.asarray(profile_kw, dtype=float)
+    return expand_to_8760(profile_kw) if profile_kw.ndim == 2 else to_hourly(profile_kw)
+
+
+def simulate_storage(
+    production_kw,
+    demand_kw,
+    capacity_kwh,
+    max_charge_kw=np.inf,
+    max_discharge_kw=np.inf,
+    standing_loss_frac=0.0,
+    record_hourly=False
+):
+    """Greedy hourly dispatch of a buffer tank between production and demand.
+
+    Production first serves demand directly; any surplus charges the tank
+    (up to max_charge_kw and the free capacity) and any deficit is served
+    from it (up to max_discharge_kw). standing_loss_frac is the share of
+    the stored energy lost per hour. capacity_kwh and the limits broadcast
+    against each other, one candidate per element; the tank starts empty.
+
+    Returns annual kWh totals per candidate and, with record_hourly, the
+    hourly discharge and state of charge as (8760, n) arrays.
+    """
+    production = _as_8760(production_kw)
+    demand = _as_8760(demand_kw)
+    capacity, max_charge, max_discharge = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(capacity_kwh, dtype=float)),
+        np.asarray(max_charge_kw, dtype=float),
+        np.asarray(max_discharge_kw, dtype=float),
+    )
+    n = capacity.shape[0]
+
+    direct = np.minimum(production, demand)
+    surplus = production - direct
+    deficit = demand - direct
+    keep = 1.0 - standing_loss_frac
+
+    soc = np.zeros(n)
+    charged = np.zeros(n)
+    discharged = np.zeros(n)
+    if record_hourly:
+        hourly_discharge = np.zeros((len(production), n))
+        hourly_soc = np.zeros((len(production), n))
+
+    for t in range(len(production)):
+        if keep != 1.0:
+            soc *= keep
+        if surplus[t] > 0:
+            charge = np.minimum(np.minimum(max_charge, capacity - soc), surplus[t])
+            soc += charge
+            charged += charge
+        elif deficit[t] > 0:
+            discharge = np.minimum(np.minimum(max_discharge, soc), deficit[t])
+            soc -= discharge
+            discharged += discharge
+            if record_hourly:
+                hourly_discharge[t] = discharge
+        if record_hourly:
+            hourly_soc[t] = soc
+
+    total_demand = demand.sum()
+    used = direct.sum() + discharged
+    result = {
+        "capacity_kwh": capacity,
+        "charged": charged,
+        "discharged": discharged,
+        "used": used,
+        "curtailed": surplus.sum() - charged,
+        "backup": total_demand - used,
+        "standing_loss": charged - discharged - soc,
+        "solar_fraction": used / total_demand if total_demand > 0 else np.zeros(n),
+    }
+    if record_hourly:
+        result["direct"] = direct
+        result["hourly_discharge"] = hourly_discharge
+        result["hourly_soc"] = hourly_soc
+    return result
+
+
+def storage_curve(production_kw, demand_kw, capacities_kwh, max_charge_kw=np.inf,
+                  max_discharge_kw=np.inf, standing_loss_frac=0.0):
+    """Storage size vs solar fraction, one row per candidate capacity."""
+    result = simulate_storage(
+        production_kw, demand_kw, capacities_kwh, max_charge_kw, max_discharge_kw, standing_loss_frac
+    )
+    return pd.DataFrame({k: v for k, v in result.items() if np.ndim(v) == 1})
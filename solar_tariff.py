@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from solar_core import (
+    HOURS_PER_YEAR,
+    MONTHS,
+    expand_to_8760,
+    mean_24x12,
+    monthly_sum_8760,
+    parse_hourly_table_csv,
+    to_hourly,
+)
+
+# -------------------------------------------------
+# Tariffs
+# -------------------------------------------------
+# A tariff is either a flat price (float), a 24x12 hours x months price
+# matrix, or a one-year price series, all in €/kWh. Series and production
+# finer than hourly are averaged to hours before pricing.
+
+
+def flat_tariff(price):
+    return pd.DataFrame(float(price), index=range(24), columns=MONTHS)
+
+
+def banded_tariff(base_price, bands=(), month_factors=None):
+    """Build a 24x12 tariff from hour bands.
+
+    bands: iterable of (start_hour, end_hour, price, months) applied in
+    order; end_hour is exclusive and may wrap past midnight, months=None
+    means all months. month_factors: {month: multiplier} applied last,
+    e.g. a winter surcharge.
+    """
+    tariff = flat_tariff(base_price)
+    hours = np.arange(24)
+    for start_hour, end_hour, price, months in bands:
+        if start_hour <= end_hour:
+            in_band = (hours >= start_hour) & (hours < end_hour)
+        else:
+            in_band = (hours >= start_hour) | (hours < end_hour)
+        tariff.loc[in_band, list(months or MONTHS)] = float(price)
+    for month, factor in (month_factors or {}).items():
+        tariff[month] *= factor
+    return tariff
+
+
+def parse_tariff_csv(csv_file):
+    """Read a 24x12 (hours x months) or one-year price table in €/kWh."""
+    return parse_hourly_table_csv(csv_file, "Tariff CSV")
+
+
+def tariff_24x12(tariff):
+    """Typical-day price matrix (24x12 array) for any tariff form.
+
+    Averaging an 8760 tariff per month and hour is exact for valuing a
+    typical-day production profile, which repeats every day of the month.
+    """
+    if np.isscalar(tariff):
+        return np.full((24, 12), float(tariff))
+    tariff = np.asarray(tariff, dtype=float)
+    if tariff.ndim == 1:
+        return mean_24x12(to_hourly(tariff))
+    return tariff
+
+
+def tariff_8760(tariff):
+    if np.isscalar(tariff):
+        return np.full(HOURS_PER_YEAR, float(tariff))
+    tariff = np.asarray(tariff, dtype=float)
+    if tariff.ndim == 1:
+        return to_hourly(tariff)
+    return expand_to_8760(tariff)
+
+
+def tariff_value(hourly_system_kw, monthly_system_kwh, tariff):
+    """Value the production under a tariff.
+
+    hourly_system_kw is either the 24x12 typical-day matrix or a
+    one-year series at any resolution, valued per hour. Typical-day production is priced by the elementwise product
+    with the price matrix; each month's energy (from the workbook Sum row)
+    is then valued at that month's production-weighted price, so a flat
+    tariff reproduces annual_system_kwh * price exactly.
+
+    Returns (hourly_value_eur, monthly_value_eur, annual_value_eur).
+    """
+    if np.ndim(hourly_system_kw) == 1:
+        hourly_value = to_hourly(hourly_system_kw) * tariff_8760(tariff)
+        monthly_value = monthly_sum_8760(hourly_value)
+        return hourly_value, monthly_value, float(monthly_value.sum())
+
+    production = np.asarray(hourly_system_kw, dtype=float)
+    prices = tariff_24x12(tariff)
+    hourly_value = production * prices
+    if np.isscalar(tariff):
+        weighted_price = np.full(12, float(tariff))
+    else:
+        day_energy = production.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weighted_price = np.where(
+                day_energy > 0, hourly_value.sum(axis=0) / day_energy, prices.mean(axis=0)
+            )
+    monthly_value = pd.Series(
+        np.asarray(monthly_system_kwh, dtype=float) * weighted_price,
+        index=getattr(monthly_system_kwh, "index", MONTHS)
+    )
+    if isinstance(hourly_system_kw, pd.DataFrame):
+        hourly_value = pd.DataFrame(hourly_value, index=hourly_system_kw.index, columns=hourly_system_kw.columns)
+    return hourly_value, monthly_value, float(monthly_value.sum())
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+
+from solar_core import (
+    DAYS_IN_MONTH,
+    HOURS_PER_YEAR,
+    MONTHS,
+    mean_24x12,
+    series_steps_per_hour,
+    to_hourly,
+    year_calendar,
+)
+
+# -------------------------------------------------
+# Sub-hourly DNI series
+# -------------------------------------------------
+# Measured series come at 10- or 15-minute resolution, 35k-53k points per
+# year. They are read in chunks into one float32 buffer, then resampled
+# with reshapes and bincounts to the hourly series and the 24x12 typical
+# days the rest of the calculator works on. Thermal output can also be
+# computed at the native resolution, where clipping above the field's
+# rating is not smoothed away by hourly averaging.
+
+CHUNK_ROWS = 8760
+# 10-minute data of a leap year, the largest common case
+INITIAL_BUFFER = 366 * 24 * 6
+HOURS_PER_LEAP_YEAR = HOURS_PER_YEAR + 24
+LEAP_DAY_START_HOUR = 59 * 24
+
+
+def read_dni_series(csv_file, chunk_rows=CHUNK_ROWS):
+    """Read one year of DNI [W/m²] from the last numeric column of a CSV.
+
+    Rows are read chunk by chunk into a growing float32 buffer; values
+    that are missing or not numbers stay NaN (see fill_gaps).
+    """
+    buffer = np.empty(INITIAL_BUFFER, dtype=np.float32)
+    n_values = 0
+    column = None
+    for chunk in pd.read_csv(csv_file, chunksize=chunk_rows):
+        if column is None:
+            numeric = chunk.apply(pd.to_numeric, errors="coerce").dropna(axis=1, how="all")
+            if numeric.shape[1] == 0:
+                raise ValueError("DNI CSV has no numeric column.")
+            column = numeric.columns[-1]
+        values = pd.to_numeric(chunk[column], errors="coerce").to_numpy(dtype=np.float32)
+        if n_values + len(values) > len(buffer):
+            buffer = np.resize(buffer, max(2 * len(buffer), n_values + len(values)))
+        buffer[n_values:n_values + len(values)] = values
+        n_values += len(values)
+    return drop_leap_day(buffer[:n_values].copy())
+
+
+def drop_leap_day(series):
+    """Remove 29 February from a leap-year series; other lengths pass through."""
+    if len(series) == 0 or len(series) % HOURS_PER_LEAP_YEAR or len(series) % HOURS_PER_YEAR == 0:
+        return series
+    steps = len(series) // HOURS_PER_LEAP_YEAR
+    start = LEAP_DAY_START_HOUR * steps
+    return np.delete(series, np.s_[start:start + 24 * steps])
+
+
+def fill_gaps(series):
+    """Linear interpolation over NaN values; returns (filled, n_missing)."""
+    missing = np.isnan(series)
+    n_missing = int(missing.sum())
+    if n_missing == 0:
+        return series, 0
+    if n_missing == len(series):
+        raise ValueError("DNI series holds no valid values.")
+    index = np.arange(len(series))
+    filled = series.copy()
+    filled[missing] = np.interp(index[missing], index[~missing], series[~missing])
+    return filled, n_missing
+
+
+def profiles_from_series(dni_w_m2):
+    """24x12 typical-day matrix [Wh/m² per hour] and Sum row from a one-year series.
+
+    Same shapes as parse_hourly_profiles, so every profile-based
+    calculation runs unchanged on measured data.
+    """
+    hour_matrix_wh = pd.DataFrame(mean_24x12(to_hourly(dni_w_m2)), index=range(24), columns=MONTHS)
+    return hour_matrix_wh, hour_matrix_wh.sum(axis=0)
+
+
+def monthly_sum_series(values):
+    """Sum per month of a one-year series at any resolution."""
+    month_index, _ = year_calendar(series_steps_per_hour(values))
+    return pd.Series(np.bincount(month_index, weights=values, minlength=12), index=MONTHS)
+
+
+def compute_thermal_timeseries(
+    dni_w_m2,
+    mirror_area_m2,
+    eta_opt,
+    thermal_loss_frac,
+    max_thermal_kw=None
+):
+    """Thermal output of a one-year DNI series at its own resolution.
+
+    eta_opt is a scalar or an array the length of the series; max_thermal_kw
+    caps the field output (receiver or loop rating). Returns the same
+    8-tuple as compute_thermal_outputs, with power series [kW] at the
+    input resolution and daily_* the average day of each month.
+    """
+    dni = np.asarray(dni_w_m2, dtype=np.float32)
+    steps = series_steps_per_hour(dni)
+    loop_factor = (1 - thermal_loss_frac)
+
+    power_direct_kw = dni / np.float32(1000.0) * np.float32(mirror_area_m2) * np.asarray(eta_opt, dtype=np.float32)
+    if max_thermal_kw is not None:
+        power_direct_kw = np.minimum(power_direct_kw, np.float32(max_thermal_kw))
+    power_system_kw = power_direct_kw * np.float32(loop_factor)
+
+    # float64 accumulation keeps the totals exact to the summation order
+    monthly_direct_kwh = monthly_sum_series(power_direct_kw.astype(float)) / steps
+    monthly_system_kwh = monthly_direct_kwh * loop_factor
+    days = pd.Series(DAYS_IN_MONTH)
+    daily_direct_kwh = monthly_direct_kwh / days
+    daily_system_kwh = daily_direct_kwh * loop_factor
+
+    annual_direct_kwh = monthly_direct_kwh.sum()
+    annual_system_kwh = annual_direct_kwh * loop_factor
+
+    return (
+        annual_direct_kwh,
+        annual_system_kwh,
+        monthly_direct_kwh,
+        monthly_system_kwh,
+        power_direct_kw,
+        power_system_kw,
+        daily_direct_kwh,
+        daily_system_kwh,
+    )
+
+
+def resolution_effects(dni_w_m2, rated_dni_w_m2):
+    """What hourly averaging hides: peaks and irradiance above a rating.
+
+    rated_dni_w_m2 is the DNI at which the field reaches its rated output;
+    above it the output clips. Returns a dict comparing the native series
+    with its hourly average.
+    """
+    dni = np.asarray(dni_w_m2, dtype=np.float32)
+    steps = series_steps_per_hour(dni)
+    hourly = to_hourly(dni)
+    total = float(dni.sum(dtype=np.float64)) / steps
+    clipped_native = float(np.maximum(dni - rated_dni_w_m2, 0).sum(dtype=np.float64)) / steps
+    clipped_hourly = float(np.maximum(hourly - rated_dni_w_m2, 0).sum())
+    return {
+        "steps_per_hour": steps,
+        "peak_native": float(dni.max()),
+        "peak_hourly": float(hourly.max()),
+        "steps_above_rating": int((dni > rated_dni_w_m2).sum()),
+        "hours_above_rating": int((hourly > rated_dni_w_m2).sum()),
+        "clipped_share_native": clipped_native / total if total > 0 else 0.0,
+        "clipped_share_hourly": clipped_hourly / total if total > 0 else 0.0,
+        "ramp_p99_native": float(np.percentile(np.abs(np.diff(dni)), 99)) if len(dni) > 1 else 0.0,
+    }
@@ -0,0 +1,181 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from openpyxl.utils import get_column_letter
+
+# -------------------------------------------------
+# Pre-flight workbook validation
+# -------------------------------------------------
+# GSA and Energydata.info exports put a month header, 24 hour rows and a
+# "Sum" row near the top of the hourly sheet, but not always at the same
+# row or column. The validator streams only the first rows of that sheet
+# (openpyxl read-only mode), finds the three blocks and checks their
+# values, so a malformed file is rejected with a cell reference before
+# pandas loads the whole workbook. The layout it returns tells
+# parse_hourly_profiles where to read.
+
+SHEET_NAME = "Hourly_profiles"
+# Rows streamed while looking for the header, hour and Sum rows
+SCAN_ROWS = 60
+MONTH_PREFIXES = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+SUM_LABELS = {"sum", "total", "daily sum"}
+# Sum row vs. the sum of its hour column, relative and in Wh/m²
+SUM_RTOL = 0.01
+SUM_ATOL = 1.0
+
+
+class WorkbookLayoutError(ValueError):
+    """The workbook does not have the hourly profile layout."""
+
+
+def _cell(row, col):
+    return f"{get_column_letter(col + 1)}{row + 1}"
+
+
+def _is_month(value, month):
+    return isinstance(value, str) and value.strip().lower().startswith(MONTH_PREFIXES[month])
+
+
+def _find_sheet(workbook):
+    if SHEET_NAME in workbook.sheetnames:
+        return SHEET_NAME
+    for name in workbook.sheetnames:
+        if name.strip().lower().replace(" ", "_") == SHEET_NAME.lower():
+            return name
+    raise WorkbookLayoutError(
+        f"No '{SHEET_NAME}' sheet; the workbook has: {', '.join(workbook.sheetnames)}."
+    )
+
+
+def _find_header(rows):
+    """(row, first month column) of a Jan..Dec header row."""
+    for r, row in enumerate(rows):
+        for c in range(len(row) - 11):
+            if all(_is_month(row[c + m], m) for m in range(12)):
+                return r, c
+    raise WorkbookLayoutError(
+        f"No month header (Jan ... Dec in 12 adjacent cells) in the first {len(rows)} rows."
+    )
+
+
+def _number(value, row, col, what):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        found = "an empty cell" if value is None else repr(value)
+        raise WorkbookLayoutError(f"{what} at cell {_cell(row, col)} must be a number; found {found}.")
+    if not np.isfinite(value) or value < 0:
+        raise WorkbookLayoutError(f"{what} at cell {_cell(row, col)} must be a non-negative number; found {value}.")
+    return float(value)
+
+
+def detect_layout(xls_file, scan_rows=SCAN_ROWS):
+    """Locate and check the hourly profile block of a workbook.
+
+    Returns a dict: sheet, header_row, label_col (None when the hours have
+    no label column), month_cols, months, hour_rows (24 row indices) and
+    sum_row, all 0-based. Raises WorkbookLayoutError (a ValueError) with
+    the offending cell when the layout or a value is wrong. File objects
+    are rewound afterwards.
+    """
+    try:
+        workbook = openpyxl.load_workbook(xls_file, read_only=True, data_only=True)
+    except Exception as e:
+        raise WorkbookLayoutError(f"Not a readable .xlsx workbook ({type(e).__name__}: {e}).")
+    try:
+        sheet = _find_sheet(workbook)
+        rows = [list(row) for row in workbook[sheet].iter_rows(max_row=scan_rows, values_only=True)]
+    finally:
+        workbook.close()
+        if hasattr(xls_file, "seek"):
+            xls_file.seek(0)
+
+    header_row, first_col = _find_header(rows)
+    month_cols = list(range(first_col, first_col + 12))
+    label_col = first_col - 1 if first_col > 0 else None
+
+    hour_rows, sum_row = [], None
+    for r in range(header_row + 1, len(rows)):
+        row = rows[r] + [None] * (first_col + 12 - len(rows[r]))
+        label = row[label_col] if label_col is not None else None
+        if isinstance(label, str) and label.strip().lower() in SUM_LABELS:
+            sum_row = r
+            break
+        if all(row[c] is None for c in month_cols) and label is None:
+            continue
+        hour_rows.append(r)
+        if len(hour_rows) > 24:
+            raise WorkbookLayoutError(
+                f"More than 24 hour rows below the month header (row {header_row + 1}) "
+                f"before a 'Sum' row; extra row at {_cell(r, first_col)}."
+            )
+    if len(hour_rows) != 24:
+        raise WorkbookLayoutError(
+            f"Expected 24 hour rows below the month header (row {header_row + 1}); found {len(hour_rows)}."
+        )
+    if sum_row is None:
+        raise WorkbookLayoutError(
+            f"No 'Sum' row after the hour rows within the first {len(rows)} rows"
+            + (f" (column {get_column_letter(label_col + 1)})." if label_col is not None else ".")
+        )
+
+    months = [str(rows[header_row][c]).strip() for c in month_cols]
+    hourly = np.array([
+        [_number(rows[r][c], r, c, f"{months[m]} hour value") for m, c in enumerate(month_cols)]
+        for r in hour_rows
+    ])
+    sums = np.array([_number(rows[sum_row][c], sum_row, c, f"{months[m]} Sum") for m, c in enumerate(month_cols)])
+    mismatch = ~np.isclose(sums, hourly.sum(axis=0), rtol=SUM_RTOL, atol=SUM_ATOL)
+    if mismatch.any():
+        m = int(np.argmax(mismatch))
+        raise WorkbookLayoutError(
+            f"{months[m]} Sum at cell {_cell(sum_row, month_cols[m])} is {sums[m]:,.1f} Wh/m² "
+            f"but its 24 hour values add up to {hourly[:, m].sum():,.1f}."
+        )
+
+    return {
+        "sheet": sheet,
+        "header_row": header_row,
+        "label_col": label_col,
+        "month_cols": month_cols,
+        "months": months,
+        "hour_rows": hour_rows,
+        "sum_row": sum_row,
+    }
+
+
+def validate_workbooks(paths, scan_rows=SCAN_ROWS):
+    """detect_layout over many files; one row per file with ok, error and milliseconds."""
+    rows = []
+    for path in paths:
+        started = time.perf_counter()
+        try:
+            detect_layout(path, scan_rows)
+            error = ""
+        except (WorkbookLayoutError, OSError) as e:
+            error = str(e)
+        rows.append({
+            "file": str(path),
+            "ok": not error,
+            "error": error,
+            "ms": (time.perf_counter() - started) * 1000.0,
+        })
+    return pd.DataFrame(rows, columns=["file", "ok", "error", "ms"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check GSA / Energydata.info workbooks before ingestion")
+    parser.add_argument("workbooks", nargs="+")
+    parser.add_argument("--scan-rows", type=int, default=SCAN_ROWS)
+    args = parser.parse_args(argv)
+    report = validate_workbooks(args.workbooks, args.scan_rows)
+    for row in report.itertuples():
+        print(f"{'OK  ' if row.ok else 'FAIL'} {row.file} ({row.ms:.0f} ms){'' if row.ok else ': ' + row.error}")
+    print(f"{int(report['ok'].sum())}/{len(report)} workbooks valid")
+    return 0 if report["ok"].all() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())